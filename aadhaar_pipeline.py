@@ -0,0 +1,242 @@
+import os
+import argparse
+import constants
+
+# Single entry point for the pipelines: `trends` (analyze_aadhaar), `anomalies`,
+# `gap` (gap_analysis_model), `audit` (audit_districts), `all` and `serve`
+# (query_server). `all` loads and normalizes each dataset once and hands the
+# same frames to every stage.
+# Pipeline modules (and with them pandas) are imported only by the command
+# that needs them, so --help and audit stay fast; option choices and defaults
+# come from the import-free constants module the pipelines share.
+
+BASE_DIR = r"E:\adhar hackathon"
+TRACE_FILE = os.path.join(BASE_DIR, "output", "trace.jsonl")
+STATE_DIR = os.path.join(BASE_DIR, "cache", "anomalies")
+ANOMALY_CATEGORIES = ['enrolment', 'biometric']
+
+
+def load_frames(args, categories=None):
+    import analyze_aadhaar
+    if categories is None:
+        return analyze_aadhaar.load_all(args.incremental, args.chunk_size, args.workers)
+    from data_quality import quality_report
+    with quality_report(analyze_aadhaar.QUALITY_FILE):
+        return {c: analyze_aadhaar.load_data(c, args.incremental, args.chunk_size, args.workers)
+                for c in categories}
+
+
+def run_trends(args, frames=None):
+    import analyze_aadhaar
+    analyze_aadhaar.main(incremental=args.incremental, chunk_size=args.chunk_size, workers=args.workers,
+                         export_format=args.export_format, compress=args.compress,
+                         state_charts=args.state_charts, frames=frames, anomaly_method=args.anomaly_method,
+                         canonical_locations=args.canonical_locations,
+                         report_formats=() if args.no_reports else args.report_format or ["md"])
+
+
+def find_anomalies(args, df, category):
+    import analyze_aadhaar
+    if args.method == "total":
+        return analyze_aadhaar.detect_anomalies(df, category)
+    import anomaly_engine
+    params = {"window": args.window}
+    if not args.update:
+        return anomaly_engine.detect(df, args.level, args.method, args.threshold, **params)
+    state_path = os.path.join(args.state_dir, f"{category}_{args.level}_{args.method}.pkl")
+    return anomaly_engine.detect_incremental(df, state_path, args.level, args.method, args.threshold, **params)
+
+
+def run_anomalies(args, frames=None):
+    if args.level == "pincode" and (args.incremental or args.chunk_size or args.workers):
+        # Those load paths keep monthly partials, which have no daily series
+        raise SystemExit("--level pincode needs row-level data; drop --incremental/--chunk-size/--workers")
+    frames = frames or load_frames(args, ANOMALY_CATEGORIES)
+    if args.canonical_locations:
+        import analyze_aadhaar
+        from hierarchy import canonical_frames
+        frames = canonical_frames(frames, [os.path.join(analyze_aadhaar.BASE_DIR, d)
+                                           for d in analyze_aadhaar.DIRS.values()], analyze_aadhaar.CACHE_DIR)
+    for category in ANOMALY_CATEGORIES:
+        anomalies = find_anomalies(args, frames[category], category)
+        print(f"\n--- {category} ---")
+        if len(anomalies):
+            print(anomalies.to_string(index=False))
+        else:
+            print("No anomalies found")
+
+
+def run_gap(args, frames=None):
+    import gap_analysis_model
+    gap_analysis_model.main(incremental=args.incremental, chunk_size=args.chunk_size, workers=args.workers,
+                            export_format=args.export_format, compress=args.compress, frames=frames,
+                            scenario_file=args.scenarios, weight_samples=args.weight_samples,
+                            canonical_locations=args.canonical_locations, forecast_horizon=args.forecast_horizon,
+                            placement_sites=args.sites, placement_radius=args.radius_km,
+                            centroids_file=args.centroids)
+
+
+def run_audit(args, frames=None):
+    from audit_districts import audit_districts, audit_raw
+    if args.raw:
+        audit_raw(args.min_similarity, args.proposals)
+    else:
+        audit_districts(args.min_similarity)
+
+
+def run_hierarchy(args, frames=None):
+    import analyze_aadhaar
+    import hierarchy
+    index = hierarchy.load_index([os.path.join(analyze_aadhaar.BASE_DIR, d) for d in analyze_aadhaar.DIRS.values()],
+                                 analyze_aadhaar.CACHE_DIR)
+    print(hierarchy.conflict_report(index, args.top))
+    if args.output:
+        hierarchy.conflicts(index).to_csv(args.output, index=False)
+        print(f"Conflicting pincodes written to {args.output}")
+
+
+def run_serve(args, frames=None):
+    import query_server
+    query_server.serve(args.host, args.port, not args.full_load, args.chunk_size, args.workers, args.cache_size)
+
+
+def run_all(args):
+    # Each dataset is loaded once; trends and gap share the frames, audit reads trends' output
+    frames = load_frames(args)
+    run_trends(args, frames)
+    run_gap(args, frames)
+    run_audit(args)
+
+
+COMMANDS = {
+    "trends": (run_trends, "monthly trends, anomalies and the dashboard insight files"),
+    "anomalies": (run_anomalies, "print district or pincode volume anomalies"),
+    "gap": (run_gap, "PIN-level service gap scores for infrastructure planning"),
+    "audit": (run_audit, "list each state's districts and rank likely duplicate spellings"),
+    "all": (run_all, "trends, gap and audit in one process, loading each dataset once"),
+    "hierarchy": (run_hierarchy, "update the pincode -> district -> state index and report label conflicts"),
+    "serve": (run_serve, "local query API over the aggregates for the dashboard"),
+}
+
+
+def build_parser():
+    pool = argparse.ArgumentParser(add_help=False)
+    pool.add_argument("--chunk-size", type=int, default=None,
+                      help="stream shards in chunks of this many rows to bound memory")
+    pool.add_argument("--workers", type=int, default=None,
+                      help="load shards (and render charts) on a pool of this many processes")
+
+    load = argparse.ArgumentParser(add_help=False, parents=[pool])
+    load.add_argument("--incremental", action="store_true",
+                      help="only fold newly arrived shards into the stored aggregates")
+
+    export = argparse.ArgumentParser(add_help=False)
+    export.add_argument("--export-format", choices=constants.EXPORT_FORMATS, default="json",
+                        help="dashboard file format: indented records or compact columnar")
+    export.add_argument("--compress", choices=constants.COMPRESSIONS, action="append",
+                        help="also write precompressed copies of the dashboard files (repeatable)")
+
+    charts = argparse.ArgumentParser(add_help=False)
+    charts.add_argument("--state-charts", action="store_true",
+                        help="also render per-state trend charts into output/states")
+    charts.add_argument("--anomaly-method", choices=constants.ANOMALY_METHODS, default="total",
+                        help="district totals (default) or a rolling/seasonal time-series detector")
+
+    charts.add_argument("--report-format", choices=constants.REPORT_FORMATS, action="append",
+                        help="insight report format for All India and every state (repeatable; default md)")
+    charts.add_argument("--no-reports", action="store_true", help="do not write insight reports")
+
+    detect = argparse.ArgumentParser(add_help=False)
+    detect.add_argument("--method", choices=constants.ANOMALY_METHODS, default="total",
+                        help="district totals above mean + 3 sigma, or a rolling/seasonal time-series detector")
+    detect.add_argument("--level", choices=constants.ANOMALY_LEVELS, default="district",
+                        help="series of district months or pincode days (time-series methods only)")
+    detect.add_argument("--threshold", type=float, default=None, help="score above which a period is flagged")
+    detect.add_argument("--window", type=int, default=None, help="periods of history for zscore and mad")
+    detect.add_argument("--update", action="store_true",
+                        help="only score periods newer than the saved detector state")
+    detect.add_argument("--state-dir", default=STATE_DIR, help="where --update keeps detector state")
+
+    scenarios = argparse.ArgumentParser(add_help=False)
+    scenarios.add_argument("--scenarios", default=None,
+                           help="JSON file of weight vectors / supply assumptions to evaluate in one batch")
+    scenarios.add_argument("--weight-samples", type=int, default=None,
+                           help="also evaluate this many gap weightings sampled around the default")
+    scenarios.add_argument("--forecast-horizon", type=int, default=constants.FORECAST_HORIZON,
+                           help="months of demand to forecast per location (0 skips forecasting)")
+    scenarios.add_argument("--sites", type=int, default=constants.PLACEMENT_SITES,
+                           help="new center sites to place over unmet demand (0 skips placement)")
+    scenarios.add_argument("--radius-km", type=float, default=constants.PLACEMENT_RADIUS_KM, help="distance a center serves")
+    scenarios.add_argument("--centroids", default=None,
+                           help="CSV of pincode, latitude, longitude (default: pincode_centroids.csv in the data dir)")
+
+    locations = argparse.ArgumentParser(add_help=False)
+    locations.add_argument("--canonical-locations", action="store_true",
+                           help="relabel rows with their pincode's majority state/district")
+
+    hierarchy = argparse.ArgumentParser(add_help=False)
+    hierarchy.add_argument("--top", type=int, default=constants.CONFLICTS_SHOWN, help="conflicting pincodes to print")
+    hierarchy.add_argument("--output", default=None, help="CSV file for every conflicting pincode")
+
+    audit = argparse.ArgumentParser(add_help=False)
+    audit.add_argument("--raw", action="store_true", help="search the raw CSV shards instead of data.json")
+    audit.add_argument("--min-similarity", type=float, default=constants.MIN_SIMILARITY,
+                       help="edit-distance similarity (0-1) needed to propose a merge")
+    audit.add_argument("--proposals", default=None,
+                       help="write proposed STATE_DISTRICT_RENAMES entries to this file (with --raw)")
+
+    server = argparse.ArgumentParser(add_help=False)
+    server.add_argument("--host", default=constants.QUERY_HOST)
+    server.add_argument("--port", type=int, default=constants.QUERY_PORT)
+    server.add_argument("--cache-size", type=int, default=constants.QUERY_CACHE_SIZE, help="responses kept in the LRU cache")
+    # Like query_server.py, serve starts from the incremental store unless told otherwise
+    server.add_argument("--full-load", action="store_true",
+                        help="read every shard instead of the incremental partial aggregates")
+
+    run = argparse.ArgumentParser(add_help=False)
+    run.add_argument("--report-rss", action="store_true", help="print the peak resident memory of the run")
+    run.add_argument("--trace", default=TRACE_FILE, help="JSON lines file that receives per-stage timings")
+    run.add_argument("--no-trace", action="store_true", help="do not record stage timings")
+    run.add_argument("--profile-stage", default=None, help="capture a profile of this stage")
+    run.add_argument("--profiler", choices=constants.PROFILERS, default="cprofile")
+
+    parents = {
+        "trends": [load, locations, export, charts, run],
+        "anomalies": [load, locations, detect, run],
+        "gap": [load, locations, export, scenarios, run],
+        "audit": [audit, run],
+        "all": [load, locations, export, charts, scenarios, audit, run],
+        "hierarchy": [hierarchy, run],
+        "serve": [pool, server, run],
+    }
+    parser = argparse.ArgumentParser(description="Aadhaar analysis pipelines")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, parents=parents[name], help=help_text, description=help_text)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    command = COMMANDS[args.command][0]
+
+    from profiling import start_trace, finish_trace, stage
+    if not args.no_trace:
+        start_trace(f"aadhaar_pipeline:{args.command}", args.trace, args.profile_stage, args.profiler)
+    status = "ok"
+    try:
+        with stage(args.command):
+            command(args)
+    except Exception as e:
+        status = f"error: {type(e).__name__}: {e}"
+        raise
+    finally:
+        finish_trace(status)
+
+    if args.report_rss:
+        from streaming import report_peak_rss
+        report_peak_rss()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,20 @@
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 from datetime import datetime
+from shard_cache import load_category, list_shards
+from incremental import load_partials
+from streaming import stream_partials, report_peak_rss
+from parallel import load_parallel
+from ranking import top_k
+from dashboard_export import EXPORT_FORMATS, COMPRESSIONS, export_insight_shards, state_slug, to_records
+from charts import render_charts
+from reports import REPORT_FORMATS, write_reports
+from hierarchy import canonical_frames
+from data_quality import quality_report
+import anomaly_engine
+import constants
+from profiling import PROFILERS, stage, rows, start_trace, finish_trace
 
 # Configuration
 BASE_DIR = r"E:\adhar hackathon"
@@ -12,222 +24,205 @@ DIRS = {
     "enrolment": "api_data_aadhar_enrolment"
 }
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+DATA_DIR = os.path.join(BASE_DIR, "dashboard", "public", "data")
+TRACE_FILE = os.path.join(OUTPUT_DIR, "trace.jsonl")  # Stage timings, one JSON line per stage
+QUALITY_FILE = os.path.join(OUTPUT_DIR, "quality_report.json")  # Ingestion checks of the last load
+REPORT_DIR = os.path.join(OUTPUT_DIR, "reports")  # All India and per-state insight reports
+TOP_GLOBAL_DISTRICTS = 20  # Districts in the national breakdown
+TOP_STATE_DISTRICTS = None  # Districts per state breakdown (None keeps all)
+ANOMALY_METHODS = constants.ANOMALY_METHODS  # "total": all-time district totals above mean + 3 sigma
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def load_data(category):
+def load_data(category, incremental=False, chunk_size=None, workers=None):
     dir_path = os.path.join(BASE_DIR, DIRS[category])
-    files = [f for f in os.listdir(dir_path) if f.endswith(".csv")]
-    dfs = []
-    for f in files:
-        df = pd.read_csv(os.path.join(dir_path, f))
-        dfs.append(df)
-    full_df = pd.concat(dfs, ignore_index=True)
-    full_df['date'] = pd.to_datetime(full_df['date'], dayfirst=True)
-    
-    # Normalize State Names
-    def normalize_state(name):
-        if not isinstance(name, str) or name.isdigit(): return "Unknown"
-        name = name.strip().title()
-        name = name.replace(" & ", " And ")
-        mapping = {
-            "Andaman And Nicobar Islands": "Andaman And Nicobar Islands",
-            "Andaman & Nicobar Islands": "Andaman And Nicobar Islands",
-            "Orissa": "Odisha",
-            "West Bangal": "West Bengal",
-            "Westbengal": "West Bengal",
-            "West  Bengal": "West Bengal",
-            "West Bengal": "West Bengal",
-            "Westbengal": "West Bengal",
-            "Pondicherry": "Puducherry",
-        }
-        if "Dadra" in name or "Daman" in name:
-            return "Dadra and Nagar Haveli and Daman and Diu"
-        if "Jammu" in name:
-            return "Jammu and Kashmir"
-        return mapping.get(name, name)
-
-    full_df['state'] = full_df['state'].apply(normalize_state)
-    full_df = full_df[full_df['state'] != "Unknown"]
-
-    # Normalize District Names
-    def normalize_district(row):
-        name = str(row['district']).strip().title()
-        state = row['state']
-        
-        # General spelling fixes
-        mapping = {
-            "Gurgaon": "Gurugram",
-            "Bangalore": "Bengaluru",
-            "Bangalore Rural": "Bengaluru Rural",
-            "Bangalore Urban": "Bengaluru Urban",
-            "Mysore": "Mysuru",
-            "Belgaum": "Belagavi",
-            "Faizabad": "Ayodhya",
-            "Allahabad": "Prayagraj",
-            "Osmanabad": "Dharashiv",
-            "Shimoga": "Shivamogga",
-            "Mangalore": "Mangaluru",
-            "Bellary": "Ballari",
-            "Gulbarga": "Kalaburagi",
-            "Bijapur": "Vijayapura",
-            "Chikmagalur": "Chikkamagaluru",
-            "Tumkur": "Tumakuru",
-            "Hospet": "Hosapete",
-            "Hubli": "Hubballi",
-            "Dharwad": "Dharwad",
-            "Alappuzha": "Alleppey",
-            "Palakkad": "Palghat",
-            "Thrissur": "Trichur",
-            "Kozhikode": "Calicut",
-            "Kollam": "Quilon",
-            "Panjim": "Panaji",
-            "Cochin": "Kochi",
-            "Trivandrum": "Thiruvananthapuram",
-            "Gauhati": "Guwahati",
-            "Benares": "Varanasi",
-            "Cawnpore": "Kanpur",
-            "Pondicherry": "Puducherry",
-            "Buldana": "Buldhana",
-            "Beed": "Bid",
-            "Firozabad": "Firozabad",
-            "Mughalsarai": "Pt. Deen Dayal Upadhyaya Nagar",
-            "Tirunelveli": "Nellai",
-            "Vizag": "Visakhapatnam",
-            "Waltair": "Visakhapatnam",
-            "Madras": "Chennai",
-            "Bombay": "Mumbai",
-            "Calcutta": "Kolkata",
-            "Poona": "Pune",
-            "Ahmadabad": "Ahmedabad",
-            "Bulandshahr": "Bulandshahar",
-            "Chittoor": "Chittoor", # Self-mapping for safety
-            "Cuddapah": "YSR Kadapa",
-            "Kadapa": "YSR Kadapa",
-            "Belgaum": "Belagavi",
-            "Gulbarga": "Kalaburagi",
-            "Shimoga": "Shivamogga",
-            "Bijapur": "Vijayapura",
-            "Hubli": "Hubballi",
-            "Mysore": "Mysuru",
-            "Oudh": "Awadh",
-        }
-        
-        # State-specific rename logic
-        if state == "Maharashtra" and name == "Aurangabad":
-            return "Chhatrapati Sambhajinagar"
-        
-        # Geographical Corrections (Correcting historical data/errors)
-        if name == "Hyderabad":
-            return "Hyderabad" # State will be forced below
-        
-        return mapping.get(name, name)
-
-    full_df['district'] = full_df.apply(normalize_district, axis=1)
-
-    # Force Correct States for specific Districts
-    geographic_reassignment = {
-        "Hyderabad": "Telangana",
-        "Cyberabad": "Telangana",
-        "Rangareddy": "Telangana",
-        "Warangal": "Telangana",
-        "Khammam": "Telangana",
-    }
-    
-    def reassign_state(row):
-        if row['district'] in geographic_reassignment:
-            return geographic_reassignment[row['district']]
-        return row['state']
-    
-    full_df['state'] = full_df.apply(reassign_state, axis=1)
-    
-    return full_df
+    with stage(f"load:{category}") as record:
+        if incremental:
+            # Stored (pincode, state, district, month) partial sums, updated with new shards only
+            df = load_partials(dir_path, CACHE_DIR, chunk_size, workers)
+        elif chunk_size:
+            # Bounded-memory streaming of the same partial sums, chunk_size rows at a time
+            df = stream_partials(list_shards(dir_path), chunk_size, CACHE_DIR)
+        else:
+            # Typed, normalized frames come from the per-shard columnar cache
+            df = load_category(dir_path, CACHE_DIR)
+        record["rows_out"] = rows(df)
+    return df
+
+def load_data_parallel(workers, chunk_size=None):
+    # All shards of all categories on one process pool, reduced to partial sums
+    dir_paths = {category: os.path.join(BASE_DIR, d) for category, d in DIRS.items()}
+    with stage("load:parallel") as record:
+        frames = load_parallel(dir_paths, CACHE_DIR, workers, chunk_size)
+        record["rows_out"] = rows(frames)
+    return frames
+
+def load_all(incremental=False, chunk_size=None, workers=None):
+    # {category: frame} for all three datasets, through whichever load path was asked for
+    with quality_report(QUALITY_FILE):
+        if workers and not incremental:
+            return load_data_parallel(workers, chunk_size)
+        return {category: load_data(category, incremental, chunk_size, workers)
+                for category in ('enrolment', 'biometric', 'demographic')}
 
 def analyze_trends(df, category):
     print(f"\n--- Analyzing Trends for {category} ---")
     
     # Monthly Aggregation
-    df['month'] = df['date'].dt.to_period('M')
-    monthly_stats = df.groupby('month').sum(numeric_only=True)
-    
-    # Plotting Total Volume over time
-    plt.figure(figsize=(12, 6))
+    with stage(f"groupby:{category}", len(df)) as record:
+        # Grouped by a transient key rather than a stored Period column (8 more bytes per row)
+        month = df['date'].dt.to_period('M').rename('month')
+        monthly_stats = df.groupby(month).sum(numeric_only=True)
+        record["rows_out"] = len(monthly_stats)
+
+    return monthly_stats
+
+def trend_chart(monthly_stats, category, state=None):
+    # (frame, title) of a total volume over time chart, rendered later by render_charts
     if category == 'enrolment':
         cols = ['age_0_5', 'age_5_17', 'age_18_greater']
-        monthly_stats[cols].plot(kind='line', marker='o')
-        plt.title(f'Aadhaar Enrolment Trends by Age Group')
+        title = 'Aadhaar Enrolment Trends by Age Group'
     else:
         prefix = 'bio_' if category == 'biometric' else 'demo_'
         cols = [f'{prefix}age_5_17', f'{prefix}age_17_']
-        monthly_stats[cols].plot(kind='line', marker='o')
-        plt.title(f'Aadhaar {category.capitalize()} Updates by Age Group')
-    
-    plt.ylabel('Count')
-    plt.grid(True)
-    plt.savefig(os.path.join(OUTPUT_DIR, f"{category}_trends.png"))
-    plt.close()
-    
-    return monthly_stats
+        title = f'Aadhaar {category.capitalize()} Updates by Age Group'
+    if state:
+        title = f'{state}: {title}'
+    return monthly_stats[cols], title
 
 def detect_anomalies(df, category):
     print(f"--- Detecting Anomalies for {category} ---")
     # Identify high-volume districts (Outliers using Z-score logic)
-    agg_cols = [c for c in df.columns if 'age' in c]
-    district_stats = df.groupby(['state', 'district'])[agg_cols].sum().reset_index()
-    district_stats['total'] = district_stats[agg_cols].sum(axis=1)
-    
-    mean = district_stats['total'].mean()
-    std = district_stats['total'].std()
-    threshold = mean + 3 * std
-    
-    anomalies = district_stats[district_stats['total'] > threshold]
+    with stage(f"anomalies:{category}", len(df)) as record:
+        agg_cols = [c for c in df.columns if 'age' in c]
+        district_stats = df.groupby(['state', 'district'], observed=True)[agg_cols].sum().reset_index()
+        district_stats['total'] = district_stats[agg_cols].sum(axis=1)
+
+        mean = district_stats['total'].mean()
+        std = district_stats['total'].std()
+        threshold = mean + 3 * std
+
+        anomalies = district_stats[district_stats['total'] > threshold]
+        record["rows_out"] = len(anomalies)
+    return anomalies
+
+def find_anomalies(df, category, method="total"):
+    # District anomalies for the dashboard; the time-series methods flag (district, month) cells
+    if method == "total":
+        return detect_anomalies(df, category)
+    with stage(f"anomalies:{category}", len(df)) as record:
+        anomalies = anomaly_engine.detect(df, "district", method)
+        record["rows_out"] = len(anomalies)
     return anomalies
 
-def main():
+def state_monthly_table(df, cols):
+    # (state, month) sums for every state in a single grouped pass
+    month = df['month'] if 'month' in df.columns else df['date'].dt.to_period('M')
+    return df.groupby([df['state'], month], observed=True)[cols].sum()
+
+def split_by_state(table):
+    # Per-state slices of a state-indexed table, without re-filtering the rows
+    return {state: group.droplevel('state') for state, group in table.groupby(level='state', observed=True)}
+
+def main(incremental=False, chunk_size=None, report_rss=False, workers=None,
+         export_format="json", compress=None, trace=None, profile_stage=None, profiler="cprofile",
+         state_charts=False, frames=None, anomaly_method="total", canonical_locations=False,
+         report_formats=("md",)):
+    if trace:
+        start_trace("analyze_aadhaar", trace, profile_stage, profiler)
+    status = "ok"
     try:
-        # 1. Load Data
-        enrol_df = load_data('enrolment')
-        bio_df = load_data('biometric')
-        demo_df = load_data('demographic')
+        # 1. Load Data (unless the caller already holds the frames)
+        if frames is None:
+            frames = load_all(incremental, chunk_size, workers)
+        if canonical_locations:
+            # Each pincode's majority (state, district), by integer lookup in the hierarchy index
+            frames = canonical_frames(frames, [os.path.join(BASE_DIR, d) for d in DIRS.values()], CACHE_DIR)
+        enrol_df, bio_df, demo_df = frames['enrolment'], frames['biometric'], frames['demographic']
         
         # 2. Analyze Trends
         enrol_monthly = analyze_trends(enrol_df, 'enrolment')
         bio_monthly = analyze_trends(bio_df, 'biometric')
         demo_monthly = analyze_trends(demo_df, 'demographic')
         
-        # Helper to convert monthly stats to list of dicts for Recharts
+        # Helper to add the month label Recharts plots; exports turn the frame into records or columns
         def prepare_trend(stats_df):
             stats_df = stats_df.copy()
             stats_df['name'] = stats_df.index.astype(str)
-            return stats_df.to_dict(orient='records')
+            return stats_df
 
         # 3. State-wise Aggregation
         print("--- Aggregating State-wise Data ---")
         states = sorted(enrol_df['state'].unique().tolist())
         
         # Pre-detect all anomalies to filter them easily
-        all_enrol_anomalies = detect_anomalies(enrol_df, 'enrolment')
-        all_bio_anomalies = detect_anomalies(bio_df, 'biometric')
+        all_enrol_anomalies = find_anomalies(enrol_df, 'enrolment', anomaly_method)
+        all_bio_anomalies = find_anomalies(bio_df, 'biometric', anomaly_method)
+
+        with stage("state_groupby", rows(enrol_df) + rows(bio_df) + rows(demo_df)) as record:
+            # One grouped pass per dataset; each state then just reads its slices
+            enrol_cols = ['age_0_5', 'age_5_17', 'age_18_greater']
+            bio_cols = [c for c in bio_df.columns if 'bio_age' in c]
+            demo_cols = [c for c in demo_df.columns if 'demo_age' in c]
+            enrol_state_m = state_monthly_table(enrol_df, enrol_cols)
+            bio_state_m = state_monthly_table(bio_df, bio_cols)
+            demo_state_m = state_monthly_table(demo_df, demo_cols)
+            enrol_by_state = split_by_state(enrol_state_m)
+            bio_by_state = split_by_state(bio_state_m)
+            demo_by_state = split_by_state(demo_state_m)
+
+            enrol_state_total = enrol_state_m.sum(axis=1).groupby(level='state', observed=True)
+            peak_enrol_month = enrol_state_total.idxmax()
+            peak_enrol_value = enrol_state_total.max()
+            peak_bio_cols = bio_state_m.groupby(level='state', observed=True).sum().idxmax(axis=1)
+            peak_demo_cols = demo_state_m.groupby(level='state', observed=True).sum().idxmax(axis=1)
+
+            district_cols = [c for c in enrol_df.columns if 'age' in c]
+            district_stats = enrol_df.groupby(['state', 'district'], observed=True)[district_cols].sum()
+            district_stats['total'] = district_stats[district_cols].sum(axis=1)
+            districts_by_state = split_by_state(district_stats[['total']])
+            record["rows_out"] = len(enrol_state_m) + len(bio_state_m) + len(demo_state_m)
+
+        # Trend charts (and optionally one per state and category), unchanged ones skipped
+        charts = {
+            f"{category}_trends.png": trend_chart(monthly, category)
+            for category, monthly in [('enrolment', enrol_monthly), ('biometric', bio_monthly),
+                                      ('demographic', demo_monthly)]
+        }
+        # {region: {category: chart file}} for the reports to link
+        chart_files = {"All India": {name.rsplit("_", 1)[0]: name for name in charts}}
+        if state_charts:
+            for category, by_state in [('enrolment', enrol_by_state), ('biometric', bio_by_state),
+                                       ('demographic', demo_by_state)]:
+                for state, monthly in by_state.items():
+                    name = f"states/{state_slug(state)}_{category}_trends.png"
+                    charts[name] = trend_chart(monthly, category, state)
+                    chart_files.setdefault(state, {})[category] = name
+        with stage("charts", len(charts)) as record:
+            rendered = render_charts(charts, OUTPUT_DIR, workers)
+            record["rows_out"] = len(rendered)
+        print(f"Rendered {len(rendered)} of {len(charts)} charts ({len(charts) - len(rendered)} unchanged)")
+
+        anomalies_by_state = {
+            state: group.head(10)
+            for state, group in all_enrol_anomalies.groupby('state', observed=True)
+        }
 
         def get_state_metrics(state_name):
-            s_enrol = enrol_df[enrol_df['state'] == state_name]
-            s_bio = bio_df[bio_df['state'] == state_name]
-            s_demo = demo_df[demo_df['state'] == state_name]
-            
-            s_enrol_m = s_enrol.groupby(s_enrol['date'].dt.to_period('M')).sum(numeric_only=True)
-            s_bio_m = s_bio.groupby(s_bio['date'].dt.to_period('M')).sum(numeric_only=True)
-            s_demo_m = s_demo.groupby(s_demo['date'].dt.to_period('M')).sum(numeric_only=True)
-            
-            s_enrol_total = s_enrol_m[['age_0_5', 'age_5_17', 'age_18_greater']].sum(axis=1) if not s_enrol_m.empty else pd.Series()
-            
+            s_enrol_m = enrol_by_state.get(state_name)
+            s_bio_m = bio_by_state.get(state_name)
+            s_demo_m = demo_by_state.get(state_name)
+            has_enrol = s_enrol_m is not None
+
             # Categories for insights
-            peak_bio_col = s_bio_m[[c for c in s_bio_m.columns if 'bio_age' in c]].sum(axis=0).idxmax() if not s_bio_m.empty else "N/A"
-            peak_demo_col = s_demo_m[[c for c in s_demo_m.columns if 'demo_age' in c]].sum(axis=0).idxmax() if not s_demo_m.empty else "N/A"
+            peak_bio_col = peak_bio_cols.get(state_name, "N/A")
+            peak_demo_col = peak_demo_cols.get(state_name, "N/A")
 
             # Dynamic Recommendations
             recs = [
                 {
                     "title": f"{state_name} Enrolment Drive",
-                    "description": f"Focus on peak month {s_enrol_total.idxmax() if not s_enrol_total.empty else 'Cycles'} for school-linked camps."
+                    "description": f"Focus on peak month {peak_enrol_month[state_name][1] if has_enrol else 'Cycles'} for school-linked camps."
                 },
                 {
                     "title": "Update Optimization",
@@ -240,39 +235,38 @@ def main():
             ]
 
             # District-wise Breakdown
-            agg_cols = [c for c in s_enrol.columns if 'age' in c]
-            dist_stats = s_enrol.groupby('district')[agg_cols].sum().reset_index()
-            dist_stats['total'] = dist_stats[agg_cols].sum(axis=1)
-            dist_stats = dist_stats.sort_values(by='total', ascending=False)
-            district_breakdown = dist_stats[['district', 'total']].to_dict(orient='records')
+            dist_stats = districts_by_state[state_name].reset_index() if has_enrol else pd.DataFrame(columns=['district', 'total'])
+            dist_stats = top_k(dist_stats, 'total', TOP_STATE_DISTRICTS)
+            district_breakdown = dist_stats[['district', 'total']]
 
             return {
                 "growth_patterns": {
                     "peak_enrolment": {
-                        "month": str(s_enrol_total.idxmax()) if not s_enrol_total.empty else "N/A",
-                        "value": int(s_enrol_total.max()) if not s_enrol_total.empty else 0
+                        "month": str(peak_enrol_month[state_name][1]) if has_enrol else "N/A",
+                        "value": int(peak_enrol_value[state_name]) if has_enrol else 0
                     },
                     "peak_bio_category": peak_bio_col,
                     "peak_demo_category": peak_demo_col
                 },
                 "trends": {
-                    "enrolment": prepare_trend(s_enrol_m[['age_0_5', 'age_5_17', 'age_18_greater']]) if not s_enrol_m.empty else [],
-                    "biometric": prepare_trend(s_bio_m[[c for c in s_bio_m.columns if 'bio_age' in c]]) if not s_bio_m.empty else [],
-                    "demographic": prepare_trend(s_demo_m[[c for c in s_demo_m.columns if 'demo_age' in c]]) if not s_demo_m.empty else []
+                    "enrolment": prepare_trend(s_enrol_m) if has_enrol else [],
+                    "biometric": prepare_trend(s_bio_m) if s_bio_m is not None else [],
+                    "demographic": prepare_trend(s_demo_m) if s_demo_m is not None else []
                 },
-                "anomalies": all_enrol_anomalies[all_enrol_anomalies['state'] == state_name].head(10).to_dict(orient='records'),
+                "anomalies": anomalies_by_state.get(state_name, []),
                 "recommendations": recs,
                 "district_breakdown": district_breakdown
             }
 
-        state_data = {state: get_state_metrics(state) for state in states}
+        with stage("state_metrics", len(states)):
+            state_data = {state: get_state_metrics(state) for state in states}
 
-        # Global District Breakdown (Top 20)
-        agg_cols_all = [c for c in enrol_df.columns if 'age' in c]
-        global_dist_stats = enrol_df.groupby(['district', 'state'])[agg_cols_all].sum().reset_index()
-        global_dist_stats['total'] = global_dist_stats[agg_cols_all].sum(axis=1)
-        global_dist_stats = global_dist_stats.sort_values(by='total', ascending=False).head(20)
-        global_dist_breakdown = global_dist_stats[['district', 'state', 'total']].to_dict(orient='records')
+            # Global District Breakdown (Top 20)
+            agg_cols_all = [c for c in enrol_df.columns if 'age' in c]
+            global_dist_stats = enrol_df.groupby(['district', 'state'], observed=True)[agg_cols_all].sum().reset_index()
+            global_dist_stats['total'] = global_dist_stats[agg_cols_all].sum(axis=1)
+            global_dist_stats = top_k(global_dist_stats, 'total', TOP_GLOBAL_DISTRICTS)
+            global_dist_breakdown = global_dist_stats[['district', 'state', 'total']]
 
         # 4. Global Recommendations (Fallback/Default)
         global_recs = [
@@ -311,23 +305,87 @@ def main():
                     "biometric": prepare_trend(bio_monthly[bio_total_cols]),
                     "demographic": prepare_trend(demo_monthly[demo_total_cols])
                 },
-                "anomalies": all_enrol_anomalies.head(10).to_dict(orient='records'),
+                "anomalies": all_enrol_anomalies.head(10),
                 "recommendations": global_recs,
                 "district_breakdown": global_dist_breakdown
             },
             "state_specific": state_data
         }
         
-        import json
-        with open(os.path.join(BASE_DIR, "dashboard", "src", "data.json"), "w") as f:
-            json.dump(dashboard_data, f, indent=4)
-            
+        with stage("json_export"):
+            import json
+            # data.json and the reports keep the record layout; the shards convert their own tables
+            records = to_records(dashboard_data)
+            with open(os.path.join(BASE_DIR, "dashboard", "src", "data.json"), "w") as f:
+                json.dump(records, f, indent=4)
+            # Index + per-state files the dashboard loads on demand
+            # Map totals from the full district aggregate, not the (possibly cut) breakdown lists
+            state_totals = {state: int(group['total'].sum()) for state, group in districts_by_state.items()}
+            export_insight_shards(dashboard_data, state_totals, DATA_DIR, export_format, compress)
+
+        if report_formats:
+            # Reports link the trend charts rendered above; unchanged reports are skipped
+            regions = {"All India": records["global"], **records["state_specific"]}
+            linked = {
+                region: {category: os.path.relpath(os.path.join(OUTPUT_DIR, name), REPORT_DIR).replace(os.sep, "/")
+                         for category, name in files.items()}
+                for region, files in chart_files.items()
+            }
+            with stage("reports", len(regions) * len(report_formats)) as record:
+                written = write_reports({r: (state_slug(r), m) for r, m in regions.items()}, REPORT_DIR,
+                                        report_formats, linked, workers)
+                record["rows_out"] = len(written)
+            print(f"Wrote {len(written)} of {len(regions) * len(report_formats)} reports to {REPORT_DIR} "
+                  f"({len(regions) * len(report_formats) - len(written)} unchanged)")
+
         print(f"JSON data exported to {os.path.join(BASE_DIR, 'dashboard_data.json')}")
-        print(f"Analysis complete. Report generated at {os.path.join(BASE_DIR, 'aadhaar_insights_report.md')}")
+        print("Analysis complete.")
         print(f"Visualizations saved to {OUTPUT_DIR}")
+        if report_rss:
+            report_peak_rss()
 
     except Exception as e:
+        # Report, then let the failure reach the caller (and the exit code)
+        status = f"error: {type(e).__name__}: {e}"
         print(f"Error during analysis: {e}")
+        raise
+    finally:
+        if trace:
+            finish_trace(status)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Aadhaar trend and anomaly analysis")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fold newly arrived shards into the stored aggregates")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="stream shards in chunks of this many rows to bound memory")
+    parser.add_argument("--report-rss", action="store_true",
+                        help="print the peak resident memory of the run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="load shards on a pool of this many processes")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default="json",
+                        help="dashboard file format: indented records or compact columnar")
+    parser.add_argument("--compress", choices=COMPRESSIONS, action="append",
+                        help="also write precompressed copies of the dashboard files (repeatable)")
+    parser.add_argument("--state-charts", action="store_true",
+                        help="also render per-state trend charts into output/states")
+    parser.add_argument("--report-format", choices=REPORT_FORMATS, action="append",
+                        help="insight report format for All India and every state (repeatable; default md)")
+    parser.add_argument("--no-reports", action="store_true", help="do not write insight reports")
+    parser.add_argument("--canonical-locations", action="store_true",
+                        help="relabel rows with their pincode's majority state/district")
+    parser.add_argument("--anomaly-method", choices=ANOMALY_METHODS, default="total",
+                        help="district totals (default) or a rolling/seasonal time-series detector")
+    parser.add_argument("--trace", default=TRACE_FILE,
+                        help="JSON lines file that receives per-stage timings")
+    parser.add_argument("--no-trace", action="store_true", help="do not record stage timings")
+    parser.add_argument("--profile-stage", default=None,
+                        help="capture a profile of this stage (e.g. normalize, state_metrics)")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    args = parser.parse_args()
+    main(incremental=args.incremental, chunk_size=args.chunk_size, report_rss=args.report_rss,
+         workers=args.workers, export_format=args.export_format, compress=args.compress,
+         trace=None if args.no_trace else args.trace, profile_stage=args.profile_stage,
+         profiler=args.profiler, state_charts=args.state_charts, anomaly_method=args.anomaly_method,
+         canonical_locations=args.canonical_locations,
+         report_formats=() if args.no_reports else args.report_format or ["md"])
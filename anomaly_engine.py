@@ -0,0 +1,279 @@
+import os
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+import constants
+
+# Time-series anomaly detection over (district x month) or (pincode x day)
+# volume series. Rows are scattered into a dense (series x period) matrix with
+# one bincount, and every detector scores all series and periods at once:
+#   zscore   - against the mean/std of the previous `window` periods (cumulative sums)
+#   mad      - modified z-score against the median/MAD of the previous `window` periods
+#   seasonal - against the same phase of the previous `seasons` cycles of `period`
+# With last=True a detector only needs to fill in the final period.
+# A score at period t only looks back a fixed number of periods, so a saved
+# state holding that trailing window lets a new period be scored in O(series).
+# The latest period stays open in the state as per-day totals: days arriving
+# later are merged in and the period is scored again, so a run of daily
+# updates ends with the same scores as one full scan.
+
+METHODS = constants.TIME_SERIES_METHODS
+LEVELS = {  # Keys as in constants.ANOMALY_LEVELS
+    # level: (series keys, period frequency)
+    "district": (["state", "district"], "M"),
+    "pincode": (["state", "district", "pincode"], "D"),
+}
+DEFAULTS = {
+    # level: detector parameters
+    "district": {"window": 6, "period": 12, "seasons": 2, "min_periods": 3},
+    "pincode": {"window": 28, "period": 7, "seasons": 4, "min_periods": 7},
+}
+THRESHOLDS = {"zscore": 3.0, "mad": 3.5, "seasonal": 3.0}
+STATE_VERSION = 2  # Bump when the saved state's layout changes
+MAD_BLOCK_CELLS = 8_000_000  # Window cells per block in the rolling median
+
+
+def series_matrix(df, level):
+    """Dense (series x period) totals of the df's count columns, with series keys and periods."""
+    keys, freq = LEVELS[level]
+    count_cols = [c for c in df.columns if 'age' in c]
+    grouped = df.groupby(keys, observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    ordinals = df['date'].dt.to_period(freq).array.asi8
+    first = ordinals.min() if len(ordinals) else 0
+    n_periods = int(ordinals.max() - first + 1) if len(ordinals) else 0
+    totals = df[count_cols].sum(axis=1).to_numpy(dtype=float)
+    matrix = np.bincount(codes * n_periods + (ordinals - first), weights=totals,
+                         minlength=len(index) * n_periods).reshape(len(index), n_periods)
+    periods = pd.period_range(pd.Period(ordinal=first, freq=freq), periods=n_periods, freq=freq)
+    return index, periods, matrix
+
+
+def rolling_zscore(matrix, window, min_periods, last=False, **_):
+    n, t = matrix.shape
+    zero = np.zeros((n, 1))
+    s1 = np.hstack([zero, np.cumsum(matrix, axis=1)])
+    s2 = np.hstack([zero, np.cumsum(matrix ** 2, axis=1)])
+    ends = np.arange(t)
+    starts = np.maximum(0, ends - window)
+    count = ends - starts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (s1[:, ends] - s1[:, starts]) / count
+        var = (s2[:, ends] - s2[:, starts] - count * mean ** 2) / (count - 1)
+        std = np.sqrt(np.maximum(var, 0))
+        scores = (matrix - mean) / std
+    scores[:, count < max(min_periods, 2)] = np.nan
+    scores[~np.isfinite(scores)] = np.nan
+    return scores
+
+
+def _median_scores(windows, values):
+    # Modified z-scores of values against their (rows, periods, window) windows
+    median = np.median(windows, axis=2)
+    deviation = np.abs(windows - median[..., None])
+    mad = np.median(deviation, axis=2) / 0.6745
+    # Mostly-constant windows have MAD 0; fall back to the mean absolute deviation
+    mad = np.where(mad > 0, mad, deviation.mean(axis=2) * 1.2533)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values - median) / mad
+
+
+def rolling_mad(matrix, window, min_periods, last=False, **_):
+    n, t = matrix.shape
+    scores = np.full((n, t), np.nan)
+    # Periods with a full window of history; shorter histories only happen at the start
+    first = max(t - 1, window) if last else window
+    for k in range(max(min_periods, 1), min(window, t)):
+        if not last or k == t - 1:
+            scores[:, k] = _median_scores(matrix[:, None, :k], matrix[:, k:k + 1])[:, 0]
+    if first < t:
+        block = max(1, MAD_BLOCK_CELLS // max(1, (t - first) * window))
+        for lo in range(0, n, block):
+            rows = matrix[lo:lo + block]
+            # Previous `window` values of every period, as a (rows, periods, window) view
+            windows = np.lib.stride_tricks.sliding_window_view(rows, window, axis=1)[:, first - window:t - window]
+            scores[lo:lo + block, first:] = _median_scores(windows, rows[:, first:])
+    scores[~np.isfinite(scores)] = np.nan
+    return scores
+
+
+def seasonal_zscore(matrix, period, seasons, last=False, **_):
+    n, t = matrix.shape
+    lagged = np.full((seasons, n, t), np.nan)
+    for k in range(1, seasons + 1):
+        lag = k * period
+        if lag < t:
+            lagged[k - 1, :, lag:] = matrix[:, :t - lag]
+    count = np.sum(~np.isnan(lagged[:, 0, :]), axis=0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Phases with no earlier cycle yet
+        mean = np.nanmean(lagged, axis=0)
+        std = np.nanstd(lagged, axis=0, ddof=1)
+        scores = (matrix - mean) / std
+    scores[:, count < 2] = np.nan
+    scores[~np.isfinite(scores)] = np.nan
+    return scores
+
+
+DETECTORS = {"zscore": rolling_zscore, "mad": rolling_mad, "seasonal": seasonal_zscore}
+
+
+def lookback(method, params):
+    # Periods of history a detector needs to score the next period
+    return params["period"] * params["seasons"] if method == "seasonal" else params["window"]
+
+
+def detector_params(level, **overrides):
+    return {**DEFAULTS[level], **{k: v for k, v in overrides.items() if v is not None}}
+
+
+def flag(index, periods, matrix, scores, threshold, columns=None):
+    """Records scoring above threshold, highest first, as a frame with key columns, period, total, score."""
+    rows, cols = np.nonzero(np.nan_to_num(scores, nan=0.0) > threshold)
+    order = np.lexsort((cols, rows, -scores[rows, cols]))
+    rows, cols = rows[order], cols[order]
+    keys = index[rows].to_frame(index=False) if len(rows) else pd.DataFrame(columns=index.names)
+    keys['period'] = periods[cols].astype(str)
+    keys['total'] = matrix[rows, cols].astype(np.int64)
+    keys['score'] = np.round(scores[rows, cols], 2)
+    return keys[columns] if columns else keys
+
+
+def detect(df, level="district", method="zscore", threshold=None, **params):
+    """Anomalous (series, period) cells of df at the given level, highest score first."""
+    params = detector_params(level, **params)
+    index, periods, matrix = series_matrix(df, level)
+    scores = DETECTORS[method](matrix, **params)
+    return flag(index, periods, matrix, scores, threshold or THRESHOLDS[method])
+
+
+def day_totals(df, keys):
+    # Count totals per (series keys..., day)
+    count_cols = [c for c in df.columns if 'age' in c]
+    return df[count_cols].sum(axis=1).groupby([df[k] for k in keys] + [df['date'].rename('date')],
+                                              observed=True).sum()
+
+
+def build_state(df, level="district", method="zscore", **params):
+    """Score all of df once and keep the trailing window for later incremental updates.
+
+    The state holds the closed periods' window, the open (latest) period's
+    totals and, for merging later rows into it, its per-day totals.
+    """
+    params = detector_params(level, **params)
+    index, periods, matrix = series_matrix(df, level)
+    keys, freq = LEVELS[level]
+    last = periods[-1] if len(periods) else None
+    days = day_totals(df[df['date'].dt.to_period(freq) == last], keys) if last is not None else None
+    state = {"version": STATE_VERSION, "level": level, "method": method, "params": params, "index": index,
+             "last": last, "last_date": df['date'].max() if len(df) else None, "days": days,
+             "history": matrix[:, -lookback(method, params) - 1:-1] if last is not None else matrix,
+             "open": matrix[:, -1] if last is not None else np.zeros(len(index))}
+    return state, index, periods, matrix, DETECTORS[method](matrix, **params)
+
+
+def append_period(state, values, period):
+    """Set a period's {series key: total} in the state and score it; returns (keys, totals, scores).
+
+    period is either the open period, whose totals are replaced, or a later
+    one, which closes the open period into the saved window.
+    """
+    index, history, column = state["index"], state["history"], state["open"]
+    # Series seen for the first time get an all-zero history, as in the dense matrix
+    new_keys = values.index.difference(index)
+    if len(new_keys):
+        index = index.append(new_keys)
+        history = np.vstack([history, np.zeros((len(new_keys), history.shape[1]))])
+        column = np.concatenate([column, np.zeros(len(new_keys))])
+    if state["last"] is not None and period != state["last"]:
+        # Skipped periods had no rows at all
+        gap = (period - state["last"]).n - 1
+        history = np.hstack([history, column[:, None], np.zeros((len(index), gap))])
+        history = history[:, -lookback(state["method"], state["params"]):]
+    column = np.zeros(len(index))
+    column[index.get_indexer(values.index)] = values.to_numpy(dtype=float)
+    window = np.hstack([history, column[:, None]])
+    scores = DETECTORS[state["method"]](window, last=True, **state["params"])[:, -1]
+    state.update(index=index, last=period, history=history, open=column)
+    return index, column, scores
+
+
+def update(state, df, threshold=None):
+    """Fold rows of df from the last day already seen onwards into the state; returns the anomalies
+    of every period they touch.
+
+    A day's rows replace what the state holds for that day, so df can be just
+    the new days or all rows again (a day's rows are expected to arrive together).
+    """
+    keys, freq = LEVELS[state["level"]]
+    threshold = threshold or THRESHOLDS[state["method"]]
+    if state["last_date"] is not None:
+        df = df[df['date'] >= state["last_date"]]
+    if not len(df):
+        return pd.DataFrame(columns=keys + ['period', 'total', 'score'])
+    days = day_totals(df, keys)
+    period = days.index.get_level_values('date').to_period(freq)
+    flagged = []
+    for p in sorted(period.unique()):
+        new_days = days[period == p]
+        if p == state["last"]:
+            old = state["days"]
+            new_days = pd.concat([old[~old.index.get_level_values('date').isin(
+                new_days.index.get_level_values('date'))], new_days])
+        values = new_days.groupby(level=keys, observed=True).sum()
+        index, column, scores = append_period(state, values, p)
+        state["days"] = new_days
+        flagged.append(flag(index, pd.PeriodIndex([p]), column[:, None], scores[:, None], threshold))
+    state["last_date"] = max(state["last_date"], df['date'].max()) if state["last_date"] is not None \
+        else df['date'].max()
+    return pd.concat(flagged, ignore_index=True).sort_values('score', ascending=False, kind='stable')
+
+
+def check_update(df, split, level="district", method="zscore", **params):
+    """Whether building the state on rows before split and updating it with the rest
+    flags the same cells of the updated periods as one detect() over all of df."""
+    split = pd.Timestamp(split)
+    state = build_state(df[df['date'] < split], level, method, **params)[0]
+    updated = update(state, df[df['date'] >= split])
+    full = detect(df, level, method, **params)
+    full = full[full['period'].isin(updated['period'].unique())]
+    # Series order (and so tie order) differs: new series are appended to the state
+    keys = LEVELS[level][0]
+
+    def cells(frame):
+        frame = frame.astype({k: str for k in keys})
+        return frame.sort_values(keys + ['period'], kind='stable').reset_index(drop=True)
+    return cells(updated).equals(cells(full))
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def detect_incremental(df, state_path, level="district", method="zscore", threshold=None, **params):
+    """Like detect(), but only the open period and later ones are scanned, against the saved state.
+
+    The first run (or a run with different detector settings) scores everything and saves the state.
+    """
+    state = load_state(state_path)
+    if state is None or state.get("version") != STATE_VERSION or \
+            (state["level"], state["method"], state["params"]) != (level, method, detector_params(level, **params)):
+        state, index, periods, matrix, scores = build_state(df, level, method, **params)
+        anomalies = flag(index, periods, matrix, scores, threshold or THRESHOLDS[method])
+    else:
+        anomalies = update(state, df, threshold)
+    save_state(state_path, state)
+    return anomalies
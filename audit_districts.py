@@ -1,11 +1,22 @@
 import json
 import os
+import argparse
+from district_index import MIN_SIMILARITY, merge_candidates, district_counts, write_proposals
 
 # Base directory setup
 BASE_DIR = r"e:\adhar hackathon"
 DATA_FILE = os.path.join(BASE_DIR, "dashboard", "src", "data.json")
+DIRS = ["api_data_aadhar_biometric", "api_data_aadhar_demographic", "api_data_aadhar_enrolment"]
+PROPOSALS_FILE = os.path.join(BASE_DIR, "output", "district_merge_proposals.txt")
 
-def audit_districts():
+def print_candidates(candidates):
+    print(f"\n--- {len(candidates)} Merge Candidate(s) ---\n")
+    for c in candidates:
+        sound = " (same sound)" if c["same_sound"] else ""
+        print(f"  {c['similarity']:.3f}{sound}  {c['state']}: "
+              f"{c['variant']} ({c['variant_rows']}) -> {c['canonical']} ({c['canonical_rows']})")
+
+def audit_districts(min_similarity=MIN_SIMILARITY):
     try:
         with open(DATA_FILE, 'r') as f:
             data = json.load(f)
@@ -13,24 +24,47 @@ def audit_districts():
         print("\n--- District Audit Log ---\n")
         
         state_specific = data.get("state_specific", {})
+        totals = {}
         
         for state, metrics in sorted(state_specific.items()):
             print(f"State: {state}")
             districts = [d['district'] for d in metrics.get('district_breakdown', [])]
             districts.sort()
+            totals.update({(state, d['district']): d['total'] for d in metrics.get('district_breakdown', [])})
             
-            # Print districts in a clean format
-            # print(f"  Total Districts: {len(districts)}")
-            # print(f"  Districts: {', '.join(districts)}")
-            
-            # Simple heuristic for potential duplicates: Levenshtein distance or just soundex? 
-            # For now, just printing them sorted allows visual inspection of near-duplicates (e.g. "Ahmedabad", "Ahmadabad")
+            # Sorted names still allow visual inspection; likely duplicates are ranked below
             for d in districts:
                 print(f"    - {d}")
             print("-" * 30)
+
+        # Near-duplicates (e.g. "Ahmedabad", "Ahmadabad") from the indexed similarity search
+        print_candidates(merge_candidates(totals, min_similarity))
             
     except Exception as e:
         print(f"Error reading data.json: {e}")
 
+def audit_raw(min_similarity=MIN_SIMILARITY, proposals=None):
+    # Every (state, district) spelling in the raw shards, after the current normalization
+    dir_paths = [os.path.join(BASE_DIR, d) for d in DIRS if os.path.isdir(os.path.join(BASE_DIR, d))]
+    counts, spellings = district_counts(dir_paths)
+    print(f"Scanned {len(counts)} (state, district) names in {len(dir_paths)} dataset(s)")
+    candidates = merge_candidates(counts, min_similarity, spellings)
+    print_candidates(candidates)
+    if proposals:
+        write_proposals(proposals, candidates)
+        print(f"\nProposed mapping entries written to {proposals}")
+    return candidates
+
 if __name__ == "__main__":
-    audit_districts()
+    parser = argparse.ArgumentParser(description="Review district names for near-duplicate spellings")
+    parser.add_argument("--raw", action="store_true",
+                        help="search the raw CSV shards instead of data.json")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SIMILARITY,
+                        help="edit-distance similarity (0-1) needed to propose a merge")
+    parser.add_argument("--proposals", nargs="?", const=PROPOSALS_FILE, default=None,
+                        help="write proposed STATE_DISTRICT_RENAMES entries (with --raw)")
+    args = parser.parse_args()
+    if args.raw:
+        audit_raw(args.min_similarity, args.proposals)
+    else:
+        audit_districts(args.min_similarity)
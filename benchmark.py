@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import subprocess
+import contextlib
+from datetime import datetime
+import pandas as pd
+import numpy as np
+import analyze_aadhaar
+import gap_analysis_model
+import anomaly_engine
+import facility_placement
+from shard_cache import list_shards, read_csv
+from synthetic_data import CATEGORIES, generate, parse_scale
+
+# Benchmarks for the analysis pipelines on synthetic shards.
+# For each scale the synthetic_data generator writes all three categories once
+# (reused by later runs), then every stage is timed (best of --repeat runs) and
+# run once more under tracemalloc for its peak allocation. Results go to a JSON
+# file; pass an earlier results file with --compare to print per-stage ratios.
+
+BASE_DIR = r"E:\adhar hackathon"
+BENCH_DIR = os.path.join(BASE_DIR, "benchmark")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results.json")
+DEFAULT_SCALES = ["10k", "100k", "1M"]
+PAIR_CHECK_POINTS = 2000  # Centroids checked against a full distance matrix
+
+
+def scale_dir(rows):
+    return os.path.join(BENCH_DIR, "data", str(rows))
+
+
+def ensure_data(rows, seed):
+    base = scale_dir(rows)
+    if all(os.path.isdir(os.path.join(base, d)) and list_shards(os.path.join(base, d))
+           for d, _, _ in CATEGORIES.values()):
+        return base
+    generate(base, rows, seed=seed)
+    return base
+
+
+def point_pipelines_at(base, use_cache):
+    # Both scripts read their paths from module constants, all under BASE_DIR; move every one under base
+    for module in (analyze_aadhaar, gap_analysis_model):
+        root = module.BASE_DIR
+        for name, value in list(vars(module).items()):
+            if name.isupper() and isinstance(value, str) and value.startswith(root):
+                setattr(module, name, base + value[len(root):])
+        module.CACHE_DIR = os.path.join(base, "cache") if use_cache else None
+    os.makedirs(analyze_aadhaar.OUTPUT_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(gap_analysis_model.OUTPUT_FILE), exist_ok=True)
+
+
+def raw_frame(base, category):
+    dir_path = os.path.join(base, CATEGORIES[category][0])
+    return pd.concat([read_csv(p) for p in list_shards(dir_path)], ignore_index=True)
+
+
+def anomaly_update(df):
+    # Incremental scoring after a mid-period split must match one full scan
+    split = df['date'].quantile(0.9).normalize()
+    for method in anomaly_engine.METHODS:
+        if not anomaly_engine.check_update(df, split, "district", method):
+            raise AssertionError(f"anomaly update from {split:%Y-%m-%d} differs from a full {method} scan")
+
+
+def clustered_centroids(seed=42):
+    # Pincode-like clusters across India's latitude range, a few km apart
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([8.0, 68.0], [35.0, 97.0], (PAIR_CHECK_POINTS // 50, 2))
+    points = np.repeat(centers, 50, axis=0) + rng.normal(0, 0.08, (len(centers) * 50, 2))
+    return points[:, 0], points[:, 1]
+
+
+def placement_pairs(centroids):
+    # Grid pairs must match great-circle distances, not just the grid's own projection
+    if not facility_placement.check_pairs(*centroids):
+        raise AssertionError("placement grid pairs differ from a great-circle distance matrix")
+
+
+def stages(base):
+    # name -> (setup returning the stage's input, stage taking that input)
+    categories = list(CATEGORIES)
+    return {
+        "load_data": (lambda: None,
+                      lambda _: [analyze_aadhaar.load_data(c) for c in categories]),
+        "normalize_data": (lambda: raw_frame(base, "enrolment"),
+                           gap_analysis_model.normalize_data),
+        "load_and_aggregate": (lambda: None,
+                               lambda _: [gap_analysis_model.load_and_aggregate(c) for c in categories]),
+        "detect_anomalies": (lambda: analyze_aadhaar.load_data("enrolment"),
+                             lambda df: analyze_aadhaar.detect_anomalies(df, "enrolment")),
+        "anomaly_update": (lambda: analyze_aadhaar.load_data("enrolment"), anomaly_update),
+        "placement_pairs": (clustered_centroids, placement_pairs),
+        "analyze_main": (lambda: None, lambda _: analyze_aadhaar.main()),
+        "gap_main": (lambda: None, lambda _: gap_analysis_model.main()),
+    }
+
+
+def run_stage(setup, stage, repeat):
+    # Pipeline output is silenced so it does not drown the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        times = []
+        for _ in range(repeat):
+            data = setup()
+            start = time.perf_counter()
+            stage(data)
+            times.append(time.perf_counter() - start)
+        data = setup()
+        tracemalloc.start()
+        stage(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(scales, repeat=1, seed=42, use_cache=False, only=None):
+    results = []
+    for label in scales:
+        rows = parse_scale(label)
+        base = ensure_data(rows, seed)
+        point_pipelines_at(base, use_cache)
+        for name, (setup, stage) in stages(base).items():
+            if only and name not in only:
+                continue
+            seconds, peak = run_stage(setup, stage, repeat)
+            print(f"{label:>6} {name:<20} {seconds:9.3f} s {peak / 1024**2:10.1f} MB")
+            results.append({"scale": label, "rows": rows, "stage": name,
+                            "seconds": round(seconds, 4), "peak_mb": round(peak / 1024**2, 1)})
+    return {
+        "run": {
+            "revision": git_revision(),
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "repeat": repeat,
+            "cache": use_cache,
+        },
+        "results": results,
+    }
+
+
+def compare(current, previous):
+    before = {(r["scale"], r["stage"]): r for r in previous["results"]}
+    print(f"\nCompared with {previous['run'].get('revision')} (ratio = before / now)")
+    for r in current["results"]:
+        old = before.get((r["scale"], r["stage"]))
+        if old is None:
+            continue
+        speedup = old["seconds"] / r["seconds"] if r["seconds"] else float("inf")
+        memory = old["peak_mb"] / r["peak_mb"] if r["peak_mb"] else float("inf")
+        print(f"{r['scale']:>6} {r['stage']:<20} time x{speedup:6.2f}  memory x{memory:6.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipelines on synthetic data")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES,
+                        help="rows per category for each run, e.g. 10k 1M 100M")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=42, help="synthetic data seed")
+    parser.add_argument("--cache", action="store_true",
+                        help="use the per-shard columnar cache (warm after the first stage)")
+    parser.add_argument("--stages", nargs="+", default=None, help="only run these stages")
+    parser.add_argument("--output", default=RESULTS_FILE, help="results file to write")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.repeat, args.seed, args.cache, args.stages)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+# Cached, headless trend charts. Each chart is keyed by a hash of the data it
+# plots (plus its title), and the keys of the PNGs already on disk are kept in a
+# small manifest next to them, so unchanged charts are not redrawn. Stale charts
+# render on a process pool with matplotlib's Agg backend, which is only imported
+# once something actually needs drawing.
+
+CHART_VERSION = "1"  # Bump when the chart styling changes
+MANIFEST_FILE = ".chart_hashes.json"
+FIGSIZE = (12, 6)
+
+
+def chart_key(frame, title):
+    digest = hashlib.sha256()
+    digest.update(f"{CHART_VERSION}|{title}|{list(frame.columns)}".encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def render_chart(path, frame, title):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig, ax = plt.subplots(figsize=FIGSIZE)
+    frame.plot(kind='line', marker='o', ax=ax)
+    ax.set_title(title)
+    ax.set_ylabel('Count')
+    ax.grid(True)
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def _read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def render_charts(charts, out_dir, workers=None):
+    """Render {file name: (frame, title)} into out_dir, skipping charts whose data is unchanged.
+
+    Returns the names of the charts that were (re)drawn.
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = _read_manifest(manifest_path)
+    keys = {name: chart_key(frame, title) for name, (frame, title) in charts.items()}
+    stale = [name for name in charts
+             if manifest.get(name) != keys[name] or not os.path.exists(os.path.join(out_dir, name))]
+
+    jobs = [(os.path.join(out_dir, name), *charts[name]) for name in stale]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(render_chart, *job) for job in jobs]:
+                future.result()
+    else:
+        for job in jobs:
+            render_chart(*job)
+
+    if stale:
+        manifest.update({name: keys[name] for name in stale})
+        _write_manifest(manifest_path, manifest)
+    return stale
@@ -0,0 +1,22 @@
+# Option choices and defaults shared by the pipeline modules and the
+# aadhaar_pipeline CLI. The modules that own these settings re-export them
+# under their usual names; keeping them here, free of pandas/numpy imports,
+# lets the CLI build its parser (and answer --help) without loading either.
+
+TIME_SERIES_METHODS = ["zscore", "mad", "seasonal"]  # anomaly_engine detectors
+ANOMALY_METHODS = ["total"] + TIME_SERIES_METHODS  # "total": all-time district totals above mean + 3 sigma
+ANOMALY_LEVELS = ["district", "pincode"]
+EXPORT_FORMATS = ["json", "columnar"]
+COMPRESSIONS = ["gzip", "brotli"]
+REPORT_FORMATS = ["md", "html", "pdf"]
+PROFILERS = ["cprofile", "pyinstrument"]
+
+FORECAST_HORIZON = 3  # Months ahead, summed into one forecast
+PLACEMENT_SITES = 1000  # Centers to place
+PLACEMENT_RADIUS_KM = 10.0  # Distance a center serves
+MIN_SIMILARITY = 0.8  # District audit: 1 - edit distance / longer key
+CONFLICTS_SHOWN = 20  # Conflicting pincodes the hierarchy report prints
+
+QUERY_HOST = "127.0.0.1"
+QUERY_PORT = 8765
+QUERY_CACHE_SIZE = 1024  # Responses kept in the LRU cache
@@ -1,5 +1,5 @@
 import React from 'react'
-import data from './data.json'
+import { useData, useQuery, hasApi } from './dataStore'
 import { TrendingUp, AlertCircle, Lightbulb, MapPin, Users, ShieldCheck, Activity, FileText, Download, Brain, Sparkles, Clock, Calendar } from 'lucide-react'
 import jsPDF from 'jspdf'
 import html2canvas from 'html2canvas'
@@ -18,10 +18,12 @@ const App = () => {
     const [secondaryState, setSecondaryState] = React.useState(null)
     const [isCompareMode, setIsCompareMode] = React.useState(false)
     const [districtSearch, setDistrictSearch] = React.useState('')
+    const [selectedDistrict, setSelectedDistrict] = React.useState(null) // { state, district }, needs the query service
     const distributionRef = React.useRef(null)
     const [isGeneratingPdf, setIsGeneratingPdf] = React.useState(false)
     const [language, setLanguage] = React.useState('en')
-    const { states, global, state_specific } = data
+    const index = useData('index.json')
+    const states = index?.states || []
 
     const t = (key) => {
         if (!key) return ""
@@ -127,8 +129,9 @@ const App = () => {
         }
     }
 
-    const primaryData = selectedState === 'All India' ? global : state_specific[selectedState]
-    const secondaryData = (isCompareMode && secondaryState) ? state_specific[secondaryState] : null
+    // Per-state files are fetched only when a state is selected
+    const primaryData = useData(index?.files[selectedState] || null)
+    const secondaryData = useData(index && isCompareMode && secondaryState ? index.files[secondaryState] : null)
 
     const {
         growth_patterns,
@@ -138,9 +141,15 @@ const App = () => {
         district_breakdown = []
     } = primaryData || {}
 
+    React.useEffect(() => setSelectedDistrict(null), [selectedState])
+
+    // A selected district's own trends come from the query service on demand
+    const districtEnrolment = useQuery('trend', selectedDistrict && { ...selectedDistrict, category: 'enrolment' })
+    const districtBio = useQuery('trend', selectedDistrict && { ...selectedDistrict, category: 'biometric' })
+
     // Prepare Comparison Data for Charts
-    const enrolmentData = trends?.enrolment || []
-    const bioData = trends?.biometric || []
+    const enrolmentData = districtEnrolment || trends?.enrolment || []
+    const bioData = districtBio || trends?.biometric || []
 
     const mergedEnrolmentData = React.useMemo(() => {
         if (!secondaryData) return enrolmentData;
@@ -165,7 +174,7 @@ const App = () => {
 
     // Generate State-Specific Metrics and Forecast
     const stateMetrics = React.useMemo(() => {
-        const stateData = selectedState === 'All India' ? global : state_specific[selectedState];
+        const stateData = primaryData;
         if (!stateData) return { peakMonth: "June", spikePercentage: 25, mandatoryRatio: 40, hotspot: "Hotspot", avgEnrolment: 50000 };
 
         const gp = stateData.growth_patterns;
@@ -201,10 +210,10 @@ const App = () => {
             hotspot: topDist,
             avgEnrolment
         };
-    }, [selectedState, global, state_specific])
+    }, [selectedState, primaryData])
 
     const forecastData = React.useMemo(() => {
-        const stateData = selectedState === 'All India' ? global : state_specific[selectedState];
+        const stateData = primaryData;
         if (!stateData) return [];
         const enrolmentTrends = stateData.trends?.enrolment || [];
 
@@ -220,7 +229,7 @@ const App = () => {
                 predicted: Math.round(baseValue * growthFactor)
             };
         });
-    }, [selectedState, stateMetrics])
+    }, [primaryData, stateMetrics])
 
 
     const searchedDistricts = district_breakdown.filter(d =>
@@ -240,6 +249,14 @@ const App = () => {
         }
     }
 
+    if (!index || !primaryData) {
+        return (
+            <div className={`dashboard-container lang-${language}`}>
+                <div className="no-data">Loading {tState(selectedState)}...</div>
+            </div>
+        )
+    }
+
     return (
         <div className={`dashboard-container lang-${language}`}>
             <header className="header glass">
@@ -444,9 +461,9 @@ const App = () => {
                                 <h2 className="section-title"><Activity size={20} color="#6366f1" /> {t('geoDensity')}</h2>
                             </div>
                             <div className="map-wrapper">
-                                {/* Pass state_specific data to map, and handle selection */}
+                                {/* Pass per-state totals from the index to the map, and handle selection */}
                                 <IndiaMap
-                                    stateData={state_specific}
+                                    stateTotals={index.state_totals}
                                     activeState={selectedState}
                                     secondaryState={secondaryState}
                                     onStateSelect={handleStateSelect}
@@ -461,7 +478,7 @@ const App = () => {
 
                         {/* Interactive Charts Section */}
                         <section className="charts-section">
-                            <h2 className="section-title"><TrendingUp size={20} /> {secondaryState ? `${tState(selectedState)} ${t('vs')} ${tState(secondaryState)} ${t('trendAnalytics')}` : `${tState(selectedState)} ${t('trendAnalytics')}`}</h2>
+                            <h2 className="section-title"><TrendingUp size={20} /> {selectedDistrict ? `${selectedDistrict.district}, ` : ''}{secondaryState ? `${tState(selectedState)} ${t('vs')} ${tState(secondaryState)} ${t('trendAnalytics')}` : `${tState(selectedState)} ${t('trendAnalytics')}`}</h2>
                             <div className="charts-grid-interactive">
                                 <div className="chart-card glass">
                                     <h3>{t('enrolmentVol')}</h3>
@@ -557,7 +574,16 @@ const App = () => {
                             </div>
                             <div className="dist-grid">
                                 {searchedDistricts.length > 0 ? searchedDistricts.map((item, idx) => (
-                                    <div key={idx} className="dist-item">
+                                    <div
+                                        key={idx}
+                                        className={`dist-item${selectedDistrict?.district === item.district ? ' active' : ''}`}
+                                        style={hasApi ? { cursor: 'pointer' } : undefined}
+                                        onClick={() => {
+                                            if (!hasApi) return
+                                            const district = { state: item.state || selectedState, district: item.district }
+                                            setSelectedDistrict(selectedDistrict?.district === district.district && selectedDistrict?.state === district.state ? null : district)
+                                        }}
+                                    >
                                         <span className="dist-name">{item.district}</span>
                                         <div className="dist-bar-wrapper">
                                             <div
@@ -611,6 +637,7 @@ const App = () => {
                 ) : (
                     <InfrastructurePlanning
                         selectedState={selectedState}
+                        selectedDistrict={selectedDistrict}
                         translations={translations}
                         tState={tState}
                         tData={tData}
@@ -9,23 +9,12 @@ const PROJECTION_CONFIG = {
     center: [78.9629, 22.5937] // Centered on India
 };
 
-const IndiaMap = ({ stateData, activeState, secondaryState, onStateSelect }) => {
+const IndiaMap = ({ stateTotals, activeState, secondaryState, onStateSelect }) => {
     const [tooltipContent, setTooltipContent] = React.useState("");
 
 
-    // Prepare data for the map
-    // Calculate total enrolment for each state to drive the color scale
-    const mapData = useMemo(() => {
-        const data = {};
-        if (!stateData) return data;
-
-        Object.keys(stateData).forEach(state => {
-            const breakdown = stateData[state].district_breakdown || [];
-            const total = breakdown.reduce((acc, curr) => acc + (curr.total || 0), 0);
-            data[state] = total;
-        });
-        return data;
-    }, [stateData]);
+    // Total enrolment for each state drives the color scale
+    const mapData = stateTotals || {};
 
     const colorScale = useMemo(() => {
         const values = Object.values(mapData).filter(v => v > 0);
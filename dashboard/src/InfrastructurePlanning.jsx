@@ -1,21 +1,19 @@
 import React from 'react';
 import { MapPin, Activity, ChevronRight } from 'lucide-react';
-import gapData from './gap_data.json';
+import { useData, useQuery } from './dataStore';
 
-const InfrastructurePlanning = ({ selectedState, translations, tState, tData }) => {
-    // Process gap analysis data
-    const allLocations = gapData.top_priority_locations || [];
-
-    // Filter by selected state (case-insensitive and trimmed for robustness)
-    const filteredLocations = selectedState === 'All India'
-        ? allLocations
-        : allLocations.filter(loc => {
-            if (!loc.state) return false;
-            return String(loc.state).trim() === String(selectedState).trim();
-        });
-
-    // Display all filtered locations for state level, but limit for All India to keep it readable
-    const pinData = selectedState === 'All India' ? filteredLocations.slice(0, 20) : filteredLocations;
+const InfrastructurePlanning = ({ selectedState, selectedDistrict, translations, tState, tData }) => {
+    // Gap analysis is sharded per state; All India holds the top national locations
+    const gapIndex = useData('gap/index.json');
+    const gapFile = gapIndex?.files[String(selectedState).trim()] || null;
+    const gapData = useData(gapFile);
+    // A selected district's locations come from the query service
+    const districtData = useQuery('gap', selectedDistrict);
+    const isLoading = selectedDistrict ? !districtData : !gapIndex || (gapFile && !gapData);
+    const pinData = (selectedDistrict ? districtData : gapData)?.top_priority_locations || [];
+    // Placed center sites (each covering several neighbouring PINs), narrowed to the selected district
+    const sites = (gapData?.recommended_sites || [])
+        .filter(site => !selectedDistrict || site.district === selectedDistrict.district);
 
     return (
         <div className="infrastructure-planning-container">
@@ -26,7 +24,7 @@ const InfrastructurePlanning = ({ selectedState, translations, tState, tData })
                     </div>
                     <div className="stat-info">
                         <span className="stat-label">Model Focus</span>
-                        <h3 className="stat-title">{tState(selectedState)}</h3>
+                        <h3 className="stat-title">{selectedDistrict ? `${selectedDistrict.district}, ` : ''}{tState(selectedState)}</h3>
                         <span className="stat-meta">PIN-Level Analysis</span>
                     </div>
                 </div>
@@ -87,6 +85,14 @@ const InfrastructurePlanning = ({ selectedState, translations, tState, tData })
                                     </div>
                                     <span className="metric-value">{pin.growth}%</span>
                                 </div>
+                                {pin.forecast_demand !== undefined && (
+                                    <div className="metric-row">
+                                        <span className="metric-label">Forecast</span>
+                                        <span className="metric-value">
+                                            {pin.forecast_demand} ({pin.forecast_lower}-{pin.forecast_upper})
+                                        </span>
+                                    </div>
+                                )}
                             </div>
                             <button className="recommendation-link">
                                 Establish Permanent Center <ChevronRight size={16} />
@@ -94,11 +100,51 @@ const InfrastructurePlanning = ({ selectedState, translations, tState, tData })
                         </div>
                     )) : (
                         <div className="no-data" style={{ padding: '3rem', textAlign: 'center', opacity: 0.6 }}>
-                            No high-priority expansion zones identified for {tState(selectedState)} in the current model run.
+                            {isLoading
+                                ? `Loading expansion zones for ${tState(selectedState)}...`
+                                : `No high-priority expansion zones identified for ${tState(selectedState)} in the current model run.`}
                         </div>
                     )}
                 </div>
             </section>
+
+            {sites.length > 0 && (
+                <section className="expansion-section glass">
+                    <div className="section-header">
+                        <div className="title-group">
+                            <MapPin className="section-icon" size={24} />
+                            <div>
+                                <h2 className="section-title">Recommended Center Sites</h2>
+                                <p className="section-subtitle">Sites covering the most unmet demand within the service radius</p>
+                            </div>
+                        </div>
+                    </div>
+
+                    <div className="priority-list">
+                        {sites.map(site => (
+                            <div key={site.pincode} className="priority-item-card glass">
+                                <span className="pin-code">{site.pincode}</span>
+                                <div className="district-info">
+                                    <strong>{site.district || 'Industrial Cluster'}</strong>
+                                    <span className="state-label">{site.state ? tState(site.state) : tState(selectedState)}</span>
+                                </div>
+                                <div className="score-badge">
+                                    {site.covered_unmet_demand}
+                                </div>
+                                <div className="metrics-group">
+                                    <div className="metric-row">
+                                        <span className="metric-label">Covers</span>
+                                        <span className="metric-value">{site.covered_pincodes.length} PINs</span>
+                                    </div>
+                                </div>
+                                <button className="recommendation-link">
+                                    Site #{site.rank} <ChevronRight size={16} />
+                                </button>
+                            </div>
+                        ))}
+                    </div>
+                </section>
+            )}
         </div>
     );
 };
@@ -0,0 +1,90 @@
+import React from 'react'
+
+// The pipelines write sharded payloads to public/data: a small index plus one
+// file per state. Files are fetched on first use and cached for the session.
+const DATA_URL = `${import.meta.env.BASE_URL}data/`
+// Optional local query service (query_server.py) for slices the static files
+// don't hold; without VITE_API_URL the dashboard only uses the static files
+const API_URL = import.meta.env.VITE_API_URL
+export const hasApi = Boolean(API_URL)
+const COLUMNAR_FORMAT = 'columnar-1'
+const requests = new Map()
+const resolved = new Map()
+
+// Columnar files (dashboard_export.py) store lists of records as one array per
+// field, with dictionary fields holding indexes into the file's string table
+const decodeColumnar = (value, strings) => {
+    if (Array.isArray(value) || value === null || typeof value !== 'object') return value
+    if (value.$fields) {
+        const { $fields: fields, $columns: columns, $dict: dict } = value
+        const decoded = columns.map((column, i) =>
+            dict.includes(fields[i]) ? column.map(code => strings[code]) : column)
+        return decoded[0].map((_, row) => {
+            const record = {}
+            fields.forEach((field, i) => { record[field] = decoded[i][row] })
+            return record
+        })
+    }
+    const out = {}
+    for (const key of Object.keys(value)) out[key] = decodeColumnar(value[key], strings)
+    return out
+}
+
+const decodePayload = (payload) =>
+    payload && payload.format === COLUMNAR_FORMAT ? decodeColumnar(payload.data, payload.strings) : payload
+
+const fetchUrl = (url) => {
+    if (!requests.has(url)) {
+        const request = fetch(url)
+            .then(res => {
+                if (!res.ok) throw new Error(`Failed to load ${url}: ${res.status}`)
+                return res.json()
+            })
+            .then(decodePayload)
+            .then(data => {
+                resolved.set(url, data)
+                return data
+            })
+            .catch(err => {
+                requests.delete(url)
+                throw err
+            })
+        requests.set(url, request)
+    }
+    return requests.get(url)
+}
+
+export const fetchData = (path) => fetchUrl(DATA_URL + path)
+
+// Service URL for an endpoint and its (non-empty) params, or null without a service
+export const queryUrl = (endpoint, params) => {
+    if (!hasApi || !params) return null
+    const search = new URLSearchParams(
+        Object.entries(params).filter(([, value]) => value !== null && value !== undefined && value !== '')
+    )
+    search.sort()
+    return `${API_URL.replace(/\/$/, '')}/api/${endpoint}?${search}`
+}
+
+const useUrl = (url) => {
+    const [entry, setEntry] = React.useState({ url: null, data: null })
+
+    React.useEffect(() => {
+        if (!url || resolved.has(url)) return
+        let active = true
+        fetchUrl(url)
+            .then(data => { if (active) setEntry({ url, data }) })
+            .catch(err => console.error(err))
+        return () => { active = false }
+    }, [url])
+
+    if (!url) return null
+    if (resolved.has(url)) return resolved.get(url)
+    return entry.url === url ? entry.data : null
+}
+
+// Returns the parsed file at path, or null while it is loading (or if path is null)
+export const useData = (path) => useUrl(path ? DATA_URL + path : null)
+
+// Returns a query service response, or null while loading, without a service or if params is null
+export const useQuery = (endpoint, params) => useUrl(queryUrl(endpoint, params))
@@ -0,0 +1,191 @@
+import os
+import re
+import gzip
+import json
+import constants
+
+# Sharded dashboard payloads. Instead of one monolithic JSON bundled into the
+# app, each pipeline writes a small index (state list, summary, file map) plus
+# one file per state under dashboard/public/data, and the dashboard fetches a
+# state's file only when that state is selected.
+#
+# Tables (trends, district breakdowns, priority locations) arrive as
+# DataFrames. The "json" format writes them as lists of records. The
+# "columnar" format writes each as one array per column, taken straight from
+# the frame without building records, with state/district names replaced by
+# indexes into a per-file string table, integral floats written as integers
+# and no whitespace. dataStore.js decodes it back into the
+# record lists the components use. Optional .gz/.br copies sit next to each
+# file for static hosts that serve precompressed assets. Files of states that
+# dropped out of the data are removed, so the directory matches the index.
+
+try:
+    import brotli
+except ImportError:  # No brotli: only gzip precompression is available
+    brotli = None
+
+ALL_INDIA = "All India"
+ALL_INDIA_GAP_LOCATIONS = 20  # Rows shown for All India in Infrastructure Planning
+EXPORT_FORMATS = constants.EXPORT_FORMATS
+COMPRESSIONS = constants.COMPRESSIONS
+COMPRESSED_SUFFIXES = {"gzip": ".gz", "brotli": ".br"}
+COLUMNAR_FORMAT = "columnar-1"
+DICTIONARY_FIELDS = ["state", "district"]
+
+
+def state_slug(name):
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def is_frame(value):
+    return hasattr(value, "columns") and hasattr(value, "to_dict")
+
+
+def is_table(value):
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(row, dict) for row in value)
+
+
+def to_records(data):
+    """data with every DataFrame in it turned into a list of records (the "json" layout)."""
+    if isinstance(data, dict):
+        return {key: to_records(value) for key, value in data.items()}
+    if is_frame(data):
+        return data.to_dict(orient='records')
+    return data
+
+
+def encode_column(values, field, strings):
+    # Returns (column, dictionary-encoded?)
+    if field in DICTIONARY_FIELDS and all(isinstance(v, str) for v in values):
+        return [strings.setdefault(v, len(strings)) for v in values], True
+    if all(isinstance(v, float) and v.is_integer() for v in values):
+        return [int(v) for v in values], False
+    return values, False
+
+
+def encode_table(fields, columns, strings):
+    encoded, dictionary = [], []
+    for field, values in zip(fields, columns):
+        column, is_dict = encode_column(values, field, strings)
+        encoded.append(column)
+        if is_dict:
+            dictionary.append(field)
+    return {"$fields": fields, "$columns": encoded, "$dict": dictionary}
+
+
+def encode_columnar(data, strings):
+    # Tables become {"$fields", "$columns", "$dict"}; everything else is kept as is
+    if isinstance(data, dict):
+        return {key: encode_columnar(value, strings) for key, value in data.items()}
+    if is_frame(data):
+        if not len(data):
+            return []
+        fields = [str(c) for c in data.columns]
+        return encode_table(fields, [data[c].tolist() for c in data.columns], strings)
+    if not is_table(data):
+        return data
+    fields = list(data[0])
+    if any(list(row) != fields for row in data):
+        return data  # Records with differing fields keep the row layout
+    return encode_table(fields, [[row[field] for row in data] for field in fields], strings)
+
+
+def columnar_payload(data):
+    strings = {}
+    encoded = encode_columnar(data, strings)
+    return {"format": COLUMNAR_FORMAT, "strings": list(strings), "data": encoded}
+
+
+def write_json(path, data, export_format="json", compress=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if export_format == "columnar":
+        text = json.dumps(columnar_payload(data), separators=(",", ":"))
+    else:
+        text = json.dumps(to_records(data), indent=4)
+    with open(path, "w") as f:
+        f.write(text)
+    if compress:
+        write_compressed(path, text.encode("utf-8"), compress)
+
+
+def write_compressed(path, raw, compress):
+    compress = [compress] if isinstance(compress, str) else compress
+    for method in compress:
+        if method == "gzip":
+            # mtime=0 keeps the output byte-identical across runs
+            with open(path + COMPRESSED_SUFFIXES["gzip"], "wb") as f:
+                f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+        elif method == "brotli":
+            if brotli is None:
+                raise ImportError("brotli compression requested but the brotli package is not installed")
+            with open(path + COMPRESSED_SUFFIXES["brotli"], "wb") as f:
+                f.write(brotli.compress(raw))
+        else:
+            raise ValueError(f"Unknown compression: {method}")
+
+
+def remove_stale(dir_path, files):
+    # Delete shard files (and compressed copies) in dir_path that are not among files
+    if not os.path.isdir(dir_path):
+        return
+    keep = {os.path.basename(f) for f in files}
+    for name in os.listdir(dir_path):
+        base = name
+        for suffix in COMPRESSED_SUFFIXES.values():
+            base = base[:-len(suffix)] if base.endswith(suffix) else base
+        if base.endswith(".json") and base not in keep:
+            os.remove(os.path.join(dir_path, name))
+
+
+def export_insight_shards(dashboard_data, state_totals, out_dir, export_format="json", compress=None):
+    """Write index.json and states/<slug>.json from analyze_aadhaar's dashboard data.
+
+    state_totals holds each state's full enrolment total (district_breakdown
+    may be cut to the top districts).
+    """
+    shards = {ALL_INDIA: dashboard_data["global"], **dashboard_data["state_specific"]}
+    files = {state: f"states/{state_slug(state)}.json" for state in shards}
+    index = {
+        "states": dashboard_data["states"],
+        "global": {"growth_patterns": dashboard_data["global"]["growth_patterns"]},
+        # Per-state enrolment totals drive the map without loading every state
+        "state_totals": {state: state_totals.get(state, 0) for state in dashboard_data["state_specific"]},
+        "files": files,
+    }
+    for state, metrics in shards.items():
+        write_json(os.path.join(out_dir, files[state]), metrics, export_format, compress)
+    write_json(os.path.join(out_dir, "index.json"), index, export_format, compress)
+    remove_stale(os.path.join(out_dir, "states"), files.values())
+
+
+def split_by_state(frame):
+    # {state: rows} in order of first appearance; rows without a state name are left out
+    if frame is None or 'state' not in frame.columns:
+        return {}
+    return dict(tuple(frame.groupby(frame['state'].astype(object).str.strip(), sort=False)))
+
+
+def export_gap_shards(gap_data, out_dir, export_format="json", compress=None):
+    """Write gap/index.json and gap/<slug>.json from gap_analysis_model's output (tables as DataFrames)."""
+    locations = gap_data["top_priority_locations"]
+    by_state = {ALL_INDIA: locations.head(ALL_INDIA_GAP_LOCATIONS), **split_by_state(locations)}
+    # Placed center sites go to their state's file too; All India keeps the best ones
+    sites = gap_data.get("placement", {}).get("sites")
+    sites_by_state = {}
+    if sites is not None:
+        sites_by_state = {ALL_INDIA: sites.head(ALL_INDIA_GAP_LOCATIONS), **split_by_state(sites)}
+        for state in sites_by_state:
+            by_state.setdefault(state, locations.iloc[:0])
+    files = {state: f"gap/{state_slug(state)}.json" for state in by_state}
+    index = {
+        "last_updated": gap_data["last_updated"],
+        "states": sorted(state for state in by_state if state != ALL_INDIA),
+        "files": files,
+    }
+    for state, rows in by_state.items():
+        shard = {"top_priority_locations": rows}
+        if sites is not None:
+            shard["recommended_sites"] = sites_by_state.get(state, [])
+        write_json(os.path.join(out_dir, files[state]), shard, export_format, compress)
+    write_json(os.path.join(out_dir, "gap", "index.json"), index, export_format, compress)
+    remove_stale(os.path.join(out_dir, "gap"), [*files.values(), "index.json"])
@@ -0,0 +1,272 @@
+import os
+import json
+import contextlib
+import numpy as np
+import pandas as pd
+
+# Ingestion checks for the api_data_aadhar_* shards. While a shard is parsed,
+# vectorized checks count rows with unparseable dates, unknown (e.g. numeric)
+# states, pincodes outside the Indian range, negative or implausible counts and
+# pincodes whose first digit belongs to another postal zone than their state.
+# Every check keeps a few sample rows. Exact duplicate rows, within and across
+# shards (overlapping or re-delivered ranges), are found through 64-bit hashes
+# of the raw rows, so spelling variants that normalize alike are not
+# duplicates. Per category, the hashes of every row already kept live in a
+# persistent set with a manifest of the shards it covers, so a run only hashes
+# and checks the shards that are new. Unparseable dates, unknown states and
+# duplicates are dropped; the other checks only report.
+
+PINCODE_RANGE = (110000, 855999)
+MAX_COUNT = 10000  # A single pincode-day count above this is implausible
+SAMPLE_ROWS = 5
+DROPPED_CHECKS = ["unparseable_date", "unknown_state"]  # Rows removed before the typed frame exists
+MANIFEST_FILE = "manifest.json"
+HASHES_FILE = "hashes.npy"
+# States served by each postal zone (first pincode digit); names as normalize_locations writes them
+POSTAL_ZONES = {
+    1: ["Delhi", "Haryana", "Punjab", "Himachal Pradesh", "Jammu and Kashmir", "Ladakh", "Chandigarh"],
+    2: ["Uttar Pradesh", "Uttarakhand"],
+    3: ["Rajasthan", "Gujarat", "Dadra and Nagar Haveli and Daman and Diu"],
+    4: ["Maharashtra", "Goa", "Madhya Pradesh", "Chhattisgarh"],
+    5: ["Andhra Pradesh", "Telangana", "Karnataka", "Puducherry"],  # Yanam is a 533 pincode
+    6: ["Tamil Nadu", "Kerala", "Puducherry", "Lakshadweep"],
+    7: ["West Bengal", "Odisha", "Assam", "Sikkim", "Arunachal Pradesh", "Meghalaya", "Manipur",
+        "Mizoram", "Nagaland", "Tripura", "Andaman And Nicobar Islands"],
+    8: ["Bihar", "Jharkhand"],
+}
+
+_report = None
+
+
+def row_hashes(df):
+    """64-bit hash of every row's values (the same for categorical and plain string columns)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+class HashSet:
+    """Row hashes kept as a few sorted runs, merged pairwise as they grow (like a binary counter)."""
+
+    def __init__(self, hashes=None):
+        self.runs = [] if hashes is None or not len(hashes) else [np.unique(hashes)]
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes):
+        """Add hashes; returns the mask of those not seen before (a repeat within hashes counts as seen)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        _, first = np.unique(hashes, return_index=True)
+        new = np.zeros(len(hashes), dtype=bool)
+        new[first] = True
+        new &= ~self.contains(hashes)
+        if new.any():
+            self.runs.append(np.sort(hashes[new]))
+            # Stable sort of two concatenated sorted runs is a linear merge
+            while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+                last = self.runs.pop()
+                self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]), kind='stable')
+        return new
+
+    def to_array(self):
+        return np.sort(np.concatenate(self.runs), kind='stable') if self.runs else np.zeros(0, dtype=np.uint64)
+
+
+def _samples(df, mask):
+    sample = df[mask].head(SAMPLE_ROWS)
+    return json.loads(sample.to_json(orient='records', date_format='iso'))
+
+
+def add_check(report, check, df, mask):
+    # Count (and sample) the rows of df flagged by mask under report[check]
+    mask = np.asarray(mask, dtype=bool)
+    n = int(mask.sum())
+    if not n:
+        return
+    entry = report.setdefault(check, {"rows": 0, "samples": []})
+    entry["rows"] += n
+    if len(entry["samples"]) < SAMPLE_ROWS:
+        entry["samples"] += _samples(df, mask)[:SAMPLE_ROWS - len(entry["samples"])]
+
+
+def check_rows(df):
+    """{check: row mask} for normalized rows: pincode range, count sanity and postal zone vs state."""
+    masks = {}
+    pincode = pd.to_numeric(df['pincode'], errors='coerce').to_numpy(dtype=float)
+    masks["invalid_pincode"] = ~((pincode >= PINCODE_RANGE[0]) & (pincode <= PINCODE_RANGE[1]))
+    counts = df[[c for c in df.columns if 'age' in c]].to_numpy(dtype=float)
+    masks["negative_count"] = (counts < 0).any(axis=1)
+    masks["implausible_count"] = (counts > MAX_COUNT).any(axis=1)
+
+    # Zone membership per distinct state, then one lookup per row
+    zone = np.where(np.isnan(pincode), 0, pincode // 100000).astype(np.int64)
+    state_codes, states = pd.factorize(df['state'], use_na_sentinel=False)
+    states = pd.Index([str(s).lower() for s in states])
+    zones = np.zeros((len(states), 10), dtype=bool)
+    for digit, names in POSTAL_ZONES.items():
+        zones[states.isin([n.lower() for n in names]), digit] = True
+    valid = ~masks["invalid_pincode"]
+    masks["pincode_state_mismatch"] = valid & ~zones[state_codes, np.clip(zone, 0, 9)]
+    return masks
+
+
+def merge_reports(reports):
+    """One report from per-shard reports: rows summed, samples tagged with their shard."""
+    merged, sources = {}, {}
+    for source, report in reports:
+        for check, entry in report.items():
+            total = merged.setdefault(check, {"rows": 0, "shards": 0, "samples": []})
+            total["rows"] += entry["rows"]
+            sources.setdefault(check, set()).add(source)
+            total["shards"] = len(sources[check])
+            room = SAMPLE_ROWS - len(total["samples"])
+            total["samples"] += [{"source": os.path.basename(source), **s} for s in entry["samples"][:room]]
+    return merged
+
+
+def format_report(report, rows_checked=None):
+    if not report:
+        return "Data quality: no issues found"
+    lines = ["Data quality:"]
+    for check, entry in sorted(report.items()):
+        share = f" ({entry['rows'] / rows_checked:.3%})" if rows_checked else ""
+        lines.append(f"  {check}: {entry['rows']} rows{share} in {entry['shards']} shard(s)")
+    return "\n".join(lines)
+
+
+# Run-level report: load paths record each shard they read, the pipelines write it out
+
+def start_report():
+    global _report
+    _report = []
+
+
+def record(source, report, rows=0):
+    """Add one shard's (or chunk's) checks and typed row count to the run report, if one is being collected."""
+    if _report is not None:
+        _report.append((source, report, rows + sum(report.get(c, {}).get("rows", 0) for c in DROPPED_CHECKS)))
+
+
+def take_report():
+    # Stop collecting and return the records (a worker process hands them to its parent)
+    global _report
+    records, _report = _report or [], None
+    return records
+
+
+def record_all(records):
+    for source, report, rows in records:
+        if _report is not None:
+            _report.append((source, report, rows))
+
+
+def finish_report(path):
+    """Write the run's quality report to path, print a summary and stop collecting."""
+    records = take_report()
+    merged = merge_reports([(source, report) for source, report, _ in records])
+    rows = sum(n for _, _, n in records)
+    summary = {"rows_read": rows, "checks": merged}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=4, default=str)
+    print(format_report(merged, rows))
+    return summary
+
+
+@contextlib.contextmanager
+def quality_report(path):
+    """Collect the checks of every shard loaded inside the block and write them to path."""
+    start_report()
+    try:
+        yield
+    except BaseException:
+        take_report()
+        raise
+    finish_report(path)
+
+
+# Persistent duplicate index per category
+
+def _read_index(state_dir):
+    manifest_path = os.path.join(state_dir, MANIFEST_FILE)
+    if not (os.path.exists(manifest_path) and os.path.exists(os.path.join(state_dir, HASHES_FILE))):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f).get("shards", {})
+
+
+def _write_index(state_dir, shards, seen):
+    os.makedirs(state_dir, exist_ok=True)
+    np.save(os.path.join(state_dir, HASHES_FILE), seen.to_array())
+    # Manifest goes last so an interrupted run never claims unsaved hashes
+    tmp_path = os.path.join(state_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"shards": shards}, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, os.path.join(state_dir, MANIFEST_FILE))
+
+
+class DuplicateIndex:
+    """Duplicate index of one category: hashes of every kept row and each shard's dropped positions.
+
+    paths is every shard of the category in load order and signatures their
+    file signatures. Shards the index has not seen are added in that order,
+    whole or a chunk at a time; save() persists the index under cache_dir.
+    """
+
+    def __init__(self, dir_path, paths, signatures, cache_dir=None):
+        self.state_dir = os.path.join(cache_dir, "dedup", os.path.basename(dir_path)) if cache_dir else None
+        self.shards = _read_index(self.state_dir) if self.state_dir else {}
+        self.current = {os.path.basename(p): (p, sig) for p, sig in zip(paths, signatures)}
+        # A rewritten or removed shard cannot be taken back out of the set, so start over
+        if any(name not in self.current or self.current[name][1] != entry["signature"]
+               for name, entry in self.shards.items()):
+            print(f"Shards changed in {dir_path}, rebuilding the duplicate index")
+            self.shards = {}
+        self.seen = None  # Loaded when the first new rows arrive
+        self.changed = False
+
+    def pending(self):
+        """Shards not in the index yet, in the order they have to be added."""
+        return [path for name, (path, _) in self.current.items() if name not in self.shards]
+
+    def is_pending(self, path):
+        return os.path.basename(path) not in self.shards
+
+    def drops(self, path):
+        return np.asarray(self.shards[os.path.basename(path)]["drop"], dtype=np.int64)
+
+    def add(self, path, hashes, offset=0):
+        """Add rows offset.. of a pending shard; returns the mask of those kept (not repeats)."""
+        if self.seen is None:
+            saved = self.state_dir and self.shards
+            self.seen = HashSet(np.load(os.path.join(self.state_dir, HASHES_FILE)) if saved else None)
+        name = os.path.basename(path)
+        entry = self.shards.setdefault(name, {"signature": self.current[name][1], "drop": []})
+        kept = self.seen.add(hashes)
+        entry["drop"] += (offset + np.flatnonzero(~kept)).tolist()
+        self.changed = True
+        return kept
+
+    def save(self):
+        if self.changed and self.state_dir:
+            _write_index(self.state_dir, self.shards, self.seen)
+        self.changed = False
+
+
+def duplicate_rows(dir_path, paths, signatures, hashes_for, cache_dir=None):
+    """{path: row positions to drop} for paths, where a row repeats one kept earlier.
+
+    hashes_for(path) gives a shard's row hashes; it is only called for shards
+    the persistent index (under cache_dir) has not seen.
+    """
+    index = DuplicateIndex(dir_path, paths, signatures, cache_dir)
+    for path in index.pending():
+        index.add(path, hashes_for(path))
+    index.save()
+    return {path: index.drops(path) for path in paths}
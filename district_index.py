@@ -0,0 +1,211 @@
+import os
+import re
+from collections import defaultdict
+import constants
+
+# Near-duplicate district names within each state, for the district audit.
+# Every name gets a match key (lowercase letters only), a set of character
+# bigrams and a phonetic key. Per state, an inverted bigram index plus phonetic
+# blocking produce the candidate pairs, so only names that already share most of
+# their bigrams or sound alike reach the (bounded) edit distance. Candidates are
+# ranked by similarity. An official name (one the normalization mapping
+# produces, or listed in DISTINCT_DISTRICTS) is the merge target; otherwise the
+# spelling with fewer rows is proposed to merge into the one with more. Pairs
+# of two different known districts are never proposed.
+# Proposals are keyed on the raw spellings, which is what renames look up.
+
+MIN_SIMILARITY = constants.MIN_SIMILARITY  # 1 - edit distance / longer key
+MIN_DICE = 0.5  # Bigram overlap needed to compare two names at all
+SOUND_ALIKE_SIMILARITY = 0.6  # Lower similarity accepted for names sharing a phonetic key
+# Names differing in one of these words are different districts (East/West Godavari)
+DISTINCT_TOKENS = {"north", "south", "east", "west", "central", "upper", "lower", "rural", "urban",
+                   "city", "new", "old", "i", "ii", "iii"}
+# Transliteration variants folded together by the phonetic key (longest first)
+PHONETIC_RULES = [("aa", "a"), ("ee", "i"), ("oo", "u"), ("ou", "u"), ("ph", "f"), ("sh", "s"),
+                  ("kh", "k"), ("gh", "g"), ("ch", "c"), ("jh", "j"), ("th", "t"), ("dh", "d"),
+                  ("bh", "b"), ("ck", "k"), ("q", "k"), ("w", "v"), ("z", "j"), ("y", "i")]
+
+
+def tokens(name):
+    return re.findall(r"[a-z]+", str(name).lower())
+
+
+def match_key(name):
+    return "".join(tokens(name))
+
+
+def bigrams(key):
+    padded = f"^{key}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def phonetic_key(key):
+    for old, new in PHONETIC_RULES:
+        key = key.replace(old, new)
+    if not key:
+        return key
+    # First letter, then consonants with repeats squeezed
+    skeleton = key[0] + re.sub(r"[aeiouh]", "", key[1:])
+    return re.sub(r"(.)\1+", r"\1", skeleton)
+
+
+def levenshtein(a, b, max_dist=None):
+    # Edit distance, or max_dist + 1 as soon as it must exceed max_dist
+    if len(a) < len(b):
+        a, b = b, a
+    if max_dist is not None and len(a) - len(b) > max_dist:
+        return max_dist + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if max_dist is not None and min(current) > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+def build_index(names):
+    """Inverted bigram and phonetic index over a list of names."""
+    keys = [match_key(n) for n in names]
+    grams = [bigrams(k) for k in keys]
+    postings, phonetic = defaultdict(list), defaultdict(list)
+    for i, (key, gram_set) in enumerate(zip(keys, grams)):
+        for gram in gram_set:
+            postings[gram].append(i)
+        phonetic[phonetic_key(key)].append(i)
+    return {"names": list(names), "keys": keys, "grams": grams, "postings": postings, "phonetic": phonetic}
+
+
+def similarity(a, b, min_similarity=MIN_SIMILARITY):
+    # Edit distance is only tracked as far as the lowest similarity search() can accept
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    max_dist = int(longest * (1 - min(min_similarity, SOUND_ALIKE_SIMILARITY)))
+    return 1 - levenshtein(a, b, max_dist) / longest
+
+
+def search(index, name, min_similarity=MIN_SIMILARITY):
+    """Indexed names similar to name, as (position, similarity, same_sound), best first."""
+    key = match_key(name)
+    gram_set = bigrams(key)
+    shared = defaultdict(int)
+    for gram in gram_set:
+        for j in index["postings"].get(gram, ()):
+            shared[j] += 1
+    candidates = {j for j, n in shared.items() if 2 * n / (len(gram_set) + len(index["grams"][j])) >= MIN_DICE}
+    sound = phonetic_key(key)
+    sound_alike = set(index["phonetic"].get(sound, ())) if sound else set()
+    matches = []
+    for j in candidates | sound_alike:
+        other = index["names"][j]
+        if other == name or set(tokens(other)) & DISTINCT_TOKENS != set(tokens(name)) & DISTINCT_TOKENS:
+            continue
+        score = similarity(key, index["keys"][j], min_similarity)
+        # A shared phonetic key vouches for a somewhat lower spelling similarity
+        if score >= min_similarity or (j in sound_alike and score >= min(min_similarity, SOUND_ALIKE_SIMILARITY)):
+            matches.append((j, round(score, 3), j in sound_alike))
+    return sorted(matches, key=lambda m: (-m[1], -m[2], index["names"][m[0]]))
+
+
+def known_districts():
+    """(official names, {name: the district it spells}) from the normalization tables."""
+    from normalization import DISTRICT_MAPPING, STATE_DISTRICT_RENAMES, DISTINCT_DISTRICTS
+
+    official = set(DISTRICT_MAPPING.values()) | set(STATE_DISTRICT_RENAMES.values())
+    identity = {name: name for name in official}
+    for spellings in DISTINCT_DISTRICTS:
+        official.add(spellings[0])
+        identity.update({spelling: spellings[0] for spelling in spellings})
+    return official, identity
+
+
+def merge_candidates(counts, min_similarity=MIN_SIMILARITY, spellings=None):
+    """Ranked merge proposals from {(state, district): rows}, compared within each state.
+
+    spellings maps a (state, district) to the {(state, raw district): rows}
+    that normalize to it; without it a name is its own only spelling.
+    """
+    official, identity = known_districts()
+    spellings = spellings or {}
+    by_state = defaultdict(dict)
+    for (state, district), n in counts.items():
+        by_state[state][district] = by_state[state].get(district, 0) + n
+    candidates = []
+    for state, districts in sorted(by_state.items()):
+        names = sorted(districts)
+        index = build_index(names)
+        for i, name in enumerate(names):
+            for j, score, same_sound in search(index, name, min_similarity):
+                if j <= i:
+                    continue  # Each pair once
+                other = names[j]
+                if name in identity and other in identity and identity[name] != identity[other]:
+                    continue  # Two real districts, however alike
+                # An official name is the target; otherwise the rarer spelling merges into the more common one
+                canonical, variant = sorted([name, other], key=lambda d: (d not in official, -districts[d], d))
+                raw = spellings.get((state, variant)) or {(state, variant): districts[variant]}
+                candidates.append({
+                    "state": state,
+                    "variant": variant,
+                    "canonical": canonical,
+                    "similarity": score,
+                    "same_sound": same_sound,
+                    "variant_rows": int(districts[variant]),
+                    "canonical_rows": int(districts[canonical]),
+                    "spellings": sorted(raw),
+                })
+    return sorted(candidates, key=lambda c: (-c["similarity"], -c["same_sound"], c["state"], c["variant"]))
+
+
+def district_counts(dir_paths):
+    """Rows per normalized (state, district) across the raw CSV shards, reading just those two columns.
+
+    Returns (counts, spellings): spellings maps each normalized (state, district)
+    to the {(state, titled raw district): rows} behind it, the keys
+    STATE_DISTRICT_RENAMES looks up.
+    """
+    from normalization import (UNKNOWN_STATE, GEOGRAPHIC_REASSIGNMENT, normalize_state,
+                               normalize_district)
+    from shard_cache import list_shards, read_csv
+
+    raw_counts = defaultdict(int)
+    for dir_path in dir_paths:
+        for path in list_shards(dir_path):
+            df = read_csv(path, usecols=['state', 'district'])
+            for key, n in df.groupby(['state', 'district'], observed=True, dropna=False).size().items():
+                raw_counts[key] += int(n)
+
+    # Normalized like normalize_locations, once per distinct raw pair
+    counts = defaultdict(int)
+    spellings = defaultdict(lambda: defaultdict(int))
+    for (raw_state, raw_district), n in raw_counts.items():
+        state = normalize_state(raw_state)
+        if state == UNKNOWN_STATE:
+            continue
+        titled = str(raw_district).strip().title()
+        district = normalize_district(titled, state)
+        key = (GEOGRAPHIC_REASSIGNMENT.get(district, state), district)
+        counts[key] += n
+        spellings[key][(state, titled)] += n
+    return counts, spellings
+
+
+def format_proposals(candidates):
+    # Entries for normalization.STATE_DISTRICT_RENAMES, to review before pasting in
+    lines = ["# Proposed STATE_DISTRICT_RENAMES entries (review before adding to normalization.py)"]
+    for c in candidates:
+        # One entry per raw spelling, since renames apply before the general mapping
+        for state, spelling in c["spellings"]:
+            lines.append(f"    ({state!r}, {spelling!r}): {c['canonical']!r},"
+                         f"  # similarity {c['similarity']}{', same sound' if c['same_sound'] else ''},"
+                         f" {c['variant_rows']} vs {c['canonical_rows']} rows")
+    return "\n".join(lines) + "\n"
+
+
+def write_proposals(path, candidates):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(format_proposals(candidates))
@@ -0,0 +1,154 @@
+import heapq
+import numpy as np
+import pandas as pd
+import constants
+
+# Greedy placement of new enrolment centers. Each pincode's unmet demand
+# (total_demand - supply_capacity, floored at zero) counts as covered once a
+# chosen site lies within RADIUS_KM of its centroid. Centroids come from a
+# local lookup file (pincode, latitude, longitude; e.g. the India Post pincode
+# directory, whose several offices per pincode are averaged). Points are
+# projected to kilometres at the cosine of the highest latitude, which never
+# stretches a distance, and bucketed into a uniform grid of radius-sized cells.
+# A site's candidates come from its 3x3 neighbouring cells and each pair is
+# confirmed by its great-circle distance.
+# Sites are then picked greedily by marginal covered demand. Gains only shrink
+# as pincodes get covered, so stale gains wait in a priority queue and are
+# recomputed only when they reach the top (lazy greedy).
+
+EARTH_RADIUS_KM = 6371.0
+GRID_SLACK = 1.01  # Cells a little wider than the radius absorb the projection's second-order error
+RADIUS_KM = constants.PLACEMENT_RADIUS_KM  # Distance a center serves
+SITES = constants.PLACEMENT_SITES  # Centers to place
+
+
+def load_centroids(path):
+    """One (latitude, longitude) per pincode from a lookup CSV, averaging repeated pincodes."""
+    df = pd.read_csv(path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    missing = {'pincode', 'latitude', 'longitude'} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path} needs columns pincode, latitude and longitude (missing {', '.join(sorted(missing))})")
+    df = df[['pincode', 'latitude', 'longitude']].apply(pd.to_numeric, errors='coerce').dropna()
+    df = df[df['latitude'].between(-90, 90) & df['longitude'].between(-180, 180)]
+    df['pincode'] = df['pincode'].astype(np.int64)
+    return df.groupby('pincode', sort=True)[['latitude', 'longitude']].mean().reset_index()
+
+
+def project(latitude, longitude, lat0):
+    # Equirectangular kilometres about reference latitude lat0
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    return EARTH_RADIUS_KM * lon * np.cos(np.radians(lat0)), EARTH_RADIUS_KM * lat
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def neighbour_pairs(latitude, longitude, radius):
+    """(site, point) index pairs within radius km along the great circle, grouped by site, via a uniform grid."""
+    latitude, longitude = np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)
+    n = len(latitude)
+    if not n:
+        return np.arange(0), np.arange(0)
+    # At the highest latitude's cosine projected distances only shrink, so the grid misses no pair
+    x, y = project(latitude, longitude, np.abs(latitude).max())
+    cell = radius * GRID_SLACK
+    cx = np.floor(x / cell).astype(np.int64)
+    cy = np.floor(y / cell).astype(np.int64)
+    cx, cy = cx - cx.min() + 1, cy - cy.min() + 1  # A margin cell on each side keeps neighbours from wrapping
+    width = cy.max() + 2
+    keys = cx * width + cy
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    sites, points = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            target = keys + dx * width + dy
+            lo = np.searchsorted(sorted_keys, target, 'left')
+            counts = np.searchsorted(sorted_keys, target, 'right') - lo
+            site = np.repeat(np.arange(n), counts)
+            # Position of every candidate within its site's run of sorted points
+            offsets = np.arange(len(site)) - np.repeat(np.cumsum(counts) - counts, counts)
+            point = order[lo[site] + offsets]
+            near = haversine_km(latitude[site], longitude[site], latitude[point], longitude[point]) <= radius
+            sites.append(site[near])
+            points.append(point[near])
+    sites, points = np.concatenate(sites), np.concatenate(points)
+    grouped = np.lexsort((points, sites))
+    return sites[grouped], points[grouped]
+
+
+def check_pairs(latitude, longitude, radius=RADIUS_KM):
+    """Whether neighbour_pairs finds exactly the pairs a full great-circle distance matrix does."""
+    latitude, longitude = np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float)
+    sites, points = neighbour_pairs(latitude, longitude, radius)
+    distances = haversine_km(latitude[:, None], longitude[:, None], latitude[None, :], longitude[None, :])
+    expected_sites, expected_points = np.nonzero(distances <= radius)
+    return np.array_equal(sites, expected_sites) and np.array_equal(points, expected_points)
+
+
+def lazy_greedy(indptr, members, weights, k):
+    """Pick up to k sites maximizing the total weight covered; [(site, gain, newly covered points)]."""
+    covered = np.zeros(len(weights), dtype=bool)
+    gains = np.add.reduceat(weights[members], indptr[:-1]) if len(members) else np.zeros(len(indptr) - 1)
+    gains[indptr[:-1] == indptr[1:]] = 0  # reduceat repeats the next value for empty runs
+    heap = [(-g, i) for i, g in enumerate(gains) if g > 0]
+    heapq.heapify(heap)
+    chosen = []
+    while heap and len(chosen) < k:
+        _, site = heapq.heappop(heap)
+        points = members[indptr[site]:indptr[site + 1]]
+        fresh = points[~covered[points]]
+        gain = weights[fresh].sum()
+        if gain <= 0:
+            continue
+        # A stale gain goes back in line unless it still beats everything else (ties by site order)
+        if heap and (-gain, site) > heap[0]:
+            heapq.heappush(heap, (-gain, site))
+            continue
+        covered[fresh] = True
+        chosen.append((site, gain, fresh))
+    return chosen
+
+
+def place_sites(summary, centroids, k=SITES, radius=RADIUS_KM):
+    """Choose up to k center sites among the summary's pincodes that cover the most unmet demand.
+
+    summary needs pincode, total_demand and supply_capacity (state and district
+    are carried over when present). Returns (sites, totals): one row per site,
+    best first, with the unmet demand and the pincodes it newly covers, and
+    coverage totals for the whole run.
+    """
+    located = summary.merge(centroids, on='pincode', how='inner', sort=False)
+    unmet = np.maximum(located['total_demand'].to_numpy(dtype=float)
+                       - located['supply_capacity'].to_numpy(dtype=float), 0)
+    sites, points = neighbour_pairs(located['latitude'].to_numpy(), located['longitude'].to_numpy(), radius)
+    # Only points with unmet demand matter for coverage
+    useful = unmet[points] > 0
+    sites, points = sites[useful], points[useful]
+    indptr = np.searchsorted(sites, np.arange(len(located) + 1))
+    chosen = lazy_greedy(indptr, points, unmet, k)
+
+    pincodes = located['pincode'].to_numpy()
+    labels = [c for c in ('state', 'district') if c in located.columns]
+    rows = []
+    for rank, (site, gain, fresh) in enumerate(chosen, 1):
+        row = {'rank': rank, 'pincode': int(pincodes[site])}
+        row.update({c: None if pd.isna(located[c].iat[site]) else located[c].iat[site] for c in labels})
+        row.update({
+            'latitude': round(float(located['latitude'].iat[site]), 5),
+            'longitude': round(float(located['longitude'].iat[site]), 5),
+            'covered_unmet_demand': round(float(gain), 1),
+            'covered_pincodes': sorted(int(p) for p in pincodes[fresh]),
+        })
+        rows.append(row)
+    return pd.DataFrame(rows), {
+        "pincodes_located": len(located),
+        "pincodes_missing": len(summary) - len(located),
+        "unmet_demand": round(float(unmet.sum()), 1),
+        "covered_unmet_demand": round(float(sum(g for _, g, _ in chosen)), 1),
+    }
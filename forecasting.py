@@ -0,0 +1,112 @@
+import numpy as np
+import constants
+
+# Demand forecasts for the gap analysis. Every pincode's (and every district's)
+# monthly total demand gets a damped-trend exponential smoothing model
+# (additive ETS(A,Ad,N)):
+#   level_t = level_t-1 + phi * trend_t-1 + alpha * error_t
+#   trend_t = phi * trend_t-1 + beta * error_t
+# All series are fitted at once: the recursion runs month by month over a
+# (series x parameter grid) array, and each series keeps the grid point with
+# the smallest one-step-ahead squared error. Forecasts are demand summed over
+# the next HORIZON months, with a normal prediction interval built from the
+# one-step residuals. A series starts at its first month with data; later
+# months without rows count as zero demand.
+
+HORIZON = constants.FORECAST_HORIZON  # Months ahead, summed into one forecast
+ALPHAS = [0.1, 0.3, 0.5, 0.7, 0.9]
+BETA_FRACTIONS = [0.05, 0.2, 0.5]  # beta as a fraction of alpha
+PHIS = [0.8, 0.9, 0.98]
+INTERVAL_Z = 1.2816  # 80% two-sided normal interval
+COLUMNS = ['forecast_demand', 'forecast_lower', 'forecast_upper',
+           'district_forecast_demand', 'district_forecast_lower', 'district_forecast_upper']
+
+
+def param_grid():
+    """(alpha, beta, phi) arrays over every combination of the grid values."""
+    alpha, fraction, phi = (g.ravel() for g in np.meshgrid(ALPHAS, BETA_FRACTIONS, PHIS, indexing='ij'))
+    return alpha, alpha * fraction, phi
+
+
+def first_observed(present):
+    # Index of each series' first month with data (the month count if it has none)
+    any_data = present.any(axis=1)
+    return np.where(any_data, present.argmax(axis=1), present.shape[1])
+
+
+def fit(demand, start):
+    """Fit every row of the (series x month) demand array over the parameter grid.
+
+    Returns a dict of per-series alpha, beta, phi, final level and trend, and
+    sigma (one-step residual standard deviation).
+    """
+    demand = np.asarray(demand, dtype=float)
+    n, months = demand.shape
+    alpha, beta, phi = param_grid()
+    observed = start < months
+    level = np.repeat(demand[np.arange(n), np.minimum(start, months - 1)][:, None], len(alpha), axis=1)
+    level[~observed] = 0
+    trend = np.zeros_like(level)
+    sse = np.zeros_like(level)
+    for t in range(1, months):
+        active = (t > start)[:, None]
+        predicted = level + phi * trend
+        error = np.where(active, demand[:, t:t + 1] - predicted, 0)
+        sse += error ** 2
+        level = np.where(active, predicted + alpha * error, level)
+        trend = np.where(active, phi * trend + beta * error, trend)
+
+    best = sse.argmin(axis=1)  # Ties keep the earliest (smoothest) grid point
+    rows = np.arange(n)
+    errors = np.maximum(months - 1 - start, 0)
+    level, trend = level[rows, best], trend[rows, best]
+    # Series with no one-step errors yet get their level as sigma (a 100% relative error)
+    sigma = np.where(errors > 0, np.sqrt(sse[rows, best] / np.maximum(errors, 1)), np.abs(level))
+    return {"alpha": alpha[best], "beta": beta[best], "phi": phi[best],
+            "level": level, "trend": trend, "sigma": sigma}
+
+
+def forecast(model, horizon=HORIZON, z=INTERVAL_Z):
+    """(point, lower, upper) of demand summed over the next horizon months, floored at zero."""
+    phi = model["phi"][:, None]
+    steps = np.arange(1, horizon + 1)[None, :]
+    damped = np.cumsum(phi ** steps, axis=1)  # phi + ... + phi^h
+    point = horizon * model["level"] + model["trend"] * damped.sum(axis=1)
+
+    # The h-step error is e_h + sum_j c_j e_(h-j), c_j = alpha + beta * (phi + ... + phi^j);
+    # summed over the horizon, shock i carries 1 + c_1 + ... + c_(horizon-i)
+    c = model["alpha"][:, None] + model["beta"][:, None] * damped[:, :horizon - 1]
+    carried = 1 + np.concatenate([np.zeros((len(phi), 1)), np.cumsum(c, axis=1)], axis=1)
+    spread = z * model["sigma"] * np.sqrt((carried ** 2).sum(axis=1))
+    return np.maximum(point, 0), np.maximum(point - spread, 0), np.maximum(point + spread, 0)
+
+
+def forecast_series(demand, present, horizon=HORIZON):
+    """Fit and forecast every row of a (series x month) demand array."""
+    return forecast(fit(demand, first_observed(present)), horizon)
+
+
+def add_forecasts(summary, demand, present, horizon=HORIZON):
+    """Add pincode and district demand forecasts (and 80% intervals) to the pincode summary.
+
+    demand and present are the (pincode x month) arrays behind summary, in the
+    same row order. District series are the sums of their pincodes' rows.
+    """
+    point, lower, upper = forecast_series(demand, present, horizon)
+    summary['forecast_demand'] = point
+    summary['forecast_lower'] = lower
+    summary['forecast_upper'] = upper
+
+    label_cols = [c for c in ('state', 'district') if c in summary.columns]
+    if label_cols:
+        codes = summary.groupby(label_cols, dropna=False, sort=False).ngroup().to_numpy()
+        n_groups = codes.max() + 1 if len(codes) else 0
+        district_demand = np.zeros((n_groups, demand.shape[1]))
+        np.add.at(district_demand, codes, demand)
+        district_present = np.zeros(district_demand.shape, dtype=bool)
+        np.logical_or.at(district_present, codes, present)
+        point, lower, upper = forecast_series(district_demand, district_present, horizon)
+        summary['district_forecast_demand'] = point[codes]
+        summary['district_forecast_lower'] = lower[codes]
+        summary['district_forecast_upper'] = upper[codes]
+    return summary
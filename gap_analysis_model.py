@@ -1,7 +1,20 @@
-import pandas as pd
 import os
+import argparse
 import json
-import numpy as np
+from normalization import normalize_locations
+from shard_cache import load_category, list_shards
+from incremental import load_partials
+from streaming import stream_partials, report_peak_rss
+from parallel import load_parallel
+from pincode_cube import pincode_summary as build_pincode_summary
+from ranking import top_k
+import gap_scoring
+import forecasting
+import facility_placement
+from hierarchy import canonical_frames
+from data_quality import quality_report
+from dashboard_export import EXPORT_FORMATS, COMPRESSIONS, export_gap_shards, to_records
+from profiling import PROFILERS, stage, rows, start_trace, finish_trace
 
 # Configuration
 BASE_DIR = r"e:\adhar hackathon"
@@ -11,252 +24,239 @@ DIRS = {
     "enrolment": "api_data_aadhar_enrolment"
 }
 OUTPUT_FILE = os.path.join(BASE_DIR, "dashboard", "src", "gap_data.json")
+TRACE_FILE = os.path.join(BASE_DIR, "output", "trace.jsonl")  # Stage timings, one JSON line per stage
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+DATA_DIR = os.path.join(BASE_DIR, "dashboard", "public", "data")
+TOP_PRIORITY_LOCATIONS = 500  # Rows kept in top_priority_locations
+SCENARIO_OUTPUT_FILE = os.path.join(BASE_DIR, "output", "gap_scenarios.json")
+CENTROIDS_FILE = os.path.join(BASE_DIR, "pincode_centroids.csv")  # pincode, latitude, longitude
+QUALITY_FILE = os.path.join(BASE_DIR, "output", "quality_report.json")  # Ingestion checks of the last load
 
 def normalize_data(df):
-    # Normalize State Names
-    def normalize_state(name):
-        if not isinstance(name, str) or name.isdigit(): return "Unknown"
-        name = name.strip().title()
-        name = name.replace(" & ", " And ")
-        mapping = {
-            "Andaman And Nicobar Islands": "Andaman And Nicobar Islands",
-            "Andaman & Nicobar Islands": "Andaman And Nicobar Islands",
-            "Orissa": "Odisha",
-            "West Bangal": "West Bengal",
-            "Westbengal": "West Bengal",
-            "West  Bengal": "West Bengal",
-            "West Bengal": "West Bengal",
-            "Pondicherry": "Puducherry",
-        }
-        if "Dadra" in name or "Daman" in name:
-            return "Dadra and Nagar Haveli and Daman and Diu"
-        if "Jammu" in name:
-            return "Jammu and Kashmir"
-        return mapping.get(name, name)
+    # Shared, vectorized state/district normalization
+    return normalize_locations(df)
 
-    df['state'] = df['state'].apply(normalize_state)
-    df = df[df['state'] != "Unknown"]
-
-    # Normalize District Names
-    def normalize_district(row):
-        name = str(row['district']).strip().title()
-        state = row['state']
-        
-        mapping = {
-            "Gurgaon": "Gurugram",
-            "Banglore": "Bengaluru",
-            "Bangalore": "Bengaluru",
-            "Bangalore Rural": "Bengaluru Rural",
-            "Bangalore Urban": "Bengaluru Urban",
-            "Mysore": "Mysuru",
-            "Belgaum": "Belagavi",
-            "Faizabad": "Ayodhya",
-            "Allahabad": "Prayagraj",
-            "Osmanabad": "Dharashiv",
-            "Shimoga": "Shivamogga",
-            "Mangalore": "Mangaluru",
-            "Bellary": "Ballari",
-            "Gulbarga": "Kalaburagi",
-            "Bijapur": "Vijayapura",
-            "Chikmagalur": "Chikkamagaluru",
-            "Tumkur": "Tumakuru",
-            "Hospet": "Hosapete",
-            "Hubli": "Hubballi",
-            "Dharwad": "Dharwad",
-            "Alappuzha": "Alleppey",
-            "Palakkad": "Palghat",
-            "Thrissur": "Trichur",
-            "Kozhikode": "Calicut",
-            "Kollam": "Quilon",
-            "Panjim": "Panaji",
-            "Cochin": "Kochi",
-            "Kochi": "Kochi",
-            "Trivandrum": "Thiruvananthapuram",
-            "Gauhati": "Guwahati",
-            "Benares": "Varanasi",
-            "Cawnpore": "Kanpur",
-            "Pondicherry": "Puducherry",
-            "Buldana": "Buldhana",
-            "Beed": "Bid",
-            "Firozabad": "Firozabad",
-            "Mughalsarai": "Pt. Deen Dayal Upadhyaya Nagar",
-            "Tirunelveli": "Nellai",
-            "Vizag": "Visakhapatnam",
-            "Waltair": "Visakhapatnam",
-            "Madras": "Chennai",
-            "Bombay": "Mumbai",
-            "Calcutta": "Kolkata",
-            "Poona": "Pune",
-            "Ahmadabad": "Ahmedabad",
-            "Ahmedabad": "Ahmedabad",
-            "Bulandshahr": "Bulandshahar",
-            "Chittoor": "Chittoor",
-            "Cuddapah": "YSR Kadapa",
-            "Kadapa": "YSR Kadapa",
-            "Oudh": "Awadh",
-            "Baroda": "Vadodara",
-            "Banaras": "Varanasi",
-            "Dharabadi": "Dharwad",
-            "Guntur": "Guntur",
-            "Kurnool": "Kurnool",
-            "Nellore": "SPSR Nellore",
-            "Vishakhapatnam": "Visakhapatnam",
-            "Haidarabad": "Hyderabad",
-        }
-        
-        if state == "Maharashtra" and name == "Aurangabad":
-            return "Chhatrapati Sambhajinagar"
-        
-        return mapping.get(name, name)
-
-    if 'district' in df.columns:
-        df['district'] = df.apply(normalize_district, axis=1)
-
-    # Force Correct States
-    geographic_reassignment = {
-        "Hyderabad": "Telangana",
-        "Cyberabad": "Telangana",
-        "Rangareddy": "Telangana",
-        "Warangal": "Telangana",
-        "Khammam": "Telangana",
-    }
-    
-    def reassign_state(row):
-        if 'district' in row and row['district'] in geographic_reassignment:
-            return geographic_reassignment[row['district']]
-        return row['state']
-    
-    df['state'] = df.apply(reassign_state, axis=1)
-    return df
-
-def load_and_aggregate(category):
+def load_and_aggregate(category, incremental=False, chunk_size=None, workers=None):
     dir_path = os.path.join(BASE_DIR, DIRS[category])
-    files = [f for f in os.listdir(dir_path) if f.endswith(".csv")]
-    dfs = []
     print(f"Loading {category} data...")
-    for f in files:
-        df = pd.read_csv(os.path.join(dir_path, f))
-        dfs.append(df)
-    
-    full_df = pd.concat(dfs, ignore_index=True)
-    full_df = normalize_data(full_df)
-    full_df['date'] = pd.to_datetime(full_df['date'], dayfirst=True)
-    
+    with stage(f"load:{category}") as record:
+        if incremental:
+            # Stored (pincode, state, district, month) partial sums, updated with new shards only
+            full_df = load_partials(dir_path, CACHE_DIR, chunk_size, workers)
+        elif chunk_size:
+            # Bounded-memory streaming of the same partial sums, chunk_size rows at a time
+            full_df = stream_partials(list_shards(dir_path), chunk_size, CACHE_DIR)
+        else:
+            # Typed, normalized frames come from the per-shard columnar cache
+            full_df = load_category(dir_path, CACHE_DIR)
+        record["rows_out"] = rows(full_df)
+    return aggregate_by_pincode(full_df, category)
+
+def load_and_aggregate_parallel(workers, chunk_size=None):
+    # All shards of all categories on one process pool, reduced to partial sums
+    print(f"Loading all categories on {workers} worker(s)...")
+    dir_paths = {category: os.path.join(BASE_DIR, d) for category, d in DIRS.items()}
+    with stage("load:parallel") as record:
+        partials = load_parallel(dir_paths, CACHE_DIR, workers, chunk_size)
+        record["rows_out"] = rows(partials)
+    return {category: aggregate_by_pincode(df, category) for category, df in partials.items()}
+
+def aggregate_by_pincode(full_df, category):
     # Identify numeric columns for aggregation
     numeric_cols = [c for c in full_df.columns if 'age' in c]
     
-    # Aggregation by Pincode and Month
-    full_df['month'] = full_df['date'].dt.to_period('M')
+    # Aggregation by Pincode and Month (month is a transient key, not a stored column)
+    month = full_df['date'].dt.to_period('M').rename('month')
     # Standardize columns for grouping
-    group_cols = ['pincode', 'state', 'month']
+    group_cols = ['pincode', 'state', month]
     if 'district' in full_df.columns:
         group_cols.append('district')
     
-    agg_pincode = full_df.groupby(group_cols)[numeric_cols].sum().reset_index()
-    agg_pincode['total_' + category] = agg_pincode[numeric_cols].sum(axis=1)
-    
-    return agg_pincode
+    with stage(f"groupby:{category}", len(full_df)) as record:
+        agg_pincode = full_df.groupby(group_cols, observed=True)[numeric_cols].sum().reset_index()
+        agg_pincode['total_' + category] = agg_pincode[numeric_cols].sum(axis=1)
+        record["rows_out"] = len(agg_pincode)
 
-def main():
-    try:
-        # Load all categories
-        enrol_agg = load_and_aggregate('enrolment')
-        bio_agg = load_and_aggregate('biometric')
-        demo_agg = load_and_aggregate('demographic')
+    return agg_pincode
 
-        # Merge data on Pincode, State, Month
-        merge_on = ['pincode', 'state', 'month']
-        # If district exists in all, add it
-        if 'district' in enrol_agg.columns and 'district' in bio_agg.columns and 'district' in demo_agg.columns:
-            merge_on.append('district')
+def load_scenarios(scenario_file=None, weight_samples=None):
+    # {"weights": [[ds, pd, gr, ad], ...], "supply": [{"low", "high", "floor"}, ...], "top_k": K}
+    spec = {}
+    if scenario_file:
+        with open(scenario_file) as f:
+            spec = json.load(f)
+    weights = [list(w) for w in spec.get("weights", [gap_scoring.WEIGHTS])]
+    if weight_samples:
+        weights += gap_scoring.sample_weights(weight_samples, spec.get("seed", gap_scoring.SEED)).tolist()
+    return weights, spec.get("supply"), spec.get("top_k", TOP_PRIORITY_LOCATIONS)
 
-        merged = pd.merge(enrol_agg, bio_agg[['pincode', 'month', 'total_biometric']], 
-                         on=['pincode', 'month'], how='outer')
-        merged = pd.merge(merged, demo_agg[['pincode', 'month', 'total_demographic']], 
-                         on=['pincode', 'month'], how='outer')
+def run_scenarios(pincode_summary, scenario_file=None, weight_samples=None):
+    weights, supplies, k = load_scenarios(scenario_file, weight_samples)
+    print(f"Evaluating {len(weights)} weightings x {len(supplies or [None])} supply scenarios...")
+    scenarios, top, stability = gap_scoring.evaluate(pincode_summary, weights, supplies, k)
+    output = {
+        "scenarios": scenarios.to_dict(orient='records'),
+        "top": top.groupby('scenario')['pincode'].apply(list).to_dict(),
+        "stability": stability[stability['top_k_share'] > 0].to_dict(orient='records'),
+    }
+    os.makedirs(os.path.dirname(SCENARIO_OUTPUT_FILE), exist_ok=True)
+    with open(SCENARIO_OUTPUT_FILE, 'w') as f:
+        json.dump(output, f, indent=4, default=str)
+    print(f"Scenario results for {len(scenarios)} scenarios written to {SCENARIO_OUTPUT_FILE}")
+    return len(scenarios)
 
-        merged.fillna(0, inplace=True)
-        merged['total_demand'] = merged.get('total_enrolment', 0) + merged.get('total_biometric', 0) + merged.get('total_demographic', 0)
+def run_placement(pincode_summary, centroids_file, sites, radius):
+    # Greedy center sites over unmet demand, or None when there are no centroids to place them with
+    if not os.path.exists(centroids_file):
+        print(f"No pincode centroids at {centroids_file}, skipping center placement")
+        return None
+    print(f"Placing up to {sites} centers ({radius} km radius)...")
+    chosen, totals = facility_placement.place_sites(pincode_summary, facility_placement.load_centroids(centroids_file),
+                                                    sites, radius)
+    print(f"{len(chosen)} sites cover {totals['covered_unmet_demand']} of {totals['unmet_demand']} unmet demand "
+          f"({totals['pincodes_missing']} pincodes have no centroid)")
+    return {"radius_km": radius, **totals, "sites": chosen}
 
-        # Aggregate to Pincode level (Total demand across all time)
-        group_by = ['pincode', 'state']
-        if 'district' in merged.columns:
-            group_by.append('district')
-            
-        pincode_summary = merged.groupby(group_by).agg({
-            'total_demand': 'sum'
-        }).reset_index()
+def main(incremental=False, chunk_size=None, report_rss=False, workers=None,
+         export_format="json", compress=None, trace=None, profile_stage=None, profiler="cprofile",
+         frames=None, scenario_file=None, weight_samples=None, canonical_locations=False,
+         forecast_horizon=forecasting.HORIZON, placement_sites=facility_placement.SITES,
+         placement_radius=facility_placement.RADIUS_KM, centroids_file=None):
+    if trace:
+        start_trace("gap_analysis_model", trace, profile_stage, profiler)
+    status = "ok"
+    try:
+        # Load all categories (or reuse frames another stage already loaded)
+        if frames is not None:
+            enrol_agg, bio_agg, demo_agg = [aggregate_by_pincode(frames[c], c)
+                                            for c in ('enrolment', 'biometric', 'demographic')]
+        else:
+            with quality_report(QUALITY_FILE):
+                if workers and not incremental:
+                    aggs = load_and_aggregate_parallel(workers, chunk_size)
+                    enrol_agg, bio_agg, demo_agg = aggs['enrolment'], aggs['biometric'], aggs['demographic']
+                else:
+                    enrol_agg = load_and_aggregate('enrolment', incremental, chunk_size, workers)
+                    bio_agg = load_and_aggregate('biometric', incremental, chunk_size, workers)
+                    demo_agg = load_and_aggregate('demographic', incremental, chunk_size, workers)
+        if canonical_locations:
+            # One (state, district) per pincode from the hierarchy index, instead of split rows
+            enrol_agg, bio_agg, demo_agg = canonical_frames(
+                {'enrolment': enrol_agg, 'biometric': bio_agg, 'demographic': demo_agg},
+                [os.path.join(BASE_DIR, d) for d in DIRS.values()], CACHE_DIR).values()
 
-        # Simulate missing metrics for the model
-        print("Simulating supply and access metrics...")
-        np.random.seed(42)
-        
-        # Monthly Growth Rate Calculation (averaging MoM changes)
-        merged_sorted = merged.sort_values(['pincode', 'month'])
-        merged_sorted['prev_demand'] = merged_sorted.groupby('pincode')['total_demand'].shift(1)
-        merged_sorted['growth'] = (merged_sorted['total_demand'] - merged_sorted['prev_demand']) / (merged_sorted['prev_demand'] + 1)
-        growth_rates = merged_sorted.groupby('pincode')['growth'].mean().fillna(0).reset_index()
-        
-        pincode_summary = pd.merge(pincode_summary, growth_rates, on='pincode', how='left')
+        # Dense (pincode x month x category) cube: demand, growth and labels per pincode
+        with stage("pincode_cube", len(enrol_agg) + len(bio_agg) + len(demo_agg)) as record:
+            pincode_summary, demand, present = build_pincode_summary({
+                'enrolment': enrol_agg,
+                'biometric': bio_agg,
+                'demographic': demo_agg,
+            }, with_demand=True)
+            record["rows_out"] = len(pincode_summary)
 
-        # Supply indicators (Simulated based on average demand)
-        pincode_summary['supply_capacity'] = pincode_summary['total_demand'] * np.random.uniform(0.6, 1.3, size=len(pincode_summary))
-        # Ensure some supply even if demand is 0
-        pincode_summary['supply_capacity'] = pincode_summary['supply_capacity'].apply(lambda x: max(x, 10))
+        if forecast_horizon:
+            with stage("forecast", len(pincode_summary)):
+                # Damped-trend smoothing of every pincode's and district's monthly demand, fitted in one batch
+                print(f"Forecasting demand {forecast_horizon} month(s) ahead...")
+                pincode_summary = forecasting.add_forecasts(pincode_summary, demand, present, forecast_horizon)
+                for col in forecasting.COLUMNS:
+                    pincode_summary[col] = pincode_summary[col].round(1)
 
-        # Population Density (Simulated 0.1 to 1.0)
-        pincode_summary['pop_density'] = np.random.uniform(0.1, 1.0, size=len(pincode_summary))
-        
-        # Access Difficulty (Simulated 0.1 to 1.0)
-        pincode_summary['access_difficulty'] = np.random.uniform(0.1, 1.0, size=len(pincode_summary))
+        with stage("scoring", len(pincode_summary)):
+            # Simulated supply, density and access metrics, then the weighted need score
+            print("Simulating supply and access metrics...")
+            pincode_summary = gap_scoring.score(pincode_summary)
 
-        # Calculate Scores
-        # Need Score = 0.35 * (Demand/Supply) + 0.25 * PopDensity + 0.20 * GrowthRate + 0.20 * AccessDifficulty
-        
-        # Normalize metrics to 0-1 for scoring
-        def normalize(series):
-            if series.max() == series.min(): return series * 0
-            return (series - series.min()) / (series.max() - series.min())
+            # Round values for display
+            pincode_summary['need_score'] = pincode_summary['need_score'].round(1)
+            pincode_summary['demand_supply_ratio'] = pincode_summary['demand_supply_ratio'].round(1)
 
-        pincode_summary['demand_supply_ratio'] = pincode_summary['total_demand'] / pincode_summary['supply_capacity']
-        
-        s_ds = normalize(pincode_summary['demand_supply_ratio'])
-        s_pd = normalize(pincode_summary['pop_density'])
-        s_gr = normalize(pincode_summary['growth'].clip(0, 1)) # Cap growth at 100% for scoring
-        s_ad = normalize(pincode_summary['access_difficulty'])
+        # Many weightings / supply assumptions at once, for planners comparing scenarios
+        if scenario_file or weight_samples:
+            with stage("scenarios", len(pincode_summary)) as record:
+                record["rows_out"] = run_scenarios(pincode_summary, scenario_file, weight_samples)
 
-        pincode_summary['need_score'] = (0.35 * s_ds + 
-                                       0.25 * s_pd + 
-                                       0.20 * s_gr + 
-                                       0.20 * s_ad) * 100
+        # New center sites covering the most unmet demand, so neighbouring pincodes share one center
+        placement = None
+        if placement_sites:
+            with stage("placement", len(pincode_summary)) as record:
+                placement = run_placement(pincode_summary, centroids_file or CENTROIDS_FILE,
+                                          placement_sites, placement_radius)
+                record["rows_out"] = len(placement["sites"]) if placement else 0
 
-        # Round values for display
-        pincode_summary['need_score'] = pincode_summary['need_score'].round(1)
-        pincode_summary['demand_supply_ratio'] = pincode_summary['demand_supply_ratio'].round(1)
         pincode_summary['growth'] = (pincode_summary['growth'] * 100).round(1)
 
-        # Sort and take top 500 for the dashboard
-        top_gaps = pincode_summary.sort_values(by='need_score', ascending=False).head(500)
+        # Top locations for the dashboard (ties in pincode order)
+        with stage("ranking", len(pincode_summary)) as record:
+            top_gaps = top_k(pincode_summary, 'need_score', TOP_PRIORITY_LOCATIONS)
+            record["rows_out"] = len(top_gaps)
 
-        # Prepare for JSON
-        result = top_gaps.to_dict(orient='records')
-        
-        # Add a date generated
-        from datetime import datetime
-        output_data = {
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "top_priority_locations": result
-        }
+        with stage("json_export", len(top_gaps)):
+            # Add a date generated
+            from datetime import datetime
+            output_data = {
+                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "top_priority_locations": top_gaps
+            }
+            if placement is not None:
+                output_data["placement"] = placement
 
-        with open(OUTPUT_FILE, 'w') as f:
-            json.dump(output_data, f, indent=4)
+            with open(OUTPUT_FILE, 'w') as f:
+                json.dump(to_records(output_data), f, indent=4)
+            # Index + per-state files the dashboard loads on demand
+            export_gap_shards(output_data, DATA_DIR, export_format, compress)
 
-        print(f"Gap analysis complete. {len(result)} locations exported to {OUTPUT_FILE}")
+        print(f"Gap analysis complete. {len(top_gaps)} locations exported to {OUTPUT_FILE}")
+        if report_rss:
+            report_peak_rss()
 
     except Exception as e:
+        # Report, then let the failure reach the caller (and the exit code)
+        status = f"error: {type(e).__name__}: {e}"
         print(f"Error in gap analysis: {e}")
-        import traceback
-        traceback.print_exc()
+        raise
+    finally:
+        if trace:
+            finish_trace(status)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="PIN-level service gap analysis")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fold newly arrived shards into the stored aggregates")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="stream shards in chunks of this many rows to bound memory")
+    parser.add_argument("--report-rss", action="store_true",
+                        help="print the peak resident memory of the run")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="load shards on a pool of this many processes")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default="json",
+                        help="dashboard file format: indented records or compact columnar")
+    parser.add_argument("--compress", choices=COMPRESSIONS, action="append",
+                        help="also write precompressed copies of the dashboard files (repeatable)")
+    parser.add_argument("--trace", default=TRACE_FILE,
+                        help="JSON lines file that receives per-stage timings")
+    parser.add_argument("--no-trace", action="store_true", help="do not record stage timings")
+    parser.add_argument("--profile-stage", default=None,
+                        help="capture a profile of this stage (e.g. normalize, pincode_cube)")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--canonical-locations", action="store_true",
+                        help="relabel rows with their pincode's majority state/district")
+    parser.add_argument("--scenarios", default=None,
+                        help="JSON file of weight vectors / supply assumptions to evaluate in one batch")
+    parser.add_argument("--weight-samples", type=int, default=None,
+                        help="also evaluate this many weightings sampled around the default")
+    parser.add_argument("--forecast-horizon", type=int, default=forecasting.HORIZON,
+                        help="months of demand to forecast per location (0 skips forecasting)")
+    parser.add_argument("--sites", type=int, default=facility_placement.SITES,
+                        help="new center sites to place over unmet demand (0 skips placement)")
+    parser.add_argument("--radius-km", type=float, default=facility_placement.RADIUS_KM,
+                        help="distance a center serves")
+    parser.add_argument("--centroids", default=CENTROIDS_FILE,
+                        help="CSV of pincode, latitude, longitude used to place centers")
+    args = parser.parse_args()
+    main(incremental=args.incremental, chunk_size=args.chunk_size, report_rss=args.report_rss,
+         workers=args.workers, export_format=args.export_format, compress=args.compress,
+         trace=None if args.no_trace else args.trace, profile_stage=args.profile_stage,
+         profiler=args.profiler, scenario_file=args.scenarios, weight_samples=args.weight_samples,
+         canonical_locations=args.canonical_locations, forecast_horizon=args.forecast_horizon,
+         placement_sites=args.sites, placement_radius=args.radius_km, centroids_file=args.centroids)
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+# Need scores for the gap analysis, for one weighting or for many at once.
+#   need = w_ds * demand/supply + w_pd * pop density + w_gr * growth + w_ad * access difficulty
+# with every factor min-max normalized to 0-1 and the total scaled to 0-100.
+# Supply, population density and access difficulty are simulated from one
+# seeded stream. Only the demand/supply factor depends on the supply
+# assumption, so W weight vectors x S supply scenarios is a single broadcast of
+# (W, 1, 1) weights against (S, N) and (N,) factors, done in blocks of weight
+# vectors to bound memory. Ranks use the rounded scores with ties in pincode
+# order, exactly like the dashboard's top list.
+
+FACTORS = ["demand_supply", "pop_density", "growth", "access_difficulty"]
+WEIGHTS = [0.35, 0.25, 0.20, 0.20]
+SUPPLY = {"low": 0.6, "high": 1.3, "floor": 10}  # Capacity = demand x U(low, high), at least floor
+SEED = 42
+TOP_K = 500
+BLOCK_CELLS = 4_000_000  # Scores held at once while evaluating scenarios
+
+
+def simulate_inputs(n, seed=SEED):
+    """Seeded per-pincode draws: supply multiplier base (0-1), population density, access difficulty."""
+    rng = np.random.RandomState(seed)
+    return {
+        "supply_draw": rng.random_sample(n),
+        "pop_density": rng.uniform(0.1, 1.0, size=n),
+        "access_difficulty": rng.uniform(0.1, 1.0, size=n),
+    }
+
+
+def supply_capacity(demand, draw, low=SUPPLY["low"], high=SUPPLY["high"], floor=SUPPLY["floor"]):
+    # Same arithmetic as np.random.uniform(low, high), so the default matches a direct draw
+    return np.maximum(demand * (low + (high - low) * draw), floor)
+
+
+def normalize(values):
+    # Min-max to 0-1 along the last axis; constant rows become 0
+    lo = np.nanmin(values, axis=-1, keepdims=True)
+    hi = np.nanmax(values, axis=-1, keepdims=True)
+    span = hi - lo
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(span == 0, values * 0, (values - lo) / span)
+
+
+def factors(summary, inputs, supplies):
+    """Normalized (S, N) demand/supply factor per supply scenario and the (3, N) scenario-free factors."""
+    demand = summary['total_demand'].to_numpy(dtype=float)
+    ratios = np.stack([demand / supply_capacity(demand, inputs["supply_draw"], **{**SUPPLY, **s})
+                       for s in supplies])
+    static = np.stack([
+        normalize(inputs["pop_density"]),
+        normalize(summary['growth'].clip(0, 1).to_numpy(dtype=float)),  # Cap growth at 100% for scoring
+        normalize(inputs["access_difficulty"]),
+    ])
+    return normalize(ratios), static
+
+
+def combine(weights, ds, static):
+    """(W, S, N) scores for (W, 4) weights; summed factor by factor, as in the single-score formula."""
+    w = np.asarray(weights, dtype=float)[:, :, None, None]
+    scores = w[:, 0] * ds[None]
+    for k in range(static.shape[0]):
+        scores = scores + w[:, k + 1] * static[k]
+    return scores * 100
+
+
+def score(summary, weights=WEIGHTS, supply=None, seed=SEED):
+    """Add simulated inputs, demand_supply_ratio and need_score columns for one scenario."""
+    inputs = simulate_inputs(len(summary), seed)
+    supply = {**SUPPLY, **(supply or {})}
+    demand = summary['total_demand'].to_numpy(dtype=float)
+    summary['supply_capacity'] = supply_capacity(demand, inputs["supply_draw"], **supply)
+    summary['pop_density'] = inputs["pop_density"]
+    summary['access_difficulty'] = inputs["access_difficulty"]
+    summary['demand_supply_ratio'] = summary['total_demand'] / summary['supply_capacity']
+    ds, static = factors(summary, inputs, [supply])
+    summary['need_score'] = combine([weights], ds, static)[0, 0]
+    return summary
+
+
+def sample_weights(n, seed=SEED, concentration=50.0):
+    """n weight vectors drawn around WEIGHTS (Dirichlet; higher concentration stays closer)."""
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(np.asarray(WEIGHTS) * concentration, size=n)
+
+
+def _ranks(scores):
+    # 0-based rank of every pincode in each row (rounded scores, ties in pincode order)
+    order = np.argsort(-np.round(scores, 1), axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :], axis=1)
+    return order, ranks
+
+
+def evaluate(summary, weights, supplies=None, k=TOP_K, seed=SEED):
+    """Score every weight vector x supply scenario and summarize how stable the rankings are.
+
+    weights is a (W, 4) array in FACTORS order and supplies a list of S dicts
+    overriding SUPPLY. Returns (scenarios, top, stability): one row per
+    scenario with its top-K overlap and rank correlation with the default
+    scenario, the top-K pincodes of each scenario, and per-pincode rank
+    statistics across all scenarios.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    if weights.shape[1] != len(FACTORS):
+        raise ValueError(f"weights need {len(FACTORS)} columns ({', '.join(FACTORS)}), got {weights.shape[1]}")
+    supplies = [{**SUPPLY, **s} for s in (supplies or [SUPPLY])]
+    n = len(summary)
+    k = min(k, n)
+    inputs = simulate_inputs(n, seed)
+    ds, static = factors(summary, inputs, supplies)
+
+    base_ds, _ = factors(summary, inputs, [SUPPLY])
+    base_order, base_ranks = _ranks(combine([WEIGHTS], base_ds, static)[0])
+    base_top = np.zeros(n, dtype=bool)
+    base_top[base_order[0, :k]] = True
+
+    n_scen = len(weights) * len(supplies)
+    top = np.empty((n_scen, k), dtype=np.int64)
+    overlap = np.empty(n_scen)
+    rank_corr = np.empty(n_scen)
+    rank_sum, rank_sq = np.zeros(n), np.zeros(n)
+    best, worst = np.full(n, n), np.zeros(n, dtype=np.int64)
+    top_count = np.zeros(n, dtype=np.int64)
+
+    block = max(1, BLOCK_CELLS // max(1, len(supplies) * n))
+    for lo in range(0, len(weights), block):
+        scores = combine(weights[lo:lo + block], ds, static).reshape(-1, n)
+        order, ranks = _ranks(scores)
+        rows = slice(lo * len(supplies), lo * len(supplies) + len(scores))
+        top[rows] = order[:, :k]
+        overlap[rows] = base_top[order[:, :k]].sum(axis=1) / k if k else 0
+        # Spearman correlation of the full ranking with the default scenario
+        d2 = ((ranks - base_ranks) ** 2).sum(axis=1)
+        rank_corr[rows] = 1 - 6 * d2 / (n * (n ** 2 - 1)) if n > 1 else 1.0
+        rank_sum += ranks.sum(axis=0)
+        rank_sq += (ranks.astype(float) ** 2).sum(axis=0)
+        best = np.minimum(best, ranks.min(axis=0))
+        worst = np.maximum(worst, ranks.max(axis=0))
+        top_count += np.bincount(order[:, :k].ravel(), minlength=n)
+
+    w_idx, s_idx = np.divmod(np.arange(n_scen), len(supplies))
+    scenarios = pd.DataFrame({'scenario': np.arange(n_scen), 'weights': w_idx, 'supply': s_idx})
+    for j, name in enumerate(FACTORS):
+        scenarios['w_' + name] = weights[w_idx, j]
+    for key in SUPPLY:
+        scenarios['supply_' + key] = [supplies[s][key] for s in s_idx]
+    scenarios['top_k_overlap'] = overlap.round(4)
+    scenarios['rank_corr'] = rank_corr.round(4)
+
+    pincodes = summary['pincode'].to_numpy()
+    top_frame = pd.DataFrame({
+        'scenario': np.repeat(np.arange(n_scen), k),
+        'rank': np.tile(np.arange(1, k + 1), n_scen),
+        'pincode': pincodes[top.ravel()],
+    })
+
+    mean = rank_sum / n_scen
+    label_cols = [c for c in ('pincode', 'state', 'district') if c in summary.columns]
+    stability = summary[label_cols].reset_index(drop=True)
+    stability['default_rank'] = base_ranks[0] + 1
+    stability['mean_rank'] = (mean + 1).round(1)
+    stability['rank_std'] = np.sqrt(np.maximum(rank_sq / n_scen - mean ** 2, 0)).round(1)
+    stability['best_rank'] = best + 1
+    stability['worst_rank'] = worst + 1
+    stability['top_k_share'] = (top_count / n_scen).round(4)
+    stability = stability.sort_values(['top_k_share', 'mean_rank'], ascending=[False, True], kind='stable')
+    return scenarios, top_frame, stability.reset_index(drop=True)
@@ -0,0 +1,182 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from shard_cache import list_shards, file_signature, read_shards
+from data_quality import PINCODE_RANGE
+from profiling import stage
+import constants
+
+# Pincode -> district -> state hierarchy learned from the data. Every shard
+# contributes its row counts per (pincode, state, district); the counts are kept
+# with a manifest of the shards already folded in, so new shards only add their
+# own counts (as in incremental.py). Each pincode's majority (state, district)
+# is laid out in direct-address arrays indexed by the integer pincode, so
+# canonicalizing a frame is an integer gather on categorical codes, with no
+# string work. Rows whose pincode the index has never seen, or that lies outside
+# the valid pincode range (which also bounds the arrays), keep their labels.
+
+MANIFEST_FILE = "manifest.json"
+COUNTS_FILE = "label_counts.pkl"
+KEYS = ['pincode', 'state', 'district']
+
+
+def shard_label_counts(df):
+    df = df[df['pincode'].notna()] if df['pincode'].dtype.kind == 'f' else df
+    counts = df.groupby(KEYS, observed=True).size().rename('rows').reset_index()
+    counts['pincode'] = counts['pincode'].astype(np.int64)
+    return counts
+
+
+def merge_label_counts(frames):
+    frames = [f for f in frames if f is not None and len(f)]
+    if not frames:
+        return pd.DataFrame({'pincode': pd.Series(dtype=np.int64), 'state': pd.Series(dtype=object),
+                             'district': pd.Series(dtype=object), 'rows': pd.Series(dtype=np.int64)})
+    merged = pd.concat([f.astype({'state': object, 'district': object}) for f in frames], ignore_index=True)
+    return merged.groupby(KEYS, sort=True)['rows'].sum().reset_index()
+
+
+def _read_state(state_dir):
+    manifest_path = os.path.join(state_dir, MANIFEST_FILE)
+    counts_path = os.path.join(state_dir, COUNTS_FILE)
+    if not (os.path.exists(manifest_path) and os.path.exists(counts_path)):
+        return {}, None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return manifest.get("shards", {}), pd.read_pickle(counts_path)
+
+
+def _write_state(state_dir, shards, counts):
+    os.makedirs(state_dir, exist_ok=True)
+    counts.to_pickle(os.path.join(state_dir, COUNTS_FILE))
+    # Manifest goes last so an interrupted run never claims unsaved shards
+    tmp_path = os.path.join(state_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"shards": shards}, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, os.path.join(state_dir, MANIFEST_FILE))
+
+
+def update_label_counts(dir_paths, cache_dir=None):
+    """(pincode, state, district) row counts over every shard, folding in only new shards when cached."""
+    current = {os.path.join(os.path.basename(d), os.path.basename(p)): p
+               for d in dir_paths for p in list_shards(d)}
+    state_dir = os.path.join(cache_dir, "hierarchy") if cache_dir else None
+    known, counts = _read_state(state_dir) if state_dir else ({}, None)
+    signatures = {name: file_signature(path) for name, path in current.items()}
+
+    # A rewritten or removed shard cannot be subtracted out, so start over
+    if any(name not in signatures or signatures[name] != sig for name, sig in known.items()):
+        print("Shards changed, rebuilding the pincode hierarchy")
+        known, counts = {}, None
+
+    new_shards = sorted(name for name in current if name not in known)
+    if new_shards:
+        print(f"Folding {len(new_shards)} shard(s) into the pincode hierarchy")
+        counts = merge_label_counts([counts] + [shard_label_counts(df) for df in
+                                                read_shards([current[n] for n in new_shards], cache_dir)])
+        known.update({name: signatures[name] for name in new_shards})
+        if state_dir:
+            _write_state(state_dir, known, counts)
+    return counts if counts is not None else merge_label_counts([])
+
+
+def build_index(counts):
+    """Direct-address majority labels per pincode, plus how many rows disagree with them."""
+    # Majority label first within each pincode; ties go to the alphabetically first label
+    ranked = counts.sort_values(['pincode', 'rows', 'state', 'district'],
+                                ascending=[True, False, True, True], kind='stable')
+    best = ranked.drop_duplicates('pincode')
+    best = best[best['pincode'].between(*PINCODE_RANGE)]
+    pincodes = best['pincode'].to_numpy(dtype=np.int64)
+    size = int(pincodes.max()) + 1 if len(pincodes) else 0
+    states = pd.Index(sorted(best['state'].unique()))
+    districts = pd.Index(sorted(best['district'].unique()))
+
+    state_codes = np.full(size, -1, dtype=np.int32)
+    district_codes = np.full(size, -1, dtype=np.int32)
+    state_codes[pincodes] = states.get_indexer(best['state'])
+    district_codes[pincodes] = districts.get_indexer(best['district'])
+
+    totals = counts.groupby('pincode')['rows'].agg(['sum', 'size'])
+    summary = best.set_index('pincode')[['state', 'district', 'rows']].rename(columns={'rows': 'majority_rows'})
+    summary['rows'] = totals['sum']
+    summary['labels'] = totals['size']
+    summary['conflicting_rows'] = summary['rows'] - summary['majority_rows']
+    return {
+        "states": states,
+        "districts": districts,
+        "state_codes": state_codes,
+        "district_codes": district_codes,
+        "summary": summary.reset_index(),
+        "counts": counts,
+    }
+
+
+def load_index(dir_paths, cache_dir=None):
+    with stage("hierarchy") as record:
+        index = build_index(update_label_counts(dir_paths, cache_dir))
+        record["rows_out"] = len(index["summary"])
+    return index
+
+
+def _remap(column, categories):
+    # Categorical codes of column re-expressed against categories (-1 stays missing)
+    mapping = np.append(categories.get_indexer(column.cat.categories), -1)
+    return mapping[column.cat.codes.to_numpy()]
+
+
+def canonicalize(df, index):
+    """df with state/district replaced by each pincode's majority labels (unseen pincodes unchanged)."""
+    size = len(index["state_codes"])
+    if not len(df) or not size or 'pincode' not in df.columns:
+        return df
+    pincode = pd.to_numeric(df['pincode'], errors='coerce').to_numpy(dtype=float)
+    valid = ~np.isnan(pincode) & (pincode >= 0) & (pincode < size)
+    rows = np.where(valid, pincode, 0).astype(np.int64)
+    known = valid & (index["state_codes"][rows] >= 0)
+
+    out = {}
+    for col, codes_key in (('state', "state_codes"), ('district', "district_codes")):
+        if col not in df.columns:
+            continue
+        own = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype('category')
+        categories = pd.Index(sorted(set(own.cat.categories) | set(index[col + "s"])))
+        lookup = np.append(categories.get_indexer(index[col + "s"]), -1)
+        codes = np.where(known, lookup[index[codes_key][rows]], _remap(own, categories))
+        out[col] = pd.Categorical.from_codes(codes, categories)
+    return df.assign(**out)
+
+
+def conflicts(index, top=None):
+    """Pincodes reported under more than one (state, district), most conflicting rows first."""
+    summary = index["summary"]
+    summary = summary[summary['labels'] > 1].sort_values(['conflicting_rows', 'pincode'],
+                                                         ascending=[False, True], kind='stable')
+    return summary if top is None else summary.head(top)
+
+
+def conflict_report(index, top=constants.CONFLICTS_SHOWN):
+    summary = index["summary"]
+    conflicted = conflicts(index)
+    total_rows = int(summary['rows'].sum())
+    moved = int(conflicted['conflicting_rows'].sum())
+    lines = [f"{len(summary)} pincodes, {len(conflicted)} reported under more than one (state, district); "
+             f"{moved} of {total_rows} rows ({moved / max(total_rows, 1):.2%}) disagree with their pincode's majority"]
+    counts = index["counts"].set_index('pincode')
+    for row in conflicted.head(top).itertuples(index=False):
+        others = counts.loc[[row.pincode]]
+        others = others[(others['state'] != row.state) | (others['district'] != row.district)]
+        alternatives = ", ".join(f"{r.district}, {r.state} ({r.rows})" for r in others.itertuples())
+        lines.append(f"  {row.pincode}: {row.district}, {row.state} ({row.majority_rows} rows) vs {alternatives}")
+    return "\n".join(lines)
+
+
+def canonical_frames(frames, dir_paths, cache_dir=None, report_top=5):
+    """Canonicalize {name: frame} against the (incrementally updated) hierarchy of dir_paths' shards."""
+    index = load_index(dir_paths, cache_dir)
+    print(conflict_report(index, report_top))
+    with stage("canonicalize") as record:
+        frames = {name: canonicalize(df, index) for name, df in frames.items()}
+        record["rows_out"] = sum(len(df) for df in frames.values())
+    return frames
@@ -0,0 +1,64 @@
+import os
+import json
+import pandas as pd
+from shard_cache import list_shards, file_signature, read_checked_shards, drop_duplicates
+from partials import aggregate_partials, merge_partials
+from streaming import stream_partials
+from parallel import parallel_partials
+
+# Incremental ingestion: each category keeps a manifest of the shards already
+# folded in plus their (pincode, state, district, month) partial sums. Only
+# shards missing from the manifest are read; their partials are merged into the
+# stored ones, so results match a full recompute.
+
+MANIFEST_FILE = "manifest.json"
+PARTIALS_FILE = "partials.pkl"
+
+
+def _read_state(state_dir):
+    manifest_path = os.path.join(state_dir, MANIFEST_FILE)
+    partials_path = os.path.join(state_dir, PARTIALS_FILE)
+    if not (os.path.exists(manifest_path) and os.path.exists(partials_path)):
+        return {}, None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return manifest.get("shards", {}), pd.read_pickle(partials_path)
+
+
+def _write_state(state_dir, shards, partials):
+    os.makedirs(state_dir, exist_ok=True)
+    partials.to_pickle(os.path.join(state_dir, PARTIALS_FILE))
+    # Manifest goes last so an interrupted run never claims unsaved shards
+    tmp_path = os.path.join(state_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump({"shards": shards}, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, os.path.join(state_dir, MANIFEST_FILE))
+
+
+def load_partials(dir_path, cache_dir, chunk_size=None, workers=None):
+    """Return the category's partial sums, folding in only newly arrived shards."""
+    state_dir = os.path.join(cache_dir, "incremental", os.path.basename(dir_path))
+    known, partials = _read_state(state_dir)
+    current = {os.path.basename(p): p for p in list_shards(dir_path)}
+    signatures = {name: file_signature(path) for name, path in current.items()}
+
+    # A rewritten or removed shard cannot be subtracted out, so start over
+    if any(name not in signatures or signatures[name] != sig for name, sig in known.items()):
+        print(f"Shards changed in {dir_path}, rebuilding partial aggregates")
+        known, partials = {}, None
+
+    new_shards = sorted(name for name in current if name not in known)
+    if new_shards:
+        print(f"Folding in {len(new_shards)} new shard(s) from {dir_path}")
+        paths = [current[name] for name in new_shards]
+        if workers:
+            new_partials = parallel_partials({dir_path: paths}, cache_dir, workers, chunk_size)[dir_path]
+        elif chunk_size:
+            new_partials = stream_partials(paths, chunk_size, cache_dir)
+        else:
+            shards = list(read_checked_shards(paths, cache_dir))
+            new_partials = merge_partials([aggregate_partials(df) for df in drop_duplicates(dir_path, shards, cache_dir)])
+        partials = merge_partials([partials, new_partials])
+        known.update({name: signatures[name] for name in new_shards})
+        _write_state(state_dir, known, partials)
+    return partials
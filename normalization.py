@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+# Shared state/district normalization for analyze_aadhaar and gap_analysis_model.
+# Names are resolved once per distinct (state, district) pair and mapped back to
+# every row with a single take, so cost grows with the number of distinct names.
+
+UNKNOWN_STATE = "Unknown"
+
+STATE_MAPPING = {
+    "Andaman And Nicobar Islands": "Andaman And Nicobar Islands",
+    "Andaman & Nicobar Islands": "Andaman And Nicobar Islands",
+    "Orissa": "Odisha",
+    "West Bangal": "West Bengal",
+    "Westbengal": "West Bengal",
+    "West  Bengal": "West Bengal",
+    "West Bengal": "West Bengal",
+    "Pondicherry": "Puducherry",
+}
+
+# General spelling fixes
+DISTRICT_MAPPING = {
+    "Gurgaon": "Gurugram",
+    "Banglore": "Bengaluru",
+    "Bangalore": "Bengaluru",
+    "Bangalore Rural": "Bengaluru Rural",
+    "Bangalore Urban": "Bengaluru Urban",
+    "Mysore": "Mysuru",
+    "Belgaum": "Belagavi",
+    "Faizabad": "Ayodhya",
+    "Allahabad": "Prayagraj",
+    "Osmanabad": "Dharashiv",
+    "Shimoga": "Shivamogga",
+    "Mangalore": "Mangaluru",
+    "Bellary": "Ballari",
+    "Gulbarga": "Kalaburagi",
+    "Bijapur": "Vijayapura",
+    "Chikmagalur": "Chikkamagaluru",
+    "Tumkur": "Tumakuru",
+    "Hospet": "Hosapete",
+    "Hubli": "Hubballi",
+    "Dharwad": "Dharwad",
+    "Alappuzha": "Alleppey",
+    "Palakkad": "Palghat",
+    "Thrissur": "Trichur",
+    "Kozhikode": "Calicut",
+    "Kollam": "Quilon",
+    "Panjim": "Panaji",
+    "Cochin": "Kochi",
+    "Kochi": "Kochi",
+    "Trivandrum": "Thiruvananthapuram",
+    "Gauhati": "Guwahati",
+    "Benares": "Varanasi",
+    "Cawnpore": "Kanpur",
+    "Pondicherry": "Puducherry",
+    "Buldana": "Buldhana",
+    "Beed": "Bid",
+    "Firozabad": "Firozabad",
+    "Mughalsarai": "Pt. Deen Dayal Upadhyaya Nagar",
+    "Tirunelveli": "Nellai",
+    "Vizag": "Visakhapatnam",
+    "Waltair": "Visakhapatnam",
+    "Madras": "Chennai",
+    "Bombay": "Mumbai",
+    "Calcutta": "Kolkata",
+    "Poona": "Pune",
+    "Ahmadabad": "Ahmedabad",
+    "Ahmedabad": "Ahmedabad",
+    "Bulandshahr": "Bulandshahar",
+    "Chittoor": "Chittoor",
+    "Cuddapah": "YSR Kadapa",
+    "Kadapa": "YSR Kadapa",
+    "Oudh": "Awadh",
+    "Baroda": "Vadodara",
+    "Banaras": "Varanasi",
+    "Dharabadi": "Dharwad",
+    "Guntur": "Guntur",
+    "Kurnool": "Kurnool",
+    "Nellore": "SPSR Nellore",
+    "Vishakhapatnam": "Visakhapatnam",
+    "Haidarabad": "Hyderabad",
+}
+
+# State-specific renames, applied before the general mapping
+STATE_DISTRICT_RENAMES = {
+    ("Maharashtra", "Aurangabad"): "Chhatrapati Sambhajinagar",
+}
+
+# Look-alike districts that are different places, each with the spellings the
+# data uses for it (official first); the district audit never merges two of them
+DISTINCT_DISTRICTS = [
+    ("Tiruvallur", "Thiruvallur"), ("Tiruvarur", "Thiruvarur"),  # Tamil Nadu
+    ("Rangareddy",), ("Sangareddy",),  # Telangana
+    ("Etah",), ("Etawah",),  # Uttar Pradesh
+]
+
+# Force correct states for specific districts (historical data/errors)
+GEOGRAPHIC_REASSIGNMENT = {
+    "Hyderabad": "Telangana",
+    "Cyberabad": "Telangana",
+    "Rangareddy": "Telangana",
+    "Warangal": "Telangana",
+    "Khammam": "Telangana",
+}
+
+
+def normalize_state(name):
+    if not isinstance(name, str) or name.isdigit(): return UNKNOWN_STATE
+    name = name.strip().title()
+    name = name.replace(" & ", " And ")
+    if "Dadra" in name or "Daman" in name:
+        return "Dadra and Nagar Haveli and Daman and Diu"
+    if "Jammu" in name:
+        return "Jammu and Kashmir"
+    return STATE_MAPPING.get(name, name)
+
+
+def normalize_district(name, state):
+    name = str(name).strip().title()
+    renamed = STATE_DISTRICT_RENAMES.get((state, name))
+    if renamed is not None:
+        return renamed
+    return DISTRICT_MAPPING.get(name, name)
+
+
+def normalize_locations(df):
+    """Normalize the state/district columns of df and drop rows with an unknown state."""
+    state_codes, raw_states = pd.factorize(df['state'], use_na_sentinel=False)
+    states = np.array([normalize_state(s) for s in raw_states], dtype=object)
+
+    if 'district' not in df.columns:
+        row_states = states[state_codes]
+        return df.assign(state=row_states)[row_states != UNKNOWN_STATE]
+
+    # Encode each row's (normalized state, raw district) as one integer key
+    norm_codes, norm_states = pd.factorize(states)
+    district_codes, raw_districts = pd.factorize(df['district'], use_na_sentinel=False)
+    n_districts = max(len(raw_districts), 1)
+    keys = norm_codes[state_codes].astype(np.int64) * n_districts + district_codes
+    pair_codes, pair_keys = pd.factorize(keys)
+
+    # Resolve each distinct pair once
+    pair_states = np.empty(len(pair_keys), dtype=object)
+    pair_districts = np.empty(len(pair_keys), dtype=object)
+    for i, key in enumerate(pair_keys):
+        state = norm_states[key // n_districts]
+        district = normalize_district(raw_districts[key % n_districts], state)
+        pair_states[i] = GEOGRAPHIC_REASSIGNMENT.get(district, state)
+        pair_districts[i] = district
+
+    # Unknown states are dropped before reassignment, as the pipelines always did
+    keep = (states != UNKNOWN_STATE)[state_codes]
+    return df.assign(state=pair_states[pair_codes], district=pair_districts[pair_codes])[keep]
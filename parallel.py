@@ -0,0 +1,74 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import data_quality
+from shard_cache import list_shards, read_checked_shard, cached_hashes, duplicate_positions, without_rows
+from partials import aggregate_partials, merge_partials, combine_partials
+from streaming import stream_chunk_partials
+
+# Process-pool load path: every shard of every category is parsed, normalized
+# and reduced to partial sums in a worker, then the parent tree-reduces the
+# partials per category. Reduction order is fixed by shard order and the merged
+# sums are regrouped, so the result does not depend on scheduling. The parent
+# checks the shards' row hashes against the duplicate index; the rare shard
+# that repeats earlier rows is aggregated again without them. Chunked workers
+# hand back the hashes of their chunks and are checked the same way.
+
+
+def shard_partials(csv_path, cache_dir=None, chunk_size=None, drop=None):
+    # (partials, row hashes unless cached, quality records) of one shard
+    data_quality.start_report()
+    if chunk_size:
+        hashes = []
+
+        def chunks():
+            for partial, chunk_hashes in stream_chunk_partials(csv_path, chunk_size, drop=drop):
+                hashes.append(chunk_hashes)
+                yield partial
+
+        partials = combine_partials(chunks(), max_pending_rows=chunk_size)
+        hashes = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint64)
+    else:
+        df, hashes, report = read_checked_shard(csv_path, cache_dir)
+        rows = len(df)
+        if drop is not None:
+            df, report = without_rows(df, drop, report)
+        data_quality.record(csv_path, report, rows)
+        partials = aggregate_partials(df)
+        # The parent reads cached hashes itself rather than receiving them through a pipe
+        hashes = None if cached_hashes(csv_path, cache_dir) is not None else hashes
+    return partials, hashes, data_quality.take_report()
+
+
+def tree_reduce(partials):
+    partials = list(partials)
+    while len(partials) > 1:
+        partials = [merge_partials(partials[i:i + 2]) for i in range(0, len(partials), 2)]
+    return partials[0] if partials else None
+
+
+def parallel_partials(shards, cache_dir=None, workers=None, chunk_size=None):
+    """Map {category: [csv paths]} to {category: partial sums} on one process pool."""
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {
+            category: [pool.submit(shard_partials, path, cache_dir, chunk_size) for path in paths]
+            for category, paths in shards.items()
+        }
+        results = {category: [f.result() for f in fs] for category, fs in futures.items()}
+        for category, paths in shards.items():
+            if not paths:
+                continue
+            hashes = {p: r[1] for p, r in zip(paths, results[category]) if r[1] is not None}
+            drops = duplicate_positions(os.path.dirname(paths[0]), hashes, cache_dir)
+            redo = {i: pool.submit(shard_partials, p, cache_dir, chunk_size, drops[p])
+                    for i, p in enumerate(paths) if len(drops[p])}
+            for i, future in redo.items():
+                results[category][i] = future.result()
+    for category_results in results.values():
+        for _, _, records in category_results:
+            data_quality.record_all(records)
+    return {category: tree_reduce(r[0] for r in rs) for category, rs in results.items()}
+
+
+def load_parallel(dir_paths, cache_dir=None, workers=None, chunk_size=None):
+    return parallel_partials({c: list_shards(p) for c, p in dir_paths.items()}, cache_dir, workers, chunk_size)
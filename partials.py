@@ -0,0 +1,38 @@
+from shard_cache import concat_shards
+
+# (pincode, state, district, month) partial sums shared by the incremental and
+# streaming load paths. Every aggregate the pipelines export (monthly, state,
+# district, pincode) is a sum over this grain, so partials can be merged in any
+# order and still match a full recompute.
+
+
+def partial_keys(df):
+    return [c for c in ('pincode', 'state', 'district') if c in df.columns] + ['date']
+
+
+def aggregate_partials(df):
+    # Month-start timestamps stay in 'date' so downstream to_period('M') is unchanged
+    df = df.assign(date=df['date'].dt.to_period('M').dt.to_timestamp())
+    count_cols = [c for c in df.columns if 'age' in c]
+    return df.groupby(partial_keys(df), observed=True, dropna=False)[count_cols].sum().reset_index()
+
+
+def merge_partials(frames):
+    frames = [f for f in frames if f is not None]
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    return aggregate_partials(concat_shards(frames))
+
+
+def combine_partials(partials, max_pending_rows):
+    # Fold an iterable of partials, merging whenever the buffer reaches max_pending_rows
+    combined, pending, pending_rows = None, [], 0
+    for partial in partials:
+        pending.append(partial)
+        pending_rows += len(partial)
+        if pending_rows >= max_pending_rows:
+            combined = merge_partials([combined] + pending)
+            pending, pending_rows = [], 0
+    return merge_partials([combined] + pending)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+MAX_TABLE_SPAN = 1_000_000  # Widest pincode range given a direct-address table (Indian pincodes span ~750k)
+
+# Dense (pincode x month x category) demand cube for gap_analysis_model.
+# Integer pincodes index rows through a direct-address table over their range
+# (a sort-based np.unique when corrupt values make the range negative or too
+# wide for a table), months index columns by their offset from the first month, and every category's totals are
+# scattered into the cube with a single bincount. Demand, growth and the
+# per-pincode summary are then plain array reductions: no merges, no sorts.
+
+
+def build_cube(aggs):
+    """Scatter {category: frame with pincode, month, total_<category>} into a dense cube.
+
+    Returns (pincodes, months, cube, present) where cube has shape
+    (pincodes, months, categories) and present marks the (pincode, month) cells
+    that had at least one row in any category.
+    """
+    pins, ordinals, cats, values = [], [], [], []
+    for k, category in enumerate(aggs):
+        agg = aggs[category]
+        pincode = pd.to_numeric(agg['pincode'], errors='coerce').to_numpy(dtype=float)
+        valid = ~np.isnan(pincode)
+        pins.append(pincode[valid].astype(np.int64))
+        ordinals.append(agg['month'].array.asi8[valid])
+        values.append(agg['total_' + category].to_numpy(dtype=float)[valid])
+        cats.append(np.full(valid.sum(), k))
+    pins, ordinals = np.concatenate(pins), np.concatenate(ordinals)
+    cats, values = np.concatenate(cats), np.concatenate(values)
+
+    # Dense pincode index: a presence table over the pincode range, no sort needed
+    low = pins.min() if len(pins) else 0
+    span = pins.max() - low + 1 if len(pins) else 1
+    if low < 0 or span > MAX_TABLE_SPAN:
+        pincodes, rows = np.unique(pins, return_inverse=True)
+    else:
+        seen = np.zeros(span, dtype=bool)
+        seen[pins - low] = True
+        pincodes = np.flatnonzero(seen) + low
+        row_of = np.full(span, -1, dtype=np.int64)
+        row_of[pincodes - low] = np.arange(len(pincodes))
+        rows = row_of[pins - low]
+
+    # Month axis: offsets from the earliest Period ordinal
+    first = ordinals.min() if len(ordinals) else 0
+    last = ordinals.max() if len(ordinals) else -1
+    n_pin, n_month, n_cat = len(pincodes), int(last - first + 1), len(aggs)
+    months = pd.period_range(pd.Period(ordinal=first, freq='M'), periods=n_month, freq='M')
+    offsets = ordinals - first
+
+    cells = rows * n_month + offsets
+    cube = np.bincount(cells * n_cat + cats, weights=values, minlength=n_pin * n_month * n_cat)
+    present = np.bincount(cells, minlength=n_pin * n_month) > 0
+    return pincodes, months, cube.reshape(n_pin, n_month, n_cat), present.reshape(n_pin, n_month)
+
+
+def mean_growth(demand, present):
+    # Month-over-month growth averaged over consecutive months with data,
+    # matching the previous sort + groupby shift over the merged rows
+    rows, cols = np.nonzero(present)  # row-major, so months ascend within each pincode
+    values = demand[rows, cols]
+    same = rows[1:] == rows[:-1]
+    growth = (values[1:] - values[:-1]) / (values[:-1] + 1)
+    n = demand.shape[0]
+    sums = np.bincount(rows[1:][same], weights=growth[same], minlength=n)
+    counts = np.bincount(rows[1:][same], minlength=n)
+    return np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+
+
+def pincode_labels(aggs, pincodes):
+    # The (state, district) carrying the most demand for each pincode
+    label_cols = [c for c in ('state', 'district') if all(c in agg.columns for agg in aggs.values())]
+    labels = pd.concat(
+        [agg[['pincode'] + label_cols + ['total_' + category]].rename(columns={'total_' + category: 'total'})
+         for category, agg in aggs.items()],
+        ignore_index=True,
+    )
+    weights = labels.groupby(['pincode'] + label_cols, observed=True)['total'].sum()
+    best = weights.loc[weights.groupby(level='pincode').idxmax()].reset_index()
+    best = best.set_index('pincode').reindex(pincodes)
+    return {col: best[col].to_numpy() for col in label_cols}
+
+
+def pincode_summary(aggs, with_demand=False):
+    """Per-pincode labels, total demand and mean MoM growth from the category aggregates.
+
+    with_demand also returns the (pincode x month) demand and presence arrays
+    behind the summary, in its row order.
+    """
+    pincodes, months, cube, present = build_cube(aggs)
+    demand = cube.sum(axis=2)
+    summary = pd.DataFrame({'pincode': pincodes, **pincode_labels(aggs, pincodes)})
+    summary['total_demand'] = demand.sum(axis=1)
+    summary['growth'] = mean_growth(demand, present)
+    return (summary, demand, present) if with_demand else summary
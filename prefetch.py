@@ -0,0 +1,78 @@
+import gzip
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from profiling import stage
+
+# Read-ahead for shard files. While the parser works on one shard, up to DEPTH
+# later shards are read (and decompressed) on background threads, so disk or
+# network latency overlaps with parsing and a load costs about max(I/O, parse)
+# instead of their sum. Buffers are handed over in path order and at most
+# DEPTH of them are held besides the one being parsed. .csv.gz and .csv.zst
+# shards are decompressed on the reader threads.
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .csv.zst shards
+    zstandard = None
+
+DEPTH = 4  # Shards read ahead of the parser
+SHARD_SUFFIXES = (".csv", ".csv.gz", ".csv.zst")
+
+
+def shard_stem(path):
+    # File name without the .csv(.gz|.zst) suffix
+    name = path.replace("\\", "/").rsplit("/", 1)[-1]
+    for suffix in sorted(SHARD_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def decompress(data, path):
+    if path.endswith(".gz"):
+        return gzip.decompress(data)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError(f"{path} is zstd-compressed; install the zstandard package to read it")
+        # decompressobj also handles frames written without a content size
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def read_bytes(path):
+    """Raw (decompressed) contents of a shard file."""
+    with open(path, 'rb') as f:
+        return decompress(f.read(), path)
+
+
+def prefetch(paths, depth=DEPTH, wanted=None):
+    """Yield (path, bytes) in path order, reading up to depth shards ahead on threads.
+
+    Paths for which wanted(path) is false are not read and come back with None.
+    """
+    paths = iter(paths)
+    if depth < 1:
+        for path in paths:
+            yield path, read_bytes(path) if wanted is None or wanted(path) else None
+        return
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="prefetch") as pool:
+        pending = deque()
+
+        def submit():
+            path = next(paths, None)
+            if path is not None:
+                read = wanted is None or wanted(path)
+                pending.append((path, pool.submit(read_bytes, path) if read else None))
+
+        for _ in range(depth):
+            submit()
+        while pending:
+            path, future = pending.popleft()
+            submit()
+            if future is None:
+                yield path, None
+                continue
+            # Time spent here is I/O the read-ahead could not hide
+            with stage("prefetch_wait"):
+                data = future.result()
+            yield path, data
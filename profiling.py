@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import contextlib
+from datetime import datetime
+import constants
+
+# Stage-level instrumentation for the pipelines. Code wraps its steps in
+# `with stage("name") as record:` and may set record["rows_in"] / ["rows_out"].
+# While a trace is active each finished stage appends one JSON line with wall
+# time, CPU time, rows and peak RSS to the trace file; otherwise stage() costs
+# next to nothing. One chosen stage can also be captured with cProfile or
+# pyinstrument, accumulated over every time it runs.
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyinstrument
+except ImportError:  # Only needed for --profiler pyinstrument
+    pyinstrument = None
+
+PROFILERS = constants.PROFILERS
+STATUS_FILE = "/proc/self/status"
+CLEAR_REFS_FILE = "/proc/self/clear_refs"
+
+_trace = None
+_process_peak = 0  # Highest peak seen before a reset; resetting VmHWM also lowers ru_maxrss
+
+
+def _rusage_peak():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return getattr(psutil.Process().memory_info(), "peak_wset", None)
+
+
+def peak_rss_bytes():
+    # Peak resident set size of this process over its whole run, or None if the platform can't say
+    peak = _rusage_peak()
+    if peak is None:
+        return None
+    return max(peak, _process_peak)
+
+
+def _read_hwm():
+    # Linux keeps a resettable high-water mark (VmHWM) per process
+    try:
+        with open(STATUS_FILE) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_hwm():
+    # Keep the peak so far before the kernel forgets it
+    global _process_peak
+    _process_peak = max(_process_peak, _rusage_peak() or 0, _read_hwm() or 0)
+    try:
+        with open(CLEAR_REFS_FILE, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory():
+    # Peak RSS since the last reset, or the process peak where it can't be reset
+    peak = _read_hwm() if _trace and _trace["resettable"] else None
+    if peak is None:
+        peak = _rusage_peak()
+    return peak
+
+
+def rows(obj):
+    # Row count of a frame (or dict of frames), None for anything else
+    if isinstance(obj, dict):
+        counts = [rows(v) for v in obj.values()]
+        return sum(counts) if counts and None not in counts else None
+    return len(obj) if hasattr(obj, "__len__") and hasattr(obj, "columns") else None
+
+
+def start_trace(pipeline, path, profile_stage=None, profiler="cprofile"):
+    """Start recording stages of `pipeline` to the JSON lines file at path."""
+    global _trace
+    if profiler == "pyinstrument" and profile_stage and pyinstrument is None:
+        raise ImportError("pyinstrument profiling requested but pyinstrument is not installed")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    _trace = {
+        "pipeline": pipeline,
+        "run": datetime.now().strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}",
+        "pid": os.getpid(),
+        "path": path,
+        "file": open(path, "a"),
+        "stack": [],
+        "resettable": _reset_hwm() and _read_hwm() is not None,
+        "profile_stage": profile_stage,
+        "profiler": profiler,
+        "profile": None,
+        "profiling": False,
+        "started": (time.perf_counter(), time.process_time()),
+    }
+
+
+def _emit(record):
+    _trace["file"].write(json.dumps(record) + "\n")
+    _trace["file"].flush()
+
+
+def _active():
+    # Worker processes inherit the trace on fork but only the parent records
+    return _trace is not None and _trace["pid"] == os.getpid()
+
+
+def _start_profile():
+    if _trace["profile"] is None:
+        if _trace["profiler"] == "pyinstrument":
+            _trace["profile"] = pyinstrument.Profiler()
+        else:
+            _trace["profile"] = cProfile.Profile()
+    profile = _trace["profile"]
+    if _trace["profiler"] == "pyinstrument":
+        profile.start()
+    else:
+        profile.enable()
+
+
+def _stop_profile():
+    profile = _trace["profile"]
+    if _trace["profiler"] == "pyinstrument":
+        profile.stop()
+    else:
+        profile.disable()
+
+
+@contextlib.contextmanager
+def stage(name, rows_in=None):
+    if not _active():
+        yield {}
+        return
+    record = {"rows_in": rows_in, "rows_out": None}
+    stack = _trace["stack"]
+    child_peak = [0]
+    stack.append(child_peak)
+    # A stage nested in itself is profiled once, by the outermost call
+    profiled = name == _trace["profile_stage"] and not _trace["profiling"]
+    if profiled:
+        _trace["profiling"] = True
+        _start_profile()
+    if _trace["resettable"]:
+        _reset_hwm()
+    wall, cpu = time.perf_counter(), time.process_time()
+    status = "ok"
+    try:
+        yield record
+    except BaseException as e:
+        status = f"error: {type(e).__name__}: {e}"
+        raise
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if profiled:
+            _stop_profile()
+            _trace["profiling"] = False
+        stack.pop()
+        # A nested stage resets the high-water mark, so carry its peak up
+        peak = max(peak_memory() or 0, child_peak[0])
+        if stack:
+            stack[-1][0] = max(stack[-1][0], peak)
+        _emit({
+            "run": _trace["run"],
+            "pipeline": _trace["pipeline"],
+            "stage": name,
+            "depth": len(stack),
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "rows_in": record.get("rows_in"),
+            "rows_out": record.get("rows_out"),
+            "peak_rss_mb": round(peak / (1024 * 1024), 1) if peak else None,
+            "status": status,
+        })
+
+
+def finish_trace(status="ok"):
+    """Write the run's total record (and the stage profile, if any) and stop tracing."""
+    global _trace
+    if not _active():
+        return
+    wall, cpu = _trace["started"]
+    peak = peak_rss_bytes()  # Whole-process peak
+    _emit({
+        "run": _trace["run"],
+        "pipeline": _trace["pipeline"],
+        "stage": "total",
+        "depth": 0,
+        "wall_s": round(time.perf_counter() - wall, 4),
+        "cpu_s": round(time.process_time() - cpu, 4),
+        "rows_in": None,
+        "rows_out": None,
+        "peak_rss_mb": round(peak / (1024 * 1024), 1) if peak else None,
+        "status": status,
+    })
+    profile = _trace["profile"]
+    if profile is not None:
+        base = os.path.join(os.path.dirname(os.path.abspath(_trace["path"])),
+                            f"profile_{_trace['pipeline']}_{_trace['profile_stage']}")
+        if _trace["profiler"] == "pyinstrument":
+            with open(base + ".html", "w") as f:
+                f.write(profile.output_html())
+            print(f"Profile of stage '{_trace['profile_stage']}' written to {base}.html")
+        else:
+            profile.dump_stats(base + ".prof")
+            print(f"Profile of stage '{_trace['profile_stage']}' written to {base}.prof")
+    _trace["file"].close()
+    _trace = None
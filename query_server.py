@@ -0,0 +1,313 @@
+import json
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+import analyze_aadhaar
+import gap_analysis_model
+import gap_scoring
+import forecasting
+from pincode_cube import pincode_summary
+from ranking import top_k_positions
+import constants
+
+# Local query API for the dashboard. The (pincode, state, district, month)
+# partials of every category are loaded once (by default from the incremental
+# store, so only new shards are read) and scattered into a dense
+# (series x month x column) array per category. State, district and pincode
+# lookups map straight to row indexes, so a query is a row gather plus a sum
+# over a month slice. Gap need scores are computed once from the same data.
+# Responses are kept in an LRU cache keyed by the normalized query and carry an
+# ETag; a matching If-None-Match gets a 304.
+#
+#   GET /api/meta                        categories, columns, months, states
+#   GET /api/districts?state=            districts (and pincodes) of a state
+#   GET /api/trend?category=&state=&district=&pincode=&from=&to=
+#   GET /api/breakdown?category=&by=state|district|pincode&state=&district=&from=&to=&limit=
+#   GET /api/gap?state=&district=&limit=
+
+HOST = constants.QUERY_HOST
+PORT = constants.QUERY_PORT
+CACHE_SIZE = constants.QUERY_CACHE_SIZE  # Responses kept in the LRU cache
+DEFAULT_LIMIT = 500
+KEYS = ['state', 'district', 'pincode']
+
+
+def build_cube(df):
+    """Dense (series x month x column) sums of df with row lookups by state, district and pincode."""
+    count_cols = [c for c in df.columns if 'age' in c]
+    grouped = df.groupby(KEYS, observed=True, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index.to_frame(index=False)
+    index['state'] = index['state'].astype(str)
+    index['district'] = index['district'].astype(str)
+    ordinals = df['date'].dt.to_period('M').array.asi8
+    first, last = (ordinals.min(), ordinals.max()) if len(ordinals) else (0, -1)
+    n_rows, n_months, n_cols = len(index), int(last - first + 1), len(count_cols)
+    cells = (codes * n_months + (ordinals - first)) * n_cols
+    values = np.zeros(n_rows * n_months * n_cols)
+    for k, col in enumerate(count_cols):
+        values += np.bincount(cells + k, weights=df[col].to_numpy(dtype=float), minlength=len(values))
+
+    def lookup(keys):
+        by = index[keys[0]] if len(keys) == 1 else [index[k] for k in keys]
+        return {key: rows.to_numpy() for key, rows in pd.Series(np.arange(n_rows)).groupby(by).groups.items()}
+
+    return {
+        "index": index,
+        "columns": count_cols,
+        "months": pd.period_range(pd.Period(ordinal=first, freq='M'), periods=n_months, freq='M'),
+        "values": values.reshape(n_rows, n_months, n_cols),
+        "rows": {"state": lookup(['state']), "district": lookup(['state', 'district']),
+                 "pincode": lookup(['pincode'])},
+    }
+
+
+def build_gap(frames):
+    # Same scoring (and rounding) as gap_analysis_model.main, for every pincode
+    aggs = {c: gap_analysis_model.aggregate_by_pincode(frames[c], c)
+            for c in ('enrolment', 'biometric', 'demographic')}
+    summary, demand, present = pincode_summary(aggs, with_demand=True)
+    summary = forecasting.add_forecasts(summary, demand, present)
+    for col in forecasting.COLUMNS:
+        summary[col] = summary[col].round(1)
+    scores = gap_scoring.score(summary)
+    scores['need_score'] = scores['need_score'].round(1)
+    scores['demand_supply_ratio'] = scores['demand_supply_ratio'].round(1)
+    scores['growth'] = (scores['growth'] * 100).round(1)
+    return scores
+
+
+def load_store(incremental=True, chunk_size=None, workers=None):
+    """Load every category once and build the cubes and gap scores the queries read."""
+    frames = analyze_aadhaar.load_all(incremental, chunk_size, workers)
+    cubes = {category: build_cube(df) for category, df in frames.items()}
+    return {"cubes": cubes, "gap": build_gap(frames)}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def _int(params, name, default):
+    value = _one(params, name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        raise QueryError(f"'{name}' must be an integer")
+
+
+def _cube(store, params):
+    category = _one(params, 'category', 'enrolment')
+    if category not in store["cubes"]:
+        raise QueryError(f"unknown category '{category}' (one of {', '.join(store['cubes'])})")
+    return store["cubes"][category]
+
+
+def _select_rows(cube, params):
+    # Row indexes matching the state / district / pincode filters (all rows if none)
+    state, district, pincode = _one(params, 'state'), _one(params, 'district'), _one(params, 'pincode')
+    rows = None
+    if pincode is not None:
+        rows = cube["rows"]["pincode"].get(_int(params, 'pincode', None), np.arange(0))
+    if district is not None:
+        if state is None:
+            raise QueryError("'district' needs 'state'")
+        by_district = cube["rows"]["district"].get((state, district), np.arange(0))
+        rows = by_district if rows is None else np.intersect1d(rows, by_district)
+    elif state is not None:
+        by_state = cube["rows"]["state"].get(state, np.arange(0))
+        rows = by_state if rows is None else np.intersect1d(rows, by_state)
+    return rows
+
+
+def _month_slice(cube, params):
+    months = cube["months"]
+    try:
+        start = pd.Period(_one(params, 'from'), freq='M') if _one(params, 'from') else None
+        end = pd.Period(_one(params, 'to'), freq='M') if _one(params, 'to') else None
+    except ValueError:
+        raise QueryError("'from' and 'to' must be months like 2025-03")
+    first = months[0].ordinal if len(months) else 0
+    lo = 0 if start is None else min(max(start.ordinal - first, 0), len(months))
+    hi = len(months) if end is None else min(max(end.ordinal - first + 1, 0), len(months))
+    return slice(lo, max(lo, hi))
+
+
+def query_trend(store, params):
+    # Monthly sums in the dashboard's trend format: one record per month with a 'name'
+    cube = _cube(store, params)
+    rows, months = _select_rows(cube, params), _month_slice(cube, params)
+    values = cube["values"][:, months] if rows is None else cube["values"][rows, months]
+    sums = values.sum(axis=0).astype(np.int64)
+    return [{**dict(zip(cube["columns"], map(int, row))), "name": str(month)}
+            for month, row in zip(cube["months"][months], sums)]
+
+
+def query_breakdown(store, params):
+    # Totals per state, district or pincode, largest first
+    cube = _cube(store, params)
+    by = _one(params, 'by', 'district')
+    if by not in KEYS:
+        raise QueryError(f"'by' must be one of {', '.join(KEYS)}")
+    rows, months = _select_rows(cube, params), _month_slice(cube, params)
+    if rows is None:
+        rows = np.arange(len(cube["index"]))
+    keys = cube["index"][KEYS[:KEYS.index(by) + 1]].iloc[rows]
+    sums = cube["values"][rows, months].sum(axis=1)
+    frame = pd.DataFrame(sums, columns=cube["columns"], index=pd.MultiIndex.from_frame(keys))
+    frame = frame.groupby(level=list(keys.columns), sort=True).sum()
+    frame['total'] = frame.sum(axis=1)
+    frame = frame.astype(np.int64).reset_index()
+    frame = frame.iloc[top_k_positions(frame['total'].to_numpy(), _int(params, 'limit', DEFAULT_LIMIT))]
+    return frame.to_dict(orient='records')
+
+
+def query_gap(store, params):
+    gap = store["gap"]
+    state, district = _one(params, 'state'), _one(params, 'district')
+    if district is not None and state is None:
+        raise QueryError("'district' needs 'state'")  # District names repeat across states
+    if state is not None:
+        gap = gap[gap['state'] == state]
+    if district is not None:
+        gap = gap[gap['district'] == district]
+    top = gap.iloc[top_k_positions(gap['need_score'].to_numpy(), _int(params, 'limit', DEFAULT_LIMIT))]
+    return {"top_priority_locations": top.to_dict(orient='records')}
+
+
+def query_meta(store, params):
+    # Categories cover different months (and states), so months and states are unions over every cube
+    cubes = store["cubes"]
+    months = {category: [str(m) for m in c["months"]] for category, c in cubes.items()}
+    return {
+        "categories": {category: c["columns"] for category, c in cubes.items()},
+        "months": sorted(set().union(*months.values())),
+        "category_months": months,
+        "states": sorted(set().union(*(c["rows"]["state"] for c in cubes.values()))),
+    }
+
+
+def query_districts(store, params):
+    state = _one(params, 'state')
+    if state is None:
+        raise QueryError("'state' is required")
+    cube = _cube(store, params)
+    index = cube["index"].iloc[cube["rows"]["state"].get(state, np.arange(0))]
+    return {district: sorted(int(p) for p in group['pincode'].unique())
+            for district, group in index.groupby('district', sort=True)}
+
+
+QUERIES = {
+    "/api/meta": query_meta,
+    "/api/districts": query_districts,
+    "/api/trend": query_trend,
+    "/api/breakdown": query_breakdown,
+    "/api/gap": query_gap,
+}
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses: key -> (etag, body)."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+def respond(store, cache, path, query):
+    """(status, etag, body) for a GET of path?query; bodies are cached by the normalized query."""
+    params = parse_qs(query)
+    key = path + "?" + "&".join(f"{k}={v[-1]}" for k, v in sorted(params.items()))
+    entry = cache.get(key)
+    if entry is not None:
+        return 200, *entry
+    handler = QUERIES.get(path)
+    if handler is None:
+        return 404, None, json.dumps({"error": f"unknown endpoint {path}"}).encode()
+    try:
+        result = handler(store, params)
+    except QueryError as e:
+        return 400, None, json.dumps({"error": str(e)}).encode()
+    body = json.dumps(result, default=str).encode()
+    entry = ('"' + hashlib.sha1(body).hexdigest() + '"', body)
+    cache.put(key, entry)
+    return 200, *entry
+
+
+def make_handler(store, cache):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            status, etag, body = respond(store, cache, url.path.rstrip('/'), url.query)
+            if etag is not None and etag in self.headers.get('If-None-Match', ''):
+                status, body = 304, b''
+            self.send_response(status)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            if etag is not None:
+                # Clients may keep the body but must revalidate it, since a restart can change the data
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            if status != 304:
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # One line per request would drown the console
+
+    return QueryHandler
+
+
+def serve(host=HOST, port=PORT, incremental=True, chunk_size=None, workers=None, cache_size=CACHE_SIZE):
+    """Load the data once, then answer queries until interrupted."""
+    print("Loading aggregates...")
+    store = load_store(incremental, chunk_size, workers)
+    server = ThreadingHTTPServer((host, port), make_handler(store, ResponseCache(cache_size)))
+    print(f"Query service listening on http://{host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local query API over the Aadhaar aggregates")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--full-load", action="store_true",
+                        help="read every shard instead of the incremental partial aggregates")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="stream shards in chunks of this many rows to bound memory")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="load shards on a pool of this many processes")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="responses kept in the LRU cache")
+    args = parser.parse_args()
+    serve(args.host, args.port, not args.full_load, args.chunk_size, args.workers, args.cache_size)
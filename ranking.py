@@ -0,0 +1,30 @@
+import numpy as np
+
+# Top-K rankings for the dashboard exports. Instead of fully sorting a frame to
+# keep its head, the K largest values are found with a partial selection and
+# only those K rows are ordered. Ties keep the frame's row order, which for the
+# groupby outputs we rank is pincode/district order, so the result is exactly
+# sort_values(ascending=False, kind='stable').head(k).
+
+
+def top_k_positions(values, k=None):
+    # NaN ranks last, as in sort_values
+    keys = np.asarray(values, dtype=float)
+    keys = np.where(np.isnan(keys), -np.inf, keys)
+    n = len(keys)
+    if k is None or k >= n:
+        candidates = np.arange(n)
+    elif k <= 0:
+        return np.arange(0)
+    else:
+        kth = np.partition(keys, n - k)[n - k]
+        above = np.flatnonzero(keys > kth)
+        # Fill the remaining slots with the earliest rows tied at the threshold
+        ties = np.flatnonzero(keys == kth)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+    return candidates[np.lexsort((candidates, -keys[candidates]))]
+
+
+def top_k(df, column, k=None):
+    """Rows of df with the k largest values of column (all rows if k is None), descending."""
+    return df.iloc[top_k_positions(df[column].to_numpy(), k)]
@@ -0,0 +1,213 @@
+import os
+import json
+import html
+import hashlib
+from string import Template
+from concurrent.futures import ProcessPoolExecutor
+import constants
+
+# Insight reports for All India and every state, written next to the charts.
+# Each report is rendered from the same metrics the dashboard gets (growth
+# patterns, recommendations, anomalies, district breakdown and monthly trends)
+# through templates parsed once at import, so a render is only string
+# substitution. Reports are keyed by a hash of their metrics (plus the charts
+# they link), kept in a manifest like the charts', and only stale ones are
+# rendered, on a process pool. Markdown and HTML link the trend charts; PDF
+# pages are drawn with matplotlib, imported only when a PDF is due.
+
+REPORT_VERSION = "1"  # Bump when the templates change
+REPORT_FORMATS = constants.REPORT_FORMATS
+MANIFEST_FILE = ".report_hashes.json"
+REPORT_DISTRICTS = 15  # District breakdown rows shown per report
+REPORT_ANOMALIES = 10
+CATEGORIES = ["enrolment", "biometric", "demographic"]
+PDF_LINES = 60  # Text lines per PDF page
+PAGE_SIZE = (8.27, 11.69)  # A4, inches
+
+MARKDOWN = {
+    "report": Template("# Aadhaar Insights: $region\n\n"
+                       "## Growth Patterns\n\n"
+                       "- Peak enrolment month: **$peak_month** ($peak_value enrolments)\n"
+                       "- Leading biometric update group: $peak_bio\n"
+                       "- Leading demographic update group: $peak_demo\n\n"
+                       "## Monthly Trends\n\n$trends\n\n"
+                       "## Recommendations\n\n$recommendations\n\n"
+                       "## Anomalies\n\n$anomalies\n\n"
+                       "## District Breakdown\n\n$districts\n"),
+    "recommendation": Template("- **$title**: $description"),
+    "chart": Template("![$title]($path)"),
+    "empty": Template("_None in the current data._"),
+}
+HTML = {
+    "report": Template("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+                       "<title>Aadhaar Insights: $region</title></head>\n<body>\n"
+                       "<h1>Aadhaar Insights: $region</h1>\n"
+                       "<h2>Growth Patterns</h2>\n<ul>\n"
+                       "<li>Peak enrolment month: <strong>$peak_month</strong> ($peak_value enrolments)</li>\n"
+                       "<li>Leading biometric update group: $peak_bio</li>\n"
+                       "<li>Leading demographic update group: $peak_demo</li>\n</ul>\n"
+                       "<h2>Monthly Trends</h2>\n$trends\n"
+                       "<h2>Recommendations</h2>\n<ul>\n$recommendations\n</ul>\n"
+                       "<h2>Anomalies</h2>\n$anomalies\n"
+                       "<h2>District Breakdown</h2>\n$districts\n"
+                       "</body></html>\n"),
+    "recommendation": Template("<li><strong>$title</strong>: $description</li>"),
+    "chart": Template("<img src=\"$path\" alt=\"$title\" width=\"800\">"),
+    "empty": Template("<p><em>None in the current data.</em></p>"),
+}
+
+
+def report_name(slug, fmt):
+    return f"{slug}.{fmt}"
+
+
+def report_key(metrics, fmt, charts):
+    digest = hashlib.sha256()
+    digest.update(f"{REPORT_VERSION}|{fmt}|{sorted(charts.items())}|".encode())
+    digest.update(json.dumps(metrics, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def monthly_totals(trend):
+    # [(month, total)] of a trend's records, summing every count field
+    return [(row["name"], sum(v for k, v in row.items() if k != "name")) for row in trend]
+
+
+def trend_rows(trends):
+    """One summary record per category: months covered, peak and latest month totals."""
+    rows = []
+    for category in CATEGORIES:
+        totals = monthly_totals(trends.get(category, []))
+        if not totals:
+            continue
+        peak = max(totals, key=lambda t: t[1])
+        rows.append({"category": category, "months": f"{totals[0][0]} to {totals[-1][0]}",
+                     "peak": f"{peak[1]} ({peak[0]})", "latest": f"{totals[-1][1]} ({totals[-1][0]})"})
+    return rows
+
+
+def markdown_table(records):
+    if not records:
+        return MARKDOWN["empty"].substitute()
+    fields = list(records[0])
+    lines = ["| " + " | ".join(fields) + " |", "|" + "---|" * len(fields)]
+    lines += ["| " + " | ".join(str(r.get(f, "")) for f in fields) + " |" for r in records]
+    return "\n".join(lines)
+
+
+def html_table(records):
+    if not records:
+        return HTML["empty"].substitute()
+    fields = list(records[0])
+    head = "".join(f"<th>{html.escape(f)}</th>" for f in fields)
+    body = "\n".join("<tr>" + "".join(f"<td>{html.escape(str(r.get(f, '')))}</td>" for f in fields) + "</tr>"
+                     for r in records)
+    return f"<table>\n<tr>{head}</tr>\n{body}\n</table>"
+
+
+def render_text(region, metrics, charts, fmt):
+    """Markdown or HTML report text; charts maps category to a chart path relative to the report."""
+    templates, table = (MARKDOWN, markdown_table) if fmt == "md" else (HTML, html_table)
+    escape = (lambda s: s) if fmt == "md" else html.escape
+    growth = metrics["growth_patterns"]
+    trends = [table(trend_rows(metrics["trends"]))]
+    trends += [templates["chart"].substitute(title=escape(f"{category} trends"), path=escape(path))
+               for category, path in charts.items()]
+    return templates["report"].substitute(
+        region=escape(region),
+        peak_month=escape(str(growth["peak_enrolment"]["month"])),
+        peak_value=growth["peak_enrolment"]["value"],
+        peak_bio=escape(str(growth["peak_bio_category"])),
+        peak_demo=escape(str(growth["peak_demo_category"])),
+        trends="\n\n".join(trends),
+        recommendations="\n".join(templates["recommendation"].substitute(
+            title=escape(r["title"]), description=escape(r["description"])) for r in metrics["recommendations"]),
+        anomalies=table(metrics["anomalies"][:REPORT_ANOMALIES]),
+        districts=table(metrics["district_breakdown"][:REPORT_DISTRICTS]),
+    )
+
+
+def render_pdf(path, region, metrics):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    lines = render_text(region, metrics, {}, "md").splitlines()
+    with PdfPages(path) as pdf:
+        for start in range(0, len(lines), PDF_LINES):
+            fig = plt.figure(figsize=PAGE_SIZE)
+            fig.text(0.05, 0.97, "\n".join(lines[start:start + PDF_LINES]), va="top",
+                     family="monospace", fontsize=7)
+            pdf.savefig(fig)
+            plt.close(fig)
+        # Trend page, drawn from the same monthly totals the text summarizes
+        fig, axes = plt.subplots(len(CATEGORIES), 1, figsize=PAGE_SIZE)
+        for ax, category in zip(axes, CATEGORIES):
+            totals = monthly_totals(metrics["trends"].get(category, []))
+            ax.plot([m for m, _ in totals], [t for _, t in totals], marker="o")
+            ax.set_title(f"{region}: {category}")
+            ax.set_ylabel("Count")
+            ax.grid(True)
+            ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+        pdf.savefig(fig)
+        plt.close(fig)
+
+
+def render_report(path, fmt, region, metrics, charts):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == "pdf":
+        render_pdf(path, region, metrics)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_text(region, metrics, charts, fmt))
+    return path
+
+
+def _read_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def write_reports(regions, out_dir, formats=("md",), charts=None, workers=None):
+    """Render {region: (slug, metrics)} in every format into out_dir, skipping unchanged reports.
+
+    charts maps a region to {category: chart path} for the charts its report
+    links (paths relative to out_dir). Returns the names of the reports that
+    were (re)written.
+    """
+    charts = charts or {}
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = _read_manifest(manifest_path)
+    keys, jobs = {}, []
+    for region, (slug, metrics) in regions.items():
+        for fmt in formats:
+            name = report_name(slug, fmt)
+            linked = charts.get(region, {}) if fmt != "pdf" else {}
+            keys[name] = report_key(metrics, fmt, linked)
+            if manifest.get(name) != keys[name] or not os.path.exists(os.path.join(out_dir, name)):
+                jobs.append((name, (os.path.join(out_dir, name), fmt, region, metrics, linked)))
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(render_report, *job) for _, job in jobs]:
+                future.result()
+    else:
+        for _, job in jobs:
+            render_report(*job)
+
+    if jobs:
+        manifest.update({name: keys[name] for name, _ in jobs})
+        _write_manifest(manifest_path, manifest)
+    return [name for name, _ in jobs]
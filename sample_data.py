@@ -1,5 +1,7 @@
 import pandas as pd
 import os
+from prefetch import SHARD_SUFFIXES
+from schema import READ_DTYPES, memory_report
 
 base_dir = r"E:\adhar hackathon"
 dirs = ["api_data_aadhar_biometric", "api_data_aadhar_demographic", "api_data_aadhar_enrolment"]
@@ -15,18 +17,21 @@ for d in dirs:
         results.append(f"Directory {dir_path} does not exist.")
         continue
         
-    files = [f for f in os.listdir(dir_path) if f.endswith(".csv")]
+    files = sorted(f for f in os.listdir(dir_path) if f.endswith(SHARD_SUFFIXES))
     if files:
         file_path = os.path.join(dir_path, files[0])
         results.append(f"\n--- {d} ({files[0]}) ---")
         try:
-            df = pd.read_csv(file_path, nrows=5)
+            df = pd.read_csv(file_path, nrows=5, dtype=READ_DTYPES)
             results.append(f"Columns: {df.columns.tolist()}")
             results.append(df.head(2).to_string())
-            
-            # Additional analysis: Check for missing values and data types
-            results.append("\nData Types:")
-            results.append(str(df.dtypes))
+
+            # Declared schema types and what they save over pandas' defaults on the whole shard
+            report = memory_report(file_path)
+            results.append("\nData Types (schema):")
+            results.append("\n".join(f"{col:<16}{dtype}" for col, dtype in report["schema_dtypes"].items()))
+            results.append(f"\nMemory: {report['default_bytes_per_row']} bytes/row with default dtypes, "
+                           f"{report['schema_bytes_per_row']} with the schema ({report['rows']} rows)")
         except Exception as e:
             results.append(f"Error reading {file_path}: {e}")
     else:
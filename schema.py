@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Declared column types for the api_data_aadhar_* shards. Counts are stored in
+# the smallest integer type that safely holds them, pincodes as int32 and
+# state/district as categoricals, and the dd-mm-yyyy dates are parsed with an
+# explicit format. The C parser silently wraps integers that do not fit a
+# narrow dtype, so counts are parsed at full width and range-checked against
+# their declared type before the cast.
+
+DATE_FORMAT = "%d-%m-%Y"
+CATEGORICAL_COLUMNS = ['state', 'district']
+KEY_DTYPES = {'pincode': 'int32'}
+COUNT_DTYPES = {
+    'enrolment': {'age_0_5': 'int16', 'age_5_17': 'int16', 'age_18_greater': 'int16'},
+    'biometric': {'bio_age_5_17': 'int16', 'bio_age_17_': 'int32'},
+    'demographic': {'demo_age_5_17': 'int16', 'demo_age_17_': 'int32'},
+}
+READ_DTYPES = {col: 'category' for col in CATEGORICAL_COLUMNS}
+
+
+def count_dtype(column):
+    # Declared type of a count column; undeclared age columns get int32
+    for dtypes in COUNT_DTYPES.values():
+        if column in dtypes:
+            return dtypes[column]
+    return 'int32'
+
+
+def parse_dates(values):
+    # Unparseable dates become NaT, for prepare_frame to count and drop
+    return pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+
+
+def _checked_cast(series, dtype, source):
+    # Cast to dtype, refusing values it cannot hold
+    if pd.api.types.is_integer_dtype(series) and len(series):
+        info = np.iinfo(dtype)
+        lo, hi = series.min(), series.max()
+        if lo < info.min or hi > info.max:
+            raise OverflowError(f"{series.name} in {source or 'frame'} has values in [{lo}, {hi}], "
+                                f"outside {dtype}; widen its type in schema.COUNT_DTYPES")
+        return series.astype(dtype)
+    # Missing values keep the parsed (float) column, as before
+    return series
+
+
+def apply_schema(df, source=None):
+    """Cast df's columns to the declared types (after an overflow check)."""
+    df = df.reset_index(drop=True)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col, dtype in KEY_DTYPES.items():
+        if col in df.columns:
+            df[col] = _checked_cast(df[col], dtype, source)
+    for col in [c for c in df.columns if 'age' in c]:
+        df[col] = _checked_cast(df[col], count_dtype(col), source)
+    return df
+
+
+def bytes_per_row(df):
+    return df.memory_usage(index=False, deep=True).sum() / max(len(df), 1)
+
+
+def memory_report(csv_path, nrows=None):
+    """Bytes per row of a shard read with pandas defaults vs. the declared schema."""
+    from normalization import normalize_locations
+    default = pd.read_csv(csv_path, nrows=nrows)
+    default['month'] = pd.to_datetime(default['date'], dayfirst=True).dt.to_period('M')
+    typed = pd.read_csv(csv_path, nrows=nrows, dtype=READ_DTYPES)
+    typed['date'] = parse_dates(typed['date'])
+    typed = apply_schema(normalize_locations(typed), csv_path)
+    return {
+        "rows": len(default),
+        "default_bytes_per_row": round(bytes_per_row(default), 1),
+        "schema_bytes_per_row": round(bytes_per_row(typed), 1),
+        "default_dtypes": default.dtypes.astype(str).to_dict(),
+        "schema_dtypes": typed.dtypes.astype(str).to_dict(),
+    }
@@ -0,0 +1,247 @@
+import io
+import os
+import json
+import numpy as np
+import pandas as pd
+import data_quality
+from normalization import normalize_locations
+from prefetch import DEPTH as PREFETCH_DEPTH, SHARD_SUFFIXES, prefetch, shard_stem
+from profiling import stage
+from schema import CATEGORICAL_COLUMNS, READ_DTYPES, apply_schema, parse_dates
+
+# Persistent columnar cache for the api_data_aadhar_* CSV shards.
+# Each shard is parsed, normalized and compacted once, then stored as an
+# uncompressed Arrow IPC file that later runs read through a memory map.
+# A cache file is rebuilt whenever its source CSV's size or mtime changes.
+# Shards that do need parsing are read ahead on threads (prefetch.py) and may
+# be gzip or zstd compressed. Parsing also runs the data_quality checks; each
+# cache file keeps the shard's row hashes and check results beside it, and
+# rows repeating earlier ones are dropped when shards are combined.
+
+try:
+    import pyarrow as pa
+except ImportError:  # No pyarrow: parse the CSVs on every run, as before
+    pa = None
+
+CACHE_VERSION = "3"  # 2: declared schema dtypes, 3: row hashes and quality checks beside each shard
+
+
+def list_shards(dir_path):
+    return sorted(os.path.join(dir_path, f) for f in os.listdir(dir_path) if f.endswith(SHARD_SUFFIXES))
+
+
+def prepare_frame(df, source=None, report=None):
+    """Raw CSV rows -> (typed, normalized, compact frame, hashes of its raw rows).
+
+    Check results are added to report. Hashes are taken before normalization,
+    so only rows delivered identically count as duplicates.
+    """
+    report = {} if report is None else report
+    with stage("validate", len(df)):
+        hashes = pd.Series(data_quality.row_hashes(df), index=df.index)
+    with stage("parse_dates", len(df)):
+        dates = parse_dates(df['date'])
+        unparsed = dates.isna().to_numpy()
+        data_quality.add_check(report, "unparseable_date", df, unparsed)
+        df['date'] = dates
+        if unparsed.any():
+            df = df[~unparsed]
+    with stage("normalize", len(df)) as record:
+        normalized = normalize_locations(df)
+        if len(normalized) < len(df):
+            # Rows normalize_locations drops (numeric or empty state names)
+            data_quality.add_check(report, "unknown_state", df, ~df.index.isin(normalized.index))
+        record["rows_out"] = len(normalized)
+    with stage("validate", len(normalized)):
+        for check, mask in data_quality.check_rows(normalized).items():
+            data_quality.add_check(report, check, normalized, mask)
+    return apply_schema(normalized, source), hashes.loc[normalized.index].to_numpy()
+
+
+def read_csv(csv_path, **kwargs):
+    # State/district are read straight into categoricals; counts at full width for the overflow check.
+    # Compression is inferred from a path's suffix.
+    return pd.read_csv(csv_path, dtype=READ_DTYPES, **kwargs)
+
+
+def parse_shard(csv_path, data=None):
+    # (frame, row hashes, check report); data: the shard's bytes when they were already read ahead
+    with stage("read_csv") as record:
+        df = read_csv(csv_path if data is None else io.BytesIO(data))
+        record["rows_out"] = len(df)
+    report = {}
+    return (*prepare_frame(df, csv_path, report), report)
+
+
+def cache_path(cache_dir, csv_path):
+    category_dir = os.path.basename(os.path.dirname(csv_path))
+    name = shard_stem(csv_path) + ".arrow"
+    return os.path.join(cache_dir, category_dir, name)
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def source_signature(csv_path):
+    size, mtime_ns = file_signature(csv_path)
+    return {
+        b'cache_version': CACHE_VERSION.encode(),
+        b'source_size': str(size).encode(),
+        b'source_mtime_ns': str(mtime_ns).encode(),
+    }
+
+
+def _fresh(reader, signature):
+    metadata = reader.schema.metadata or {}
+    return all(metadata.get(k) == v for k, v in signature.items())
+
+
+def _sidecars(path):
+    # Row hashes and check report stored next to a cache file
+    return path + ".hashes.npy", path + ".quality.json"
+
+
+def _read_cached(path, signature):
+    hashes_path, report_path = _sidecars(path)
+    if not all(os.path.exists(p) for p in (path, hashes_path, report_path)):
+        return None
+    with pa.memory_map(path, 'r') as source:
+        reader = pa.ipc.open_file(source)
+        if not _fresh(reader, signature):
+            return None
+        df = reader.read_all().to_pandas()
+    with open(report_path) as f:
+        report = json.load(f)
+    # Memory-mapped: only read when the duplicate index needs them
+    return df, np.load(hashes_path, mmap_mode='r'), report
+
+
+def is_cached(csv_path, cache_dir=None):
+    # True when read_shard would come from a fresh cache file (only its schema is read here)
+    if pa is None or cache_dir is None:
+        return False
+    path = cache_path(cache_dir, csv_path)
+    if not os.path.exists(path):
+        return False
+    with pa.memory_map(path, 'r') as source:
+        return _fresh(pa.ipc.open_file(source), source_signature(csv_path))
+
+
+def cached_hashes(csv_path, cache_dir=None):
+    # Row hashes of a shard whose cache file is fresh, else None
+    if not is_cached(csv_path, cache_dir):
+        return None
+    hashes_path = _sidecars(cache_path(cache_dir, csv_path))[0]
+    return np.load(hashes_path, mmap_mode='r') if os.path.exists(hashes_path) else None
+
+
+def _write_cached(path, df, signature, hashes, report):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Sidecars first: the cache file is what marks the shard as done
+    hashes_path, report_path = _sidecars(path)
+    np.save(hashes_path, hashes)
+    with open(report_path, "w") as f:
+        json.dump(report, f, default=str)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **signature})
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_checked_shard(csv_path, cache_dir=None, data=None):
+    """(frame, row hashes, check report) for one shard, from the cache when it is fresh."""
+    if pa is None or cache_dir is None:
+        return parse_shard(csv_path, data)
+    path = cache_path(cache_dir, csv_path)
+    signature = source_signature(csv_path)
+    with stage("read_cache") as record:
+        cached = _read_cached(path, signature)
+        record["rows_out"] = None if cached is None else len(cached[0])
+    if cached is None:
+        df, hashes, report = parse_shard(csv_path, data)
+        _write_cached(path, df, signature, hashes, report)
+        return df, hashes, report
+    return cached
+
+
+def read_shard(csv_path, cache_dir=None, data=None):
+    # Typed, normalized frame for one shard, from the cache when it is fresh
+    return read_checked_shard(csv_path, cache_dir, data)[0]
+
+
+def concat_shards(frames):
+    # Align categories first so the concatenated columns stay categorical
+    for col in CATEGORICAL_COLUMNS:
+        if frames and all(col in f.columns for f in frames):
+            categories = pd.Index(sorted(set().union(*(f[col].cat.categories for f in frames))))
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_checked_shards(paths, cache_dir=None, depth=PREFETCH_DEPTH):
+    """(path, frame, hashes, report) in path order; uncached shards are read ahead while others parse."""
+    for path, data in prefetch(paths, depth, lambda p: not is_cached(p, cache_dir)):
+        yield (path, *read_checked_shard(path, cache_dir, data))
+
+
+def read_shards(paths, cache_dir=None, depth=PREFETCH_DEPTH):
+    for _, df, _, _ in read_checked_shards(paths, cache_dir, depth):
+        yield df
+
+
+def shard_hashes(path, cache_dir=None):
+    hashes = cached_hashes(path, cache_dir)
+    return hashes if hashes is not None else read_checked_shard(path, cache_dir)[1]
+
+
+def duplicate_index(dir_path, cache_dir=None):
+    # Duplicate index over every shard of dir_path, persisted under cache_dir when set
+    paths = list_shards(dir_path)
+    return data_quality.DuplicateIndex(dir_path, paths, [file_signature(p) for p in paths], cache_dir)
+
+
+def duplicate_positions(dir_path, hashes, cache_dir=None):
+    # {path: row positions to drop} for every shard of dir_path; hashes: those already at hand
+    paths = list_shards(dir_path)
+    with stage("dedup", len(paths)):
+        return data_quality.duplicate_rows(
+            dir_path, paths, [file_signature(p) for p in paths],
+            lambda p: hashes[p] if p in hashes else shard_hashes(p, cache_dir), cache_dir)
+
+
+def without_rows(df, positions, report):
+    # df minus the duplicate rows at positions, recorded under report
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[positions] = True
+    if not duplicate.any():
+        return df, report
+    report = dict(report)
+    data_quality.add_check(report, "duplicate_row", df, duplicate)
+    return df[~duplicate].reset_index(drop=True), report
+
+
+def drop_duplicates(dir_path, shards, cache_dir=None):
+    """Frames of shards ([(path, frame, hashes, report)]) without rows repeating an earlier one.
+
+    Duplicates are looked up against every shard in dir_path (through the
+    persistent index when cache_dir is set), and each shard's checks are added
+    to the run's quality report.
+    """
+    drops = duplicate_positions(dir_path, {path: h for path, _, h, _ in shards}, cache_dir)
+    frames = []
+    for path, df, _, report in shards:
+        rows = len(df)
+        df, report = without_rows(df, drops[path], report)
+        data_quality.record(path, report, rows)
+        frames.append(df)
+    return frames
+
+
+def load_category(dir_path, cache_dir=None, depth=PREFETCH_DEPTH):
+    shards = list(read_checked_shards(list_shards(dir_path), cache_dir, depth))
+    return concat_shards(drop_duplicates(dir_path, shards, cache_dir))
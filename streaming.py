@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import data_quality
+from shard_cache import prepare_frame, read_csv, list_shards, duplicate_index
+from partials import aggregate_partials, combine_partials
+from profiling import peak_rss_bytes
+
+# Out-of-core load path: shards are read in bounded chunks, each chunk is
+# normalized and reduced to (pincode, state, district, month) partial sums, and
+# the partials are folded together. Peak memory is roughly one chunk plus the
+# aggregate, independent of how many rows the shards hold. Duplicate rows are
+# looked up chunk by chunk in the category's persistent duplicate index (8 bytes
+# per kept row), so chunked, incremental and full loads drop the same rows.
+
+
+def stream_chunk_partials(csv_path, chunk_size, index=None, drop=None):
+    """Yield (partials, row hashes) per chunk of csv_path.
+
+    Duplicate rows are those at the shard positions in drop, or else the ones
+    the index has already seen (each chunk is then added to it).
+    """
+    offset = 0
+    for chunk in read_csv(csv_path, chunksize=chunk_size):
+        report = {}
+        df, hashes = prepare_frame(chunk, csv_path, report)
+        rows = len(df)
+        if drop is not None:
+            duplicate = np.isin(np.arange(offset, offset + rows), drop)
+        elif index is not None:
+            duplicate = ~index.add(csv_path, hashes, offset)
+        else:
+            duplicate = np.zeros(rows, dtype=bool)
+        offset += rows
+        data_quality.add_check(report, "duplicate_row", df, duplicate)
+        data_quality.record(csv_path, report, rows)
+        yield aggregate_partials(df[~duplicate]), hashes
+
+
+def stream_partials(paths, chunk_size, cache_dir=None):
+    """Fold the partials of paths (shards of one category) chunk by chunk.
+
+    Rows are checked for duplicates against every shard of the category. Shards
+    the index has not seen yet are hashed in load order, including ones outside
+    paths (they are not aggregated).
+    """
+    if not paths:
+        return None
+    dir_path = os.path.dirname(paths[0])
+    index = duplicate_index(dir_path, cache_dir)
+    wanted = set(paths)
+
+    def chunks():
+        for path in list_shards(dir_path):
+            pending = index.is_pending(path)
+            if path in wanted:
+                drop = None if pending else index.drops(path)
+                for partials, _ in stream_chunk_partials(path, chunk_size, index, drop):
+                    yield partials
+            elif pending:
+                offset = 0
+                for chunk in read_csv(path, chunksize=chunk_size):
+                    _, hashes = prepare_frame(chunk, path)
+                    index.add(path, hashes, offset)
+                    offset += len(hashes)
+
+    partials = combine_partials(chunks(), max_pending_rows=chunk_size)
+    index.save()
+    return partials
+
+
+def report_peak_rss():
+    peak = peak_rss_bytes()
+    if peak is None:
+        print("Peak RSS: unavailable on this platform")
+    else:
+        print(f"Peak RSS: {peak / (1024 * 1024):.1f} MB")
@@ -0,0 +1,147 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from normalization import STATE_MAPPING, DISTRICT_MAPPING, normalize_state, normalize_district
+
+# Synthetic api_data_aadhar_* shards for benchmarking at national volumes.
+# Locations are the (state, district, pincode) triples found in the sample
+# shards shipped with the repo. States are weighted by their pincode count,
+# districts get Zipf-like popularity within their state and pincodes a
+# lognormal spread. Counts follow the sample means with heavy tails, and a share
+# of names is swapped for known misspellings ("Westbengal", "Orissa",
+# "Bangalore", ...) so normalization does real work.
+
+BASE_DIR = r"E:\adhar hackathon"
+SEED_DIRS = ["api_data_aadhar_enrolment", "api_data_aadhar_demographic"]
+CATEGORIES = {
+    # category: (directory, first row id in shard names, {column: mean count per row})
+    "enrolment": ("api_data_aadhar_enrolment", 1000000,
+                  {"age_0_5": 3.6, "age_5_17": 3.5, "age_18_greater": 0.1}),
+    "demographic": ("api_data_aadhar_demographic", 2000000,
+                    {"demo_age_5_17": 1.3, "demo_age_17_": 12.4}),
+    "biometric": ("api_data_aadhar_biometric", 3000000,
+                  {"bio_age_5_17": 6.0, "bio_age_17_": 9.0}),
+}
+SHARD_ROWS = 500000
+START_DATE = "2025-03-01"
+END_DATE = "2025-12-31"
+MISSPELL_RATE = 0.02  # Share of rows written with a misspelled state or district
+SKEW = 1.1  # Zipf exponent for district popularity within a state
+
+
+def parse_scale(text):
+    # "10k", "2.5M", "100M" or a plain row count
+    units = {"k": 10**3, "m": 10**6, "b": 10**9}
+    text = text.strip().lower()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def load_locations(seed_dirs):
+    # Distinct (state, district, pincode) triples from the sample shards
+    frames = []
+    for d in seed_dirs:
+        for f in sorted(os.listdir(d)):
+            if f.endswith(".csv"):
+                frames.append(pd.read_csv(os.path.join(d, f), usecols=["state", "district", "pincode"]))
+    if not frames:
+        raise FileNotFoundError(f"No sample shards found in {seed_dirs}")
+    locations = pd.concat(frames, ignore_index=True).drop_duplicates()
+    locations = locations[locations["state"].astype(str).str.strip() != ""].dropna()
+    return locations.sort_values(["state", "district", "pincode"]).reset_index(drop=True)
+
+
+def zipf_weights(n, rng):
+    # Popularity 1 / rank^SKEW over a random ranking
+    ranks = rng.permutation(n) + 1
+    return 1.0 / ranks ** SKEW
+
+
+def location_weights(locations, rng):
+    state_codes, states = pd.factorize(locations["state"])
+    pair_codes = locations.groupby(["state", "district"], sort=False).ngroup().to_numpy()
+    # States weigh in with their pincode count; districts are ranked within their state
+    state_w = np.bincount(state_codes) / len(locations)
+    pair_w = np.zeros(pair_codes.max() + 1)
+    for s in range(len(states)):
+        pairs = np.unique(pair_codes[state_codes == s])
+        pair_w[pairs] = zipf_weights(len(pairs), rng) * state_w[s]
+    pin_w = rng.lognormal(0.0, 1.0, size=len(locations))
+    weights = pair_w[pair_codes] * pin_w
+    return weights / weights.sum()
+
+
+def misspellings(names, mapping, normalize):
+    # For each name, the mapping keys that normalize to the same canonical name
+    variants = {}
+    for raw in mapping:
+        variants.setdefault(normalize(raw), []).append(raw)
+    out = {}
+    for name in names:
+        options = [v for v in variants.get(normalize(name), []) if v != name]
+        if options:
+            out[name] = options
+    return out
+
+
+def apply_misspellings(values, variants, rate, rng):
+    values = values.copy()
+    hit = np.flatnonzero(rng.random(len(values)) < rate)
+    for i in hit:
+        options = variants.get(values[i])
+        if options:
+            values[i] = options[rng.integers(len(options))]
+    return values
+
+
+def generate_rows(n, locations, weights, columns, rng, state_variants, district_variants):
+    picks = rng.choice(len(locations), size=n, p=weights)
+    days = pd.date_range(START_DATE, END_DATE, freq="D")
+    day_labels = np.asarray(days.strftime("%d-%m-%Y"))
+    df = pd.DataFrame({
+        "date": day_labels[rng.integers(len(days), size=n)],
+        "state": apply_misspellings(locations["state"].to_numpy()[picks], state_variants, MISSPELL_RATE, rng),
+        "district": apply_misspellings(locations["district"].to_numpy()[picks], district_variants, MISSPELL_RATE, rng),
+        "pincode": locations["pincode"].to_numpy()[picks],
+    })
+    # Busier pincodes report larger counts; the lognormal factor gives the long tail
+    activity = rng.lognormal(0.0, 0.8, size=n) * (weights[picks] * len(weights)) ** 0.25
+    activity /= activity.mean()
+    for col, mean in columns.items():
+        df[col] = rng.poisson(mean * activity)
+    return df
+
+
+def generate(out_dir, rows, categories=None, seed=42, shard_rows=SHARD_ROWS, seed_dirs=None):
+    """Write `rows` rows per category as CSV shards under out_dir/<category dir>."""
+    rng = np.random.default_rng(seed)
+    seed_dirs = seed_dirs or [os.path.join(BASE_DIR, d) for d in SEED_DIRS]
+    locations = load_locations(seed_dirs)
+    weights = location_weights(locations, rng)
+    state_variants = misspellings(locations["state"].unique(), STATE_MAPPING, normalize_state)
+    district_variants = misspellings(
+        locations["district"].unique(), DISTRICT_MAPPING, lambda name: normalize_district(name, None))
+
+    for category in categories or list(CATEGORIES):
+        dir_name, first_id, columns = CATEGORIES[category]
+        dir_path = os.path.join(out_dir, dir_name)
+        os.makedirs(dir_path, exist_ok=True)
+        print(f"Generating {rows:,} {category} rows in {dir_path}")
+        for start in range(0, rows, shard_rows):
+            n = min(shard_rows, rows - start)
+            df = generate_rows(n, locations, weights, columns, rng, state_variants, district_variants)
+            name = f"{dir_name}_{first_id + start}_{first_id + start + n}.csv"
+            df.to_csv(os.path.join(dir_path, name), index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Aadhaar shards")
+    parser.add_argument("out_dir", help="base directory to write the api_data_aadhar_* folders into")
+    parser.add_argument("--rows", default="10k", help="rows per category, e.g. 10k, 1M, 100M")
+    parser.add_argument("--categories", nargs="+", choices=list(CATEGORIES), default=None)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shard-rows", type=int, default=SHARD_ROWS, help="rows per CSV shard")
+    args = parser.parse_args()
+    generate(args.out_dir, parse_scale(args.rows), args.categories, args.seed, args.shard_rows)